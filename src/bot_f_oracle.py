@@ -3,7 +3,6 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-import httpx
 
 # Add project root to sys.path so we can import opennews_mcp
 current_dir = Path(__file__).resolve().parent
@@ -13,12 +12,17 @@ if str(project_root) not in sys.path:
 
 try:
     from opennews_mcp.tools.aggregator_rss import aggregate_free_news
+    from opennews_mcp.http_pool import http_pool
+    from opennews_mcp.telegram_delivery import telegram_delivery
 except ImportError:
     from src.opennews_mcp.tools.aggregator_rss import aggregate_free_news
+    from src.opennews_mcp.http_pool import http_pool
+    from src.opennews_mcp.telegram_delivery import telegram_delivery
 
 # Configuration for Bot F (The Oracle / 先知)
 # Strategy: Reuse Bot A's token if a dedicated Oracle token is not provided.
-# This implements the "5+1" architecture where the 6th bot (Oracle) runs sequentially.
+# This implements the "5+1" architecture: the 6th bot (Oracle) runs on its own or,
+# with `run_multibot_matrix.py --with-oracle`, next to the five matrix bots.
 BOT_TOKEN_ORACLE = os.environ.get("BOT_TOKEN_F") or os.environ.get("BOT_TOKEN_A")
 CHAT_ID = os.environ.get("CHAT_ID_F", "-1003590230315")
 
@@ -32,10 +36,13 @@ async def run_oracle():
     print("   - Scanning global signals...")
     
     # Fetch top 3 items from each key sector
-    world_news = await aggregate_free_news(None, max_items=3, send_to_telegram=False, category="world")
-    finance_news = await aggregate_free_news(None, max_items=3, send_to_telegram=False, category="finance")
-    politics_news = await aggregate_free_news(None, max_items=2, send_to_telegram=False, category="politics")
-    military_news = await aggregate_free_news(None, max_items=2, send_to_telegram=False, category="military")
+    # All four sectors read from the shared feed snapshot, so overlapping sources are fetched once.
+    world_news, finance_news, politics_news, military_news = await asyncio.gather(
+        aggregate_free_news(None, max_items=3, send_to_telegram=False, category="world"),
+        aggregate_free_news(None, max_items=3, send_to_telegram=False, category="finance"),
+        aggregate_free_news(None, max_items=2, send_to_telegram=False, category="politics"),
+        aggregate_free_news(None, max_items=2, send_to_telegram=False, category="military"),
+    )
     
     all_items = world_news.get("items", []) + finance_news.get("items", []) + politics_news.get("items", []) + military_news.get("items", [])
     
@@ -56,7 +63,13 @@ async def run_oracle():
     gemini_key = os.environ.get("GEMINI_API_KEY")
     
     # Prepare prompt (Shared)
-    news_text = "\n".join([f"- {item.get('source')}: {item.get('title')}" for item in all_items[:15]])
+    # 标注每条新闻被多少家来源同时报道，便于模型判断共振强度
+    news_text = "\n".join([
+        f"- {item.get('source')}"
+        + (f" (+{len(item['sources']) - 1} sources)" if len(item.get("sources", [])) > 1 else "")
+        + f": {item.get('title')}"
+        for item in all_items[:15]
+    ])
     prompt_text = f"""
     你是一个专业的情报分析师（Oracle）。请根据以下新闻标题，分析全球风险和金融套利机会：
     
@@ -82,21 +95,21 @@ async def run_oracle():
     if gemini_key:
         try:
             print(f"   - Calling Google Gemini API...")
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Using Gemini 2.0 Flash-Lite (Fastest/Cheapest for Free Tier)
-                url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-lite:generateContent?key={gemini_key}"
-                payload = {
-                    "contents": [{"parts": [{"text": prompt_text}]}]
-                }
-                response = await client.post(url, json=payload)
-                if response.status_code == 200:
-                    result = response.json()
-                    ai_insight = result["candidates"][0]["content"]["parts"][0]["text"].strip()
-                    print("   ✅ Gemini Analysis Complete.")
-                elif response.status_code == 429:
-                    print("   ⚠️ Gemini Rate Limit Exceeded (Free Tier). Switching to Local/Fallback.")
-                else:
-                    print(f"   ⚠️ Gemini Error: {response.status_code} {response.text}")
+            # Using Gemini 2.0 Flash-Lite (Fastest/Cheapest for Free Tier)
+            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-lite:generateContent?key={gemini_key}"
+            payload = {
+                "contents": [{"parts": [{"text": prompt_text}]}]
+            }
+            # 共享连接池会按 Retry-After 重试 429，仍然限流时才降级
+            response = await http_pool.post(url, json=payload, timeout=30.0)
+            if response.status_code == 200:
+                result = response.json()
+                ai_insight = result["candidates"][0]["content"]["parts"][0]["text"].strip()
+                print("   ✅ Gemini Analysis Complete.")
+            elif response.status_code == 429:
+                print("   ⚠️ Gemini Rate Limit Exceeded (Free Tier). Switching to Local/Fallback.")
+            else:
+                print(f"   ⚠️ Gemini Error: {response.status_code} {response.text}")
         except Exception as e:
             print(f"   ⚠️ Gemini connection failed: {e}")
 
@@ -106,15 +119,15 @@ async def run_oracle():
         ollama_model = os.environ.get("OLLAMA_MODEL", "qwen2.5:3b")
         try:
             print(f"   - Calling Local Ollama ({ollama_model})...")
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    ollama_url,
-                    json={"model": ollama_model, "prompt": prompt_text, "stream": False}
-                )
-                if response.status_code == 200:
-                    result = response.json()
-                    ai_insight = result.get("response", "").strip()
-                    print("   ✅ Ollama Analysis Complete.")
+            response = await http_pool.post(
+                ollama_url,
+                json={"model": ollama_model, "prompt": prompt_text, "stream": False},
+                timeout=30.0,
+            )
+            if response.status_code == 200:
+                result = response.json()
+                ai_insight = result.get("response", "").strip()
+                print("   ✅ Ollama Analysis Complete.")
         except Exception as e:
             print(f"   ⚠️ Ollama connection failed: {e}")
 
@@ -156,17 +169,17 @@ async def run_oracle():
     # 4. Send via Bot
     msg_body = "\n".join(report_lines)
     
-    async with httpx.AsyncClient() as client:
-        await client.post(
-            f"https://api.telegram.org/bot{BOT_TOKEN_ORACLE}/sendMessage",
-            json={
-                "chat_id": CHAT_ID, 
-                "text": msg_body, 
-                "parse_mode": "Markdown", 
-                "disable_web_page_preview": True
-            }
-        )
-    print("✅ Oracle Alert Sent.")
+    result = await telegram_delivery.send(BOT_TOKEN_ORACLE, CHAT_ID, msg_body, parse_mode="Markdown")
+    if result.ok:
+        print("✅ Oracle Alert Sent.")
+    else:
+        print(f"❌ Oracle Alert failed: {result.error}")
+
+async def main():
+    try:
+        await run_oracle()
+    finally:
+        await http_pool.aclose()
 
 if __name__ == "__main__":
-    asyncio.run(run_oracle())
+    asyncio.run(main())
@@ -4,11 +4,13 @@ import asyncio
 import json
 import time
 import logging
+from functools import partial
 from typing import Any, Optional
 
 import httpx
 
 from opennews_mcp.config import API_BASE_URL, WSS_URL, API_TOKEN
+from opennews_mcp.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +20,11 @@ MAX_RETRIES = 2
 class NewsAPIClient:
     """Async HTTP client for the 6551 news REST API."""
 
-    def __init__(self, base_url: str = API_BASE_URL, token: str = API_TOKEN):
+    def __init__(self, base_url: str = API_BASE_URL, token: str = API_TOKEN, cache: Optional[ResponseCache] = None):
         self.base_url = base_url.rstrip("/")
         self.token = token
+        # 只有 MCP 服务端传入缓存；监控、cron 和回填需要最新数据，不缓存
+        self.cache = cache
         self._client: Optional[httpx.AsyncClient] = None
 
     def _headers(self) -> dict:
@@ -68,12 +72,21 @@ class NewsAPIClient:
                 raise
         raise last_exc  # type: ignore[misc]
 
+    async def _fetch_json(self, method: str, url: str, **kwargs) -> tuple[Any, int]:
+        resp = await self._request(method, url, **kwargs)
+        return resp.json(), len(resp.content)
+
+    async def _cached(self, endpoint: str, key: str, method: str, url: str, limit: int = 0, **kwargs):
+        fetch = partial(self._fetch_json, method, url, **kwargs)
+        if self.cache is None:
+            return (await fetch())[0]
+        return await self.cache.get(endpoint, key, fetch, limit)
+
     # ---------- REST endpoints ----------
 
     async def get_engine_tree(self) -> dict:
         """GET /open/news_type — 获取所有新闻源分类"""
-        resp = await self._request("GET", f"{self.base_url}/open/news_type")
-        return resp.json()
+        return await self._cached("engine_tree", "", "GET", f"{self.base_url}/open/news_type")
 
     async def search_news(
         self,
@@ -95,8 +108,15 @@ class NewsAPIClient:
         if has_coin:
             body["hasCoin"] = has_coin
 
-        resp = await self._request("POST", f"{self.base_url}/open/news_search", json=body)
-        return resp.json()
+        # 第一页的缓存键不含 limit：limit 更大的缓存结果截取前 limit 条即可
+        first = page == 1
+        key = json.dumps({k: v for k, v in body.items() if not (first and k == "limit")}, sort_keys=True)
+        result = await self._cached("search", key, "POST", f"{self.base_url}/open/news_search",
+                                    limit=limit if first else 0, json=body)
+        data = result.get("data") if isinstance(result, dict) else None
+        if first and isinstance(data, list) and len(data) > limit:
+            return {**result, "data": data[:limit]}
+        return result
 
 
 
@@ -121,6 +141,11 @@ class NewsWSClient:
             await self._ws.close()
             self._ws = None
 
+    @property
+    def connected(self) -> bool:
+        """False once the connection is closed or a receive failed."""
+        return self._ws is not None
+
     async def subscribe_latest(
         self,
         engine_types: Optional[dict[str, list[str]]] = None,
@@ -148,9 +173,15 @@ class NewsWSClient:
             return None
         try:
             msg = await asyncio.wait_for(self._ws.recv(), timeout=timeout)
-            return json.loads(msg)
         except asyncio.TimeoutError:
             return None
         except Exception as e:
+            # 连接已断开：丢弃连接，之后的调用直接返回 None，调用方据 connected 重连
             logger.warning("WebSocket receive error: %s", repr(e))
+            self._ws = None
+            return None
+        try:
+            return json.loads(msg)
+        except ValueError:
+            logger.warning("Ignoring malformed WebSocket message: %.200s", msg)
             return None
@@ -7,7 +7,12 @@ from pathlib import Path
 
 from mcp.server.fastmcp import FastMCP
 
-from opennews_mcp.api_client import NewsAPIClient, NewsWSClient
+from opennews_mcp.api_client import NewsAPIClient
+from opennews_mcp.http_pool import http_pool
+from opennews_mcp.news_buffer import NewsBuffer, news_buffer
+from opennews_mcp.parse_pool import parse_pool
+from opennews_mcp.response_cache import ResponseCache
+from opennews_mcp.ws_hub import WSHub, ws_hub
 
 # Knowledge directory (project root / knowledge)
 KNOWLEDGE_DIR = Path(__file__).resolve().parent.parent.parent / "knowledge"
@@ -17,19 +22,22 @@ KNOWLEDGE_DIR = Path(__file__).resolve().parent.parent.parent / "knowledge"
 class AppContext:
     """Shared application state available to all tools via ctx."""
     api: NewsAPIClient
-    ws: NewsWSClient
+    hub: WSHub
+    buffer: NewsBuffer
 
 
 @asynccontextmanager
 async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
     """Manage the API client lifecycle."""
-    api = NewsAPIClient()
-    ws = NewsWSClient()
+    api = NewsAPIClient(cache=ResponseCache())
     try:
-        yield AppContext(api=api, ws=ws)
+        yield AppContext(api=api, hub=ws_hub, buffer=news_buffer)
     finally:
         await api.close()
-        await ws.close()
+        await ws_hub.close()
+        await news_buffer.close()
+        await http_pool.aclose()
+        parse_pool.shutdown()
 
 
 # ---------- FastMCP instance ----------
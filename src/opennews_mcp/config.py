@@ -35,10 +35,81 @@ if not API_TOKEN:
 _telegram_cfg = _cfg.get("telegram", {})
 TELEGRAM_BOT_TOKEN = os.environ.get("OPENNEWS_TELEGRAM_BOT_TOKEN") or _telegram_cfg.get("bot_token", "")
 TELEGRAM_CHAT_ID   = os.environ.get("OPENNEWS_TELEGRAM_CHAT_ID")   or _telegram_cfg.get("chat_id", "")
+# 发送限速 (telegram_delivery)：每个 bot 每秒条数、每个 chat 每秒条数、群组/频道每分钟条数
+TELEGRAM_BOT_RATE   = float(os.environ.get("OPENNEWS_TELEGRAM_BOT_RATE", 0)   or _telegram_cfg.get("bot_rate", 30))
+TELEGRAM_CHAT_RATE  = float(os.environ.get("OPENNEWS_TELEGRAM_CHAT_RATE", 0)  or _telegram_cfg.get("chat_rate", 1))
+TELEGRAM_GROUP_RATE = float(os.environ.get("OPENNEWS_TELEGRAM_GROUP_RATE", 0) or _telegram_cfg.get("group_rate_per_minute", 20))
+# 命令监听的 webhook 模式 (telegram_webhook)：填写公网可访问的基础 URL 即启用，否则长轮询 getUpdates。
+# secret 为空时每次启动随机生成；本地 HTTP 服务默认只监听 127.0.0.1 (由反向代理转发 HTTPS)
+TELEGRAM_WEBHOOK_URL    = os.environ.get("OPENNEWS_TELEGRAM_WEBHOOK_URL")    or _telegram_cfg.get("webhook_url", "")
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("OPENNEWS_TELEGRAM_WEBHOOK_SECRET") or _telegram_cfg.get("webhook_secret", "")
+TELEGRAM_WEBHOOK_HOST   = os.environ.get("OPENNEWS_TELEGRAM_WEBHOOK_HOST")   or _telegram_cfg.get("webhook_host", "127.0.0.1")
+TELEGRAM_WEBHOOK_PORT   = int(os.environ.get("OPENNEWS_TELEGRAM_WEBHOOK_PORT", 0) or _telegram_cfg.get("webhook_port", 8080))
 
 # ---------- Safety ----------
 MAX_ROWS = int(os.environ.get("OPENNEWS_MAX_ROWS", 0) or _cfg.get("max_rows", 100))
 
+# ---------- Local state (HTTP cache etc.) ----------
+CACHE_DIR = Path(os.environ.get("OPENNEWS_CACHE_DIR") or _cfg.get("cache_dir") or _PROJECT_ROOT / ".cache")
+# 已推送条目的去重记录保留时长 (小时)，RSS 矩阵 / cron / WS 监控共用
+SEEN_TTL_HOURS = float(os.environ.get("OPENNEWS_SEEN_TTL_HOURS", 0) or _cfg.get("seen_ttl_hours", 72))
+# 发件箱 (outbox) 中未送达消息的最长重试时长 (小时)，过期后记为失败
+OUTBOX_TTL_HOURS = float(os.environ.get("OPENNEWS_OUTBOX_TTL_HOURS", 0) or _telegram_cfg.get("outbox_ttl_hours", 24))
+# cron 任务退出前最多等待发件箱清空的秒数，剩余消息留给下一次运行
+OUTBOX_DRAIN_TIMEOUT = float(os.environ.get("OPENNEWS_OUTBOX_DRAIN_TIMEOUT", 0) or _telegram_cfg.get("outbox_drain_timeout", 120))
+
+# ---------- Shared HTTP transport (http_pool) ----------
+HTTP_MAX_CONNECTIONS = int(os.environ.get("OPENNEWS_HTTP_MAX_CONNECTIONS", 0) or _cfg.get("http_max_connections", 64))
+# 同一主机的最大并发请求数；http_host_limits 按主机单独设置 (RSSHub 对突发请求限流)
+HTTP_PER_HOST_LIMIT  = int(os.environ.get("OPENNEWS_HTTP_PER_HOST_LIMIT", 0)  or _cfg.get("http_per_host_limit", 8))
+HTTP_HOST_LIMITS: dict = {"rsshub.app": 2, **_cfg.get("http_host_limits", {})}
+# 安装了 h2 时启用 HTTP/2 (OPENNEWS_HTTP2=0 关闭)
+HTTP2 = (os.environ.get("OPENNEWS_HTTP2") or str(_cfg.get("http2", "1"))).lower() not in ("0", "false", "no")
+
+# ---------- RSS aggregator ----------
+# 声明式的 RSS/JSON 源注册表 (分类、解析器、优先级、超时、轮询间隔)
+SOURCES_FILE = Path(os.environ.get("OPENNEWS_SOURCES_FILE") or _cfg.get("sources_file") or _PROJECT_ROOT / "sources.json")
+
+# 同一进程内 RSS 源快照的有效期 (秒)，矩阵一轮内各分类共享同一份抓取结果
+RSS_SNAPSHOT_TTL = float(os.environ.get("OPENNEWS_RSS_SNAPSHOT_TTL", 0) or _cfg.get("rss_snapshot_ttl", 300))
+# 聚合的延迟预算 (秒)：到期仍未返回的源不再等待 (其抓取在后台继续写入快照)；0 表示等待全部源
+RSS_LATENCY_BUDGET = float(os.environ.get("OPENNEWS_RSS_LATENCY_BUDGET", 0) or _cfg.get("rss_latency_budget", 8))
+# feed 解析放到工作池，不阻塞事件循环：thread (默认) / process (多核并行) / inline (在事件循环上解析)
+RSS_PARSE_EXECUTOR = (os.environ.get("OPENNEWS_RSS_PARSE_EXECUTOR") or _cfg.get("rss_parse_executor", "thread")).lower()
+# 解析工作线程 / 进程数，0 表示按 CPU 核数 (最多 8)
+RSS_PARSE_WORKERS = int(os.environ.get("OPENNEWS_RSS_PARSE_WORKERS", 0) or _cfg.get("rss_parse_workers", 0))
+
+# 源健康熔断：连续失败多少次后暂停抓取，以及首次暂停的秒数 (之后每次探测失败翻倍)
+SOURCE_BREAKER_THRESHOLD = int(os.environ.get("OPENNEWS_SOURCE_BREAKER_THRESHOLD", 0) or _cfg.get("source_breaker_threshold", 3))
+SOURCE_BREAKER_COOLDOWN  = float(os.environ.get("OPENNEWS_SOURCE_BREAKER_COOLDOWN", 0) or _cfg.get("source_breaker_cooldown", 900))
+
+# 常驻轮询调度器 (feed_scheduler)：快讯源固定间隔，其余源按发布频率自适应
+FAST_LANE_INTERVAL = float(os.environ.get("OPENNEWS_FAST_LANE_INTERVAL", 0) or _cfg.get("fast_lane_interval", 5))
+POLL_MIN_INTERVAL  = float(os.environ.get("OPENNEWS_POLL_MIN_INTERVAL", 0)  or _cfg.get("poll_min_interval", 60))
+POLL_MAX_INTERVAL  = float(os.environ.get("OPENNEWS_POLL_MAX_INTERVAL", 0)  or _cfg.get("poll_max_interval", 3600))
+
+# WebSocket 监控 (monitor)：接收与推送之间的有界队列长度，队列满时的策略
+# (drop_oldest 丢最旧 / drop_newest 丢最新 / block 暂停接收，由服务端缓冲)
+MONITOR_QUEUE_SIZE = int(os.environ.get("OPENNEWS_MONITOR_QUEUE_SIZE", 0) or _cfg.get("monitor_queue_size", 1000))
+MONITOR_OVERFLOW   = (os.environ.get("OPENNEWS_MONITOR_OVERFLOW") or _cfg.get("monitor_overflow", "drop_oldest")).lower()
+# 每分钟收到超过这么多条时改为合并推送 (每 monitor_digest_interval 秒一条摘要)，回落到一半以下时恢复逐条推送
+MONITOR_BURST_RATE      = float(os.environ.get("OPENNEWS_MONITOR_BURST_RATE", 0)      or _cfg.get("monitor_burst_rate", 20))
+MONITOR_DIGEST_INTERVAL = float(os.environ.get("OPENNEWS_MONITOR_DIGEST_INTERVAL", 0) or _cfg.get("monitor_digest_interval", 60))
+# MCP 实时订阅共用的 WebSocket 连接 (ws_hub)：没有监听者这么多秒后断开，下次订阅时再连
+WS_HUB_IDLE_TIMEOUT = float(os.environ.get("OPENNEWS_WS_HUB_IDLE_TIMEOUT", 0) or _cfg.get("ws_hub_idle_timeout", 300))
+# MCP 新闻工具的内存环形缓冲 (news_buffer)：由共享 WebSocket 实时更新，最多保留这么多条
+NEWS_BUFFER_SIZE = int(os.environ.get("OPENNEWS_NEWS_BUFFER_SIZE", 0) or _cfg.get("news_buffer_size", 1000))
+# MCP 服务端 REST 响应缓存 (response_cache)：各接口缓存秒数 (0 表示不缓存) 和内存上限 (MB)
+API_CACHE_SEARCH_TTL      = float(os.environ.get("OPENNEWS_API_CACHE_SEARCH_TTL", 0)      or _cfg.get("api_cache_search_ttl", 10))
+API_CACHE_ENGINE_TREE_TTL = float(os.environ.get("OPENNEWS_API_CACHE_ENGINE_TREE_TTL", 0) or _cfg.get("api_cache_engine_tree_ttl", 3600))
+API_CACHE_MAX_MB          = float(os.environ.get("OPENNEWS_API_CACHE_MAX_MB", 0)          or _cfg.get("api_cache_max_mb", 32))
+# WebSocket 断线重连后通过 REST 补齐断线期间的新闻，最多翻这么多页 (每页 50 条)
+WS_BACKFILL_MAX_PAGES = int(os.environ.get("OPENNEWS_WS_BACKFILL_MAX_PAGES", 0) or _cfg.get("ws_backfill_max_pages", 10))
+
+# 机器人矩阵 (run_multibot_matrix)：同时运行的机器人数，以及单个机器人的超时 (秒)
+MATRIX_CONCURRENCY = int(os.environ.get("OPENNEWS_MATRIX_CONCURRENCY", 0) or _cfg.get("matrix_concurrency", 3))
+MATRIX_BOT_TIMEOUT = float(os.environ.get("OPENNEWS_MATRIX_BOT_TIMEOUT", 0) or _cfg.get("matrix_bot_timeout", 120))
+
 
 def clamp_limit(limit: int) -> int:
     """Clamp user-supplied limit to [1, MAX_ROWS]."""
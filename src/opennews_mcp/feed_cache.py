@@ -0,0 +1,134 @@
+"""Persistent per-source HTTP cache for the RSS aggregator.
+
+Stores ETag / Last-Modified validators and a hash of the last body for each
+source, together with the items parsed from it. A 304 response or an
+unchanged body hash lets the aggregator reuse the cached items instead of
+downloading and re-parsing the feed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from opennews_mcp.config import CACHE_DIR
+from opennews_mcp.news_item import NewsItem
+
+logger = logging.getLogger(__name__)
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class FeedCache:
+    """JSON-file backed cache of HTTP validators and parsed items per source."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, dict] | None = None
+        self._dirty = False
+        self.not_modified = 0
+        self.hash_hits = 0
+        self.bytes_saved = 0
+        self.parses_saved = 0
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except Exception as e:
+                    logger.warning("Ignoring unreadable feed cache %s: %s", self.path, e)
+        return self._entries
+
+    def _entry(self, name: str, url: str) -> dict | None:
+        entry = self._load().get(name)
+        if entry is None or entry.get("url") != url:
+            return None
+        return entry
+
+    def request_headers(self, name: str, url: str) -> dict:
+        """Conditional-GET headers for the source, if we have validators."""
+        entry = self._entry(name, url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def head_guid(self, name: str, url: str) -> str | None:
+        """GUID of the newest item parsed on the previous fetch."""
+        entry = self._entry(name, url)
+        return entry.get("head_guid") if entry else None
+
+    def items(self, name: str, url: str) -> list[NewsItem]:
+        entry = self._entry(name, url)
+        return [NewsItem.from_dict(it) for it in entry.get("items", [])] if entry else []
+
+    def not_modified_items(self, name: str, url: str) -> list[NewsItem] | None:
+        """Items to reuse after a 304 response (None if nothing is cached)."""
+        entry = self._entry(name, url)
+        if entry is None:
+            return None
+        self.not_modified += 1
+        self.parses_saved += 1
+        self.bytes_saved += entry.get("size", 0)
+        return [NewsItem.from_dict(it) for it in entry.get("items", [])]
+
+    def unchanged_items(self, name: str, url: str, digest: str, headers) -> list[NewsItem] | None:
+        """Items to reuse when the body hash matches the cached one."""
+        entry = self._entry(name, url)
+        if entry is None or entry.get("body_hash") != digest:
+            return None
+        self.hash_hits += 1
+        self.parses_saved += 1
+        # 服务器可能在内容不变时更新了校验头，顺手记下
+        self._update_validators(entry, headers)
+        return [NewsItem.from_dict(it) for it in entry.get("items", [])]
+
+    def _update_validators(self, entry: dict, headers):
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if etag != entry.get("etag") or last_modified != entry.get("last_modified"):
+            entry["etag"] = etag
+            entry["last_modified"] = last_modified
+            self._dirty = True
+
+    def store(self, name: str, url: str, headers, digest: str, size: int, items: list[NewsItem]):
+        entry = {"url": url, "body_hash": digest, "size": size,
+                 "head_guid": items[0].guid if items else None,
+                 "items": [it.to_dict() for it in items]}
+        self._update_validators(entry, headers)
+        self._load()[name] = entry
+        self._dirty = True
+
+    def save(self):
+        """Write the cache to disk if anything changed (atomic replace)."""
+        if not self._dirty or self._entries is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning("Failed to save feed cache %s: %s", self.path, e)
+
+    def stats(self) -> dict:
+        return {
+            "not_modified": self.not_modified,
+            "hash_hits": self.hash_hits,
+            "bytes_saved": self.bytes_saved,
+            "parses_saved": self.parses_saved,
+        }
+
+
+feed_cache = FeedCache(CACHE_DIR / "feed_http_cache.json")
@@ -0,0 +1,247 @@
+"""Adaptive per-source polling scheduler for the RSS aggregator.
+
+Instead of polling every source on the same two-hour cron, each source gets
+its own polling loop:
+
+* fast-lane sources (``"fast_lane": true`` in sources.json, i.e. the
+  high-frequency flash feeds Jin10 / Wallstreetcn) are polled every
+  ``FAST_LANE_INTERVAL`` seconds;
+* sources with a fixed ``poll_interval`` in the registry use it as-is;
+* every other source learns its publish rate from the item timestamps in its
+  feed and is polled about twice per typical gap between items, clamped to
+  ``[POLL_MIN_INTERVAL, POLL_MAX_INTERVAL]``. Quiet blogs drift towards the
+  maximum interval, busy wires towards the minimum.
+
+Polls go through the shared ``feed_snapshot``, so MCP calls in the same
+process read the freshest data. Newly seen items are handed to a callback.
+Edits to the source registry are picked up while running.
+
+Run standalone (pushes new keyword-matching items to Telegram):
+    python -m opennews_mcp.feed_scheduler
+"""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from opennews_mcp.config import FAST_LANE_INTERVAL, POLL_MIN_INTERVAL, POLL_MAX_INTERVAL
+from opennews_mcp.http_pool import http_pool
+from opennews_mcp.news_item import NewsItem
+from opennews_mcp.parse_pool import parse_pool
+from opennews_mcp.seen_store import seen_store
+from opennews_mcp.source_registry import SourceRegistry, SourceSpec, registry
+from opennews_mcp.tools.aggregator_rss import (
+    FeedSnapshot, feed_snapshot, _filter, _render_line, _send_telegram, _unseen,
+)
+
+logger = logging.getLogger("feed_scheduler")
+
+# 首次轮询前还不知道发布频率时使用的间隔
+DEFAULT_INTERVAL = 300.0
+# feed cache 落盘的最短间隔，避免快车道每几秒写一次磁盘
+CACHE_SAVE_INTERVAL = 60.0
+
+
+def _item_key(it: NewsItem) -> str:
+    return it.guid or it.link or it.title
+
+
+@dataclass
+class SourceSchedule:
+    """Polling state for one source."""
+    spec: SourceSpec
+    interval: float = DEFAULT_INTERVAL
+    polls: int = 0
+    new_items: int = 0
+    last_poll: float = 0.0
+    _seen: set[str] = field(default_factory=set, repr=False)
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def adaptive(self) -> bool:
+        return not self.spec.fast_lane and self.spec.poll_interval is None
+
+    def learn(self, items: list[NewsItem], min_interval: float, max_interval: float):
+        """Update ``interval`` from the publish timestamps in the latest fetch."""
+        if not self.adaptive:
+            return
+        stamps = sorted({it.ts for it in items if it.ts})
+        if len(stamps) >= 2:
+            gap = (stamps[-1] - stamps[0]) / (len(stamps) - 1)
+            # 每个平均发布间隔轮询两次
+            target = gap / 2
+        else:
+            # 窗口内几乎没有新内容：逐步放慢
+            target = self.interval * 2
+        target = min(max(target, min_interval), max_interval)
+        # 平滑，避免一次异常抓取让间隔剧烈跳动
+        self.interval = target if self.polls <= 1 else (self.interval + target) / 2
+
+    def diff(self, items: list[NewsItem]) -> list[NewsItem]:
+        """Return items not present in the previous poll (nothing on the first poll)."""
+        keys = {_item_key(it) for it in items}
+        fresh = [] if self.polls <= 1 else [it for it in items if _item_key(it) not in self._seen]
+        self._seen = keys
+        return fresh
+
+
+class FeedScheduler:
+    """Poll each source on its own adaptive interval and report new items."""
+
+    def __init__(
+        self,
+        sources: SourceRegistry | list[SourceSpec] = registry,
+        on_items: Callable[[str, list[NewsItem]], Awaitable[None]] | None = None,
+        snapshot: FeedSnapshot = feed_snapshot,
+        fast_interval: float = FAST_LANE_INTERVAL,
+        min_interval: float = POLL_MIN_INTERVAL,
+        max_interval: float = POLL_MAX_INTERVAL,
+    ):
+        self.registry = sources if isinstance(sources, SourceRegistry) else None
+        self.snapshot = snapshot
+        self.on_items = on_items
+        self.fast_interval = fast_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        specs = self.registry.sources if self.registry is not None else sources
+        self.schedules: dict[str, SourceSchedule] = {s.name: self._schedule(s) for s in specs}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._last_save = time.monotonic()
+
+    def _schedule(self, spec: SourceSpec, previous: SourceSchedule | None = None) -> SourceSchedule:
+        if spec.fast_lane:
+            interval = self.fast_interval
+        elif spec.poll_interval is not None:
+            interval = float(spec.poll_interval)
+        elif previous is not None and previous.adaptive:
+            # 配置重载时保留已学到的间隔
+            interval = previous.interval
+        else:
+            interval = min(max(DEFAULT_INTERVAL, self.min_interval), self.max_interval)
+        sched = SourceSchedule(spec=spec, interval=interval)
+        if previous is not None:
+            sched.polls, sched.new_items, sched._seen = previous.polls, previous.new_items, previous._seen
+        return sched
+
+    async def _poll(self, sched: SourceSchedule):
+        items = await self.snapshot.refresh(sched.spec)
+        sched.polls += 1
+        sched.last_poll = time.time()
+        sched.learn(items, self.min_interval, self.max_interval)
+        fresh = sched.diff(items)
+        if fresh:
+            sched.new_items += len(fresh)
+            logger.info("%s: %d new item(s), next poll in %.0fs", sched.name, len(fresh), sched.interval)
+            if self.on_items is not None:
+                await self.on_items(sched.name, fresh)
+
+        if time.monotonic() - self._last_save >= CACHE_SAVE_INTERVAL:
+            self.snapshot.save()
+            self._last_save = time.monotonic()
+
+    async def _source_loop(self, name: str):
+        # 错开启动时间，避免所有源同一时刻发起请求
+        await asyncio.sleep(random.uniform(0, min(self.schedules[name].interval, 10.0)))
+        while True:
+            # 每轮重新取，配置重载后使用新的 spec
+            sched = self.schedules[name]
+            started = time.monotonic()
+            try:
+                await self._poll(sched)
+            except Exception as e:
+                logger.error("Polling %s failed: %s", sched.name, e)
+            await asyncio.sleep(max(0.0, sched.interval - (time.monotonic() - started)))
+
+    def _start(self, name: str):
+        self._tasks[name] = asyncio.create_task(self._source_loop(name))
+
+    def _apply_registry(self):
+        """Start, stop or update source loops after the registry was reloaded."""
+        specs = {s.name: s for s in self.registry.sources}
+        for name in list(self.schedules):
+            if name not in specs:
+                self._tasks.pop(name).cancel()
+                del self.schedules[name]
+                logger.info("Stopped polling %s (removed from registry)", name)
+        for name, spec in specs.items():
+            previous = self.schedules.get(name)
+            if previous is None:
+                self.schedules[name] = self._schedule(spec)
+                self._start(name)
+                logger.info("Started polling %s", name)
+            elif previous.spec != spec:
+                self.schedules[name] = self._schedule(spec, previous)
+
+    async def run(self):
+        for name in self.schedules:
+            self._start(name)
+        try:
+            while True:
+                await asyncio.sleep(self.registry.check_interval if self.registry else 3600)
+                if self.registry is not None and self.registry.maybe_reload():
+                    self._apply_registry()
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            self.snapshot.save()
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "source": s.name,
+                "fast_lane": s.spec.fast_lane,
+                "adaptive": s.adaptive,
+                "interval": round(s.interval, 1),
+                "polls": s.polls,
+                "new_items": s.new_items,
+            }
+            for s in sorted(self.schedules.values(), key=lambda s: s.interval)
+        ]
+
+
+async def _push_to_telegram(name: str, items: list[NewsItem]):
+    # 已推送检查在事件循环上做：seen store 的 SQLite 连接不在线程间共享
+    items = _unseen(items, seen_store)
+    picked = await parse_pool.run_threaded(_filter, items, len(items)) if items else []
+    if not picked:
+        return
+    delivered: list[int] = []
+    status = await _send_telegram([_render_line(it) for it in picked], category="all", delivered=delivered)
+    if status != "ok":
+        logger.warning("Telegram push for %s failed: %s", name, status)
+    for i in delivered:
+        for m in [picked[i], *picked[i].related]:
+            seen_store.mark(m.title, m.link)
+
+
+async def main():
+    scheduler = FeedScheduler(on_items=_push_to_telegram)
+    logger.info("Polling %d sources (%d in fast lane)...",
+                len(scheduler.schedules), sum(s.spec.fast_lane for s in scheduler.schedules.values()))
+    try:
+        await scheduler.run()
+    finally:
+        await http_pool.aclose()
+        parse_pool.shutdown()
+        seen_store.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Stopped by user")
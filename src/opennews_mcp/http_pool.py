@@ -0,0 +1,190 @@
+"""Process-wide pooled HTTP transport shared by every module.
+
+One ``httpx.AsyncClient`` per event loop keeps connections (and their TLS
+sessions) alive across the RSS fetches, Telegram sends and LLM calls of a
+run, instead of a handshake per request. HTTP/2 is used when the optional
+``h2`` package is installed (the ``http2`` extra).
+
+Requests to the same host are capped by a per-host semaphore (RSSHub hosts
+most of our feeds and throttles bursts), and 429 / 503 responses are retried
+after the server's ``Retry-After`` (or Telegram's ``retry_after``) or an
+exponential backoff. While a host is backing off, other requests to it wait
+as well rather than piling onto the limit. Long polls (Telegram
+``getUpdates``) pass ``long_poll=True`` and skip the per-host cap: they hold
+a request open for ~30 s and would otherwise keep one of api.telegram.org's
+slots away from message sends the whole time.
+"""
+
+import asyncio
+import contextlib
+import importlib.util
+import logging
+import random
+from collections.abc import Callable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+from opennews_mcp.config import HTTP2, HTTP_HOST_LIMITS, HTTP_MAX_CONNECTIONS, HTTP_PER_HOST_LIMIT
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 503})
+# 服务器要求等待超过这个秒数时不再重试，直接把响应交给调用方
+MAX_RETRY_WAIT = 30.0
+BACKOFF_BASE = 1.0
+
+
+def _h2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def retry_after(resp: httpx.Response) -> float | None:
+    """Seconds the server asked us to wait, from ``Retry-After`` or Telegram's JSON body."""
+    value = resp.headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(value)
+                return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    if "json" in resp.headers.get("Content-Type", ""):
+        try:
+            wait = resp.json().get("parameters", {}).get("retry_after")
+        except (ValueError, AttributeError):
+            wait = None
+        if wait is not None:
+            return float(wait)
+    return None
+
+
+class HttpPool:
+    """Shared keep-alive client with per-host concurrency caps and 429 backoff."""
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        per_host: int = HTTP_PER_HOST_LIMIT,
+        host_limits: dict[str, int] | None = None,
+        http2: bool = HTTP2,
+    ):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.host_limits = dict(HTTP_HOST_LIMITS if host_limits is None else host_limits)
+        self.http2 = http2 and _h2_available()
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._blocked_until: dict[str, float] = {}
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    def client(self) -> httpx.AsyncClient:
+        """The shared client of the running event loop (created on first use)."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            # 客户端和信号量都绑定事件循环；每次 asyncio.run 都是新的循环
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=httpx.Timeout(15.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30.0,
+                ),
+            )
+            self._loop = loop
+            self._semaphores.clear()
+            self._blocked_until.clear()
+        return self._client
+
+    def _limit(self, host: str) -> int:
+        # 精确匹配或父域匹配 (如 "rsshub.app" 也限制 "www.rsshub.app")
+        for pattern, limit in self.host_limits.items():
+            if host == pattern or host.endswith("." + pattern):
+                return limit
+        return self.per_host
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(host)
+        if sem is None:
+            sem = self._semaphores[host] = asyncio.Semaphore(self._limit(host))
+        return sem
+
+    async def _wait_host(self, host: str):
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._blocked_until.get(host, 0.0) - loop.time()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def request(self, method: str, url: str, retries: int = 2, long_poll: bool = False,
+                      on_send: Callable[[], None] | None = None, **kwargs) -> httpx.Response:
+        """Send a request through the pool; retries 429/503 responses up to ``retries`` times.
+
+        Returns the last response (callers still call ``raise_for_status``);
+        transport errors propagate. ``long_poll`` requests do not take a
+        per-host slot (they still share the connections and host backoff).
+        ``on_send`` is called each time a request actually goes out, after
+        any backoff and once the host slot is held, so callers can time the
+        server rather than the queue.
+        """
+        client = self.client()
+        host = urlsplit(url).hostname or ""
+        loop = asyncio.get_running_loop()
+        for attempt in range(retries + 1):
+            await self._wait_host(host)
+            async with contextlib.nullcontext() if long_poll else self._semaphore(host):
+                self.requests += 1
+                if on_send is not None:
+                    on_send()
+                resp = await client.request(method, url, **kwargs)
+            if resp.status_code not in RETRY_STATUSES or attempt == retries:
+                return resp
+            wait = retry_after(resp)
+            if wait is None:
+                wait = BACKOFF_BASE * 2 ** attempt * random.uniform(1.0, 1.5)
+            if wait > MAX_RETRY_WAIT:
+                return resp
+            if resp.status_code == 429:
+                self.throttled += 1
+            self.retries += 1
+            # 整个主机进入退避，其他并发请求也一起等待
+            self._blocked_until[host] = max(self._blocked_until.get(host, 0.0), loop.time() + wait)
+            logger.info("%s %s -> %d, retrying in %.1fs", method, host, resp.status_code, wait)
+            await resp.aclose()
+        return resp
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                # 创建它的事件循环已经关闭，连接随之失效
+                pass
+        self._client = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "http2": self.http2,
+        }
+
+
+http_pool = HttpPool()
@@ -0,0 +1,149 @@
+"""Bounded hand-off between the WebSocket receiver and the delivery side.
+
+The monitor's receive loop only puts raw messages into an ``IngestQueue``
+and goes back to reading the socket; a separate task parses, deduplicates
+and queues the Telegram messages. When delivery falls behind, the queue
+fills up and its overflow policy decides what gives:
+
+* ``drop_oldest`` (default): evict the oldest queued message, keep reading;
+* ``drop_newest``: discard the incoming message, keep reading;
+* ``block``: stop reading until there is room, leaving the backlog in the
+  server-side buffer (no loss, but the socket may be dropped by the server).
+
+Articles backfilled over REST after a reconnect are ``replay``-ed instead:
+they go into a separate lane that is never dropped and is read first, so a
+gap longer than the queue neither evicts itself nor the live messages.
+
+``BurstDetector`` measures the inbound rate over a sliding window and says
+when the monitor should switch to digest messages, with hysteresis so the
+mode does not flap around the threshold.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST, DROP_NEWEST, BLOCK = "drop_oldest", "drop_newest", "block"
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+# 放进空队列唤醒正在等待的 get，让它去读重放通道
+_WAKE = object()
+
+
+class IngestQueue:
+    """``asyncio.Queue`` with a fixed size and an overflow policy, plus a lossless replay lane."""
+
+    def __init__(self, maxsize: int, policy: str = DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        self.policy = policy
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self._replayed: deque = deque()
+        self._waiting = False
+        self.received = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.blocked = 0.0
+        self.max_depth = 0
+
+    async def put(self, item):
+        """Add ``item``; waits only under the ``block`` policy."""
+        self.received += 1
+        queue = self._queue
+        if queue.full():
+            if self.policy == BLOCK:
+                started = time.monotonic()
+                await queue.put(item)
+                self.blocked += time.monotonic() - started
+                return
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning("Ingest queue full (%d), %s: %d messages dropped so far",
+                               queue.maxsize, self.policy, self.dropped)
+            if self.policy == DROP_NEWEST:
+                return
+            queue.get_nowait()
+            queue.task_done()
+        queue.put_nowait(item)
+        self.max_depth = max(self.max_depth, queue.qsize())
+
+    def replay(self, items):
+        """Queue backfilled ``items`` in order; they are never dropped and are read before live messages.
+
+        The lane is unbounded: callers bound it themselves (a backfill is at
+        most ``ws_backfill_max_pages`` pages).
+        """
+        items = list(items)
+        if not items:
+            return
+        self._replayed.extend(items)
+        self.replayed += len(items)
+        if self._waiting and self._queue.empty():
+            self._queue.put_nowait(_WAKE)
+
+    async def get(self):
+        while not self._replayed:
+            self._waiting = True
+            try:
+                item = await self._queue.get()
+            finally:
+                self._waiting = False
+            self._queue.task_done()
+            if item is not _WAKE:
+                return item
+        return self._replayed.popleft()
+
+    def __len__(self) -> int:
+        return self._queue.qsize() + len(self._replayed)
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "depth": len(self),
+            "max_depth": self.max_depth,
+            "received": self.received,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "blocked_seconds": round(self.blocked, 1),
+        }
+
+
+class BurstDetector:
+    """Inbound rate over a sliding window, with enter/exit thresholds."""
+
+    def __init__(self, rate_per_minute: float, window: float = 60.0, exit_ratio: float = 0.5):
+        self.enter = rate_per_minute
+        self.exit = rate_per_minute * exit_ratio
+        self.window = window
+        self._times: deque = deque()
+        self.active = False
+        self.bursts = 0
+
+    def rate(self, now: float | None = None) -> float:
+        """Messages per minute over the last ``window`` seconds."""
+        now = time.monotonic() if now is None else now
+        times = self._times
+        while times and times[0] <= now - self.window:
+            times.popleft()
+        return len(times) * 60.0 / self.window
+
+    def tick(self, now: float | None = None) -> bool:
+        """Record one inbound message; returns whether burst mode is on."""
+        now = time.monotonic() if now is None else now
+        self._times.append(now)
+        return self.update(now)
+
+    def update(self, now: float | None = None) -> bool:
+        rate = self.rate(now)
+        if not self.active and self.enter > 0 and rate >= self.enter:
+            self.active = True
+            self.bursts += 1
+            logger.info("Burst: %.0f messages/min, switching to digests", rate)
+        elif self.active and rate < self.exit:
+            self.active = False
+            logger.info("Burst over: %.0f messages/min, back to single messages", rate)
+        return self.active
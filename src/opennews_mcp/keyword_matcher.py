@@ -0,0 +1,141 @@
+"""Multi-pattern keyword matcher (Aho-Corasick) with per-category weights.
+
+All keywords of all categories are compiled into one automaton, so a title
+and summary are scanned once however many terms there are. Matching is
+case-insensitive and word-boundary aware for Latin terms ("fed" does not
+match "FedEx" or "offered"); CJK terms match anywhere. A trailing ``*``
+turns a term into a prefix match ("missile*" matches "missiles").
+
+Keyword sets are plain ``{term: weight}`` dicts per category; the
+``default`` set applies to every category and a category's own set adds or
+overrides weights. The pseudo-category ``all`` uses every set.
+"""
+
+from collections import deque
+from typing import NamedTuple
+
+DEFAULT_SET = "default"
+
+
+class KeywordMatch(NamedTuple):
+    start: int
+    end: int
+    term: str
+    weight: float
+
+
+def _is_word_char(ch: str) -> bool:
+    # 只把 ASCII 字母数字当作单词字符：中文紧贴英文 ("ETF上市") 也算边界
+    return ch.isascii() and (ch.isalnum() or ch == "_")
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over every keyword of every category."""
+
+    def __init__(self, keyword_sets: dict[str, dict[str, float]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        # 每个词: (文本, 长度, 需要左边界, 需要右边界)
+        self._terms: list[tuple[str, int, bool, bool]] = []
+        index: dict[tuple[str, bool], int] = {}
+        raw_weights: dict[str, dict[int, float]] = {}
+
+        for category, terms in keyword_sets.items():
+            weights = raw_weights.setdefault(category, {})
+            for raw, weight in terms.items():
+                prefix = raw.endswith("*")
+                term = raw.rstrip("*").strip().lower()
+                if not term:
+                    continue
+                key = (term, prefix)
+                idx = index.get(key)
+                if idx is None:
+                    idx = index[key] = len(self._terms)
+                    self._terms.append((term, len(term), _is_word_char(term[0]),
+                                        _is_word_char(term[-1]) and not prefix))
+                    self._insert(term, idx)
+                weights[idx] = float(weight)
+        self._build_failure_links()
+
+        default = raw_weights.get(DEFAULT_SET, {})
+        self._weights: dict[str, dict[int, float]] = {
+            cat: {**default, **w} for cat, w in raw_weights.items()
+        }
+        merged: dict[int, float] = {}
+        for w in raw_weights.values():
+            for idx, weight in w.items():
+                merged[idx] = max(weight, merged.get(idx, weight))
+        self._weights["all"] = merged
+        self._weights.setdefault(DEFAULT_SET, default)
+
+    def _insert(self, term: str, idx: int):
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(idx)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # 合并输出：后缀上结束的词也在这里命中
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def _scan(self, text: str):
+        """Yield (start, end, term index) for every boundary-respecting match."""
+        low = text.lower()
+        n = len(low)
+        goto, fail, out, terms = self._goto, self._fail, self._out, self._terms
+        state = 0
+        for i, ch in enumerate(low):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for idx in out[state]:
+                _, length, left, right = terms[idx]
+                start = i - length + 1
+                if left and start > 0 and _is_word_char(low[start - 1]):
+                    continue
+                if right and i + 1 < n and _is_word_char(low[i + 1]):
+                    continue
+                yield start, i + 1, idx
+
+    def _category_weights(self, category: str) -> dict[int, float]:
+        return self._weights.get(category) or self._weights[DEFAULT_SET]
+
+    def find(self, text: str, category: str = "all") -> list[KeywordMatch]:
+        """All keyword matches of ``category`` in ``text``, with positions."""
+        weights = self._category_weights(category)
+        return [
+            KeywordMatch(start, end, self._terms[idx][0], weights[idx])
+            for start, end, idx in self._scan(text)
+            if idx in weights
+        ]
+
+    def score(self, text: str, category: str = "all") -> tuple[float, list[KeywordMatch]]:
+        """Sum of weights of the distinct keywords matched, and the matches."""
+        matches = self.find(text, category)
+        seen: dict[str, float] = {}
+        for m in matches:
+            seen[m.term] = m.weight
+        return sum(seen.values()), matches
@@ -1,7 +1,8 @@
-
 import asyncio
+import hashlib
 import logging
 import os
+import random
 import sys
 import json
 import httpx
@@ -15,12 +16,34 @@ if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
 try:
-    from opennews_mcp.config import API_TOKEN, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
-    from opennews_mcp.api_client import NewsWSClient
+    from opennews_mcp.config import (
+        API_TOKEN, MONITOR_BURST_RATE, MONITOR_DIGEST_INTERVAL, MONITOR_OVERFLOW, MONITOR_QUEUE_SIZE,
+        TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_WEBHOOK_URL,
+    )
+    from opennews_mcp.api_client import NewsAPIClient, NewsWSClient
+    from opennews_mcp.http_pool import http_pool
+    from opennews_mcp.ingest_queue import BurstDetector, IngestQueue
+    from opennews_mcp.news_backfill import fetch_since
+    from opennews_mcp.news_item import extract_ts, from_api
+    from opennews_mcp.outbox import outbox
+    from opennews_mcp.seen_store import seen_store
+    from opennews_mcp.telegram_delivery import pack_messages
+    from opennews_mcp.telegram_webhook import TelegramWebhook, delete_webhooks
 except ImportError:
     # If run as module "python -m opennews_mcp.monitor"
-    from .config import API_TOKEN, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
-    from .api_client import NewsWSClient
+    from .config import (
+        API_TOKEN, MONITOR_BURST_RATE, MONITOR_DIGEST_INTERVAL, MONITOR_OVERFLOW, MONITOR_QUEUE_SIZE,
+        TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_WEBHOOK_URL,
+    )
+    from .api_client import NewsAPIClient, NewsWSClient
+    from .http_pool import http_pool
+    from .ingest_queue import BurstDetector, IngestQueue
+    from .news_backfill import fetch_since
+    from .news_item import extract_ts, from_api
+    from .outbox import outbox
+    from .seen_store import seen_store
+    from .telegram_delivery import pack_messages
+    from .telegram_webhook import TelegramWebhook, delete_webhooks
 
 # Configure logging
 logging.basicConfig(
@@ -30,51 +53,159 @@ logging.basicConfig(
 )
 logger = logging.getLogger("monitor")
 
-async def send_tg_msg(text: str, chat_id: str = None):
+def send_tg_msg(text: str, chat_id: str = None, key: str = None, token: str = None):
+    """Queue a message in the outbox and return immediately; ``outbox.run`` delivers it."""
     target_chat_id = chat_id or TELEGRAM_CHAT_ID
-    if not TELEGRAM_BOT_TOKEN or not target_chat_id:
-        logger.error("Telegram not configured (missing token or chat_id)")
-        return
-    
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    async with httpx.AsyncClient() as client:
-        try:
-            await client.post(url, json={
-                "chat_id": target_chat_id,
-                "text": text,
-                "parse_mode": "Markdown",
-                "disable_web_page_preview": True
-            })
-        except Exception as e:
-            logger.error(f"Failed to send TG message: {e}")
+    outbox.enqueue(token or TELEGRAM_BOT_TOKEN, target_chat_id, text, parse_mode="Markdown", key=key)
 
 # Global status
 WS_CONNECTED = False
 LAST_WS_ERROR = None
 
+# 接收与推送之间的有界队列，以及按接收速率切换摘要模式的突发检测
+ingest = IngestQueue(MONITOR_QUEUE_SIZE, MONITOR_OVERFLOW)
+burst = BurstDetector(MONITOR_BURST_RATE)
+# 一条摘要最多合并的条目数，攒够即提前发送
+DIGEST_MAX_ITEMS = 50
+
+def _item_key(item) -> str:
+    return item.guid or item.link or item.title
+
+def _render_item(item) -> str:
+    url = item.link
+    coins = ", ".join((item.meta or {}).get("coins", []))
+    tg_text = f"*{item.title}*\n\n{item.summary[:200]}...\n\n"
+    if coins:
+        tg_text += f"Coins: `{coins}`\n"
+    tg_text += f"Source: {item.source or 'Unknown'}\n"
+    if url:
+        tg_text += f"[Read More]({url})"
+    return tg_text
+
+def _send_digest(items: list):
+    """Queue the items collected during a burst as a few packed digest messages."""
+    if len(items) == 1:
+        send_tg_msg(_render_item(items[0]), key=f"ws:{_item_key(items[0])}")
+        return
+    lines = []
+    for item in items:
+        line = f"• *{item.title}* — {item.source or 'Unknown'}"
+        if item.link:
+            line += f" [🔗]({item.link})"
+        lines.append(line)
+    header = f"⚡ *News burst: {len(items)} updates*\n"
+    packets = pack_messages(lines, header=header)
+    for packet in packets:
+        digest = hashlib.blake2b("|".join(_item_key(items[i]) for i in packet.parts).encode("utf-8"), digest_size=8)
+        send_tg_msg(packet.text, key=f"ws-digest:{digest.hexdigest()}")
+    logger.info(f"Digest: {len(items)} items in {len(packets)} messages")
+
+async def delivery_loop():
+    """Parse, deduplicate and queue what the receiver put in ``ingest``.
+
+    Items go out one message each, or, while ``burst`` reports a burst,
+    collected into a digest every ``MONITOR_DIGEST_INTERVAL`` seconds.
+    """
+    loop = asyncio.get_running_loop()
+    digest = []
+    flush_at = None
+    while True:
+        timeout = None if flush_at is None else max(0.0, flush_at - loop.time())
+        try:
+            data = await asyncio.wait_for(ingest.get(), timeout)
+        except asyncio.TimeoutError:
+            data = None
+
+        if data is not None:
+            try:
+                item = from_api(data)
+                # 跨运行 / 跨管道去重：RSS 矩阵或 cron 已推送过的不再重复推送
+                if seen_store.check_and_mark(item.title, item.link, item.guid):
+                    logger.info(f"Skip seen: {item.title}")
+                elif burst.update() or digest:
+                    digest.append(item)
+                    if flush_at is None:
+                        flush_at = loop.time() + MONITOR_DIGEST_INTERVAL
+                else:
+                    logger.info(f"New News: {item.title}")
+                    # 入队即返回；重连后重放的条目按 id 去重
+                    send_tg_msg(_render_item(item), key=f"ws:{_item_key(item)}")
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+
+        if digest and (loop.time() >= flush_at or len(digest) >= DIGEST_MAX_ITEMS):
+            _send_digest(digest)
+            digest, flush_at = [], None
+
+# 重连退避：1s 起指数增长，最多 60s (鉴权失败至少 60s)，乘以随机抖动避免多个实例同时重连
+RECONNECT_BASE = 1.0
+RECONNECT_MAX = 60.0
+AUTH_RETRY_DELAY = 60.0
+
+# 最近收到的文章 (时间 epoch 秒 / id)，断线重连后从这里开始补齐
+_last_ts = 0
+_last_id = None
+
+def _reconnect_delay(attempt: int, auth_error: bool = False) -> float:
+    delay = min(RECONNECT_MAX, RECONNECT_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+    return max(delay, AUTH_RETRY_DELAY) if auth_error else delay
+
+def _track(data: dict):
+    global _last_ts, _last_id
+    ts = extract_ts(data)
+    if ts and ts >= _last_ts:
+        _last_ts, _last_id = ts, data.get("id")
+
+async def backfill_gap(since: int, last_id=None):
+    """Queue what was published while the WebSocket was down (via REST search)."""
+    client = NewsAPIClient(token=API_TOKEN)
+    try:
+        rows = await fetch_since(client, since, last_id)
+    except Exception as e:
+        logger.error(f"Backfill failed: {e}")
+        return
+    finally:
+        await client.close()
+    logger.info(f"Backfilled {len(rows)} articles published during the outage")
+    # 走重放通道：不会被溢出策略丢弃，也不计入突发检测的接收速率；
+    # 与实时消息重复的条目由 delivery_loop 的去重库过滤
+    ingest.replay(rows)
+
 async def news_monitor_loop():
     global WS_CONNECTED, LAST_WS_ERROR
     logger.info("Starting News Monitor...")
     if not API_TOKEN:
         logger.error("API_TOKEN is missing! Cannot connect to WebSocket.")
-        await send_tg_msg("⚠️ **Error**: API Token is missing. Please configure it.")
+        send_tg_msg("⚠️ **Error**: API Token is missing. Please configure it.")
         return
 
     ws_client = NewsWSClient(token=API_TOKEN)
     
-    retry_delay = 5
+    attempt = 0
+    # 断线时最后收到的文章；重连成功后补齐这之后的内容
+    gap = None
+    backfills = set()
+    started = False
     while True:
         try:
             logger.info("Connecting to OpenNews WebSocket...")
             await ws_client.connect()
-            WS_CONNECTED = True
-            LAST_WS_ERROR = None
             
             # Subscribe to all news
             sub_resp = await ws_client.subscribe_latest()
             logger.info(f"Subscribed: {sub_resp}")
+            WS_CONNECTED = True
+            LAST_WS_ERROR = None
+            attempt = 0
             
-            await send_tg_msg("🟢 *OpenNews Monitor Started!*\nWatching for news updates...")
+            if not started:
+                send_tg_msg("🟢 *OpenNews Monitor Started!*\nWatching for news updates...")
+                started = True
+            if gap is not None:
+                task = asyncio.create_task(backfill_gap(*gap))
+                backfills.add(task)
+                task.add_done_callback(backfills.discard)
+                gap = None
             
             while True:
                 try:
@@ -86,6 +217,9 @@ async def news_monitor_loop():
                     logger.warning(f"Receive error: {e}")
                     break
 
+                if not ws_client.connected:
+                    raise ConnectionError("WebSocket connection lost")
+
                 if msg:
                     # ... (process msg)
                     data = msg
@@ -95,41 +229,83 @@ async def news_monitor_loop():
                     if not isinstance(data, dict) or "title" not in data:
                         continue
 
-                    try:
-                        title = data.get("title", "No Title")
-                        content = data.get("content", "")
-                        url = data.get("url", "")
-                        source = data.get("source", "Unknown")
-                        coins = ", ".join(data.get("coins", []) or [])
-                        
-                        tg_text = f"*{title}*\n\n{content[:200]}...\n\n"
-                        if coins:
-                            tg_text += f"Coins: `{coins}`\n"
-                        tg_text += f"Source: {source}\n"
-                        if url:
-                            tg_text += f"[Read More]({url})"
-                            
-                        logger.info(f"New News: {title}")
-                        await send_tg_msg(tg_text)
-                    except Exception as e:
-                        logger.error(f"Error processing message: {e}")
+                    # 只入队就回去接收：解析、去重、推送都在 delivery_loop 里，
+                    # Telegram 再慢也不会拖慢接收 (队列满时按 monitor_overflow 处理)
+                    _track(data)
+                    burst.tick()
+                    await ingest.put(data)
+            raise ConnectionError("WebSocket receive failed")
                         
         except Exception as e:
             WS_CONNECTED = False
             LAST_WS_ERROR = str(e)
             logger.error(f"WS Connection error: {e}")
-            if "401" in str(e):
-                 await send_tg_msg("⚠️ **Error**: API Token is invalid (HTTP 401). Please update your token.")
-                 # Sleep longer for auth errors
-                 await asyncio.sleep(60)
-            else:
-                 logger.info(f"Retrying in {retry_delay}s...")
-                 await asyncio.sleep(retry_delay)
+            if gap is None and _last_ts:
+                gap = (_last_ts, _last_id)
+            auth_error = "401" in str(e)
+            if auth_error and attempt == 0:
+                 send_tg_msg("⚠️ **Error**: API Token is invalid (HTTP 401). Please update your token.")
+            delay = _reconnect_delay(attempt, auth_error)
+            attempt += 1
+            logger.info(f"Retrying in {delay:.1f}s...")
             
             try:
                 await ws_client.close()
             except:
                 pass
+            await asyncio.sleep(delay)
+
+async def handle_update(token: str, update: dict):
+    """Answer one Telegram update (a command sent to the bot ``token``)."""
+    message = update.get("message", {})
+    text = message.get("text", "")
+    chat_id = message.get("chat", {}).get("id")
+    
+    if not text or chat_id is None:
+        return
+
+    logger.info(f"Received: {text} from {chat_id}")
+
+    # Handle commands (回复由收到命令的那个 bot 发出)
+    if text.startswith("/start"):
+        send_tg_msg(
+            "👋 *Hello!*\nI am your OpenNews Bot.\n\n"
+            "Commands:\n"
+            "/ping - Check health\n"
+            "/status - Check connection status\n"
+            "/help - Show this menu",
+            chat_id, token=token
+        )
+    elif text.startswith("/ping"):
+        send_tg_msg("Pong! 🏓", chat_id, token=token)
+    elif text.startswith("/status"):
+        status = "🟢 Connected" if WS_CONNECTED else "🔴 Disconnected"
+        msg = f"**System Status**\nWS Connection: {status}"
+        if LAST_WS_ERROR:
+            msg += f"\nLast Error: `{LAST_WS_ERROR}`"
+        q = ingest.stats()
+        mode = "digest (burst)" if burst.active else "single"
+        msg += f"\nIngest: {q['depth']} queued, {q['dropped']} dropped | {burst.rate():.0f}/min, {mode}"
+        send_tg_msg(msg, chat_id, token=token)
+    elif text.startswith("/help"):
+        send_tg_msg(
+            "🤖 **Bot Commands**\n\n"
+            "/start - Initialize bot\n"
+            "/ping - Check health\n"
+            "/status - Check connection status\n"
+            "/help - Show help",
+            chat_id, token=token
+        )
+    elif "@" in text and "bot" in text.lower(): # Simple mention check
+         send_tg_msg("I received your message! Use /help to see what I can do.", chat_id, token=token)
+
+# 正在处理的命令任务 (保留引用，避免任务被垃圾回收)
+_update_tasks: set = set()
+
+def _dispatch(token: str, update: dict):
+    task = asyncio.create_task(handle_update(token, update))
+    _update_tasks.add(task)
+    task.add_done_callback(_update_tasks.discard)
 
 async def telegram_command_loop():
     # Simple polling for commands
@@ -141,65 +317,39 @@ async def telegram_command_loop():
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getUpdates"
     
     logger.info("Starting Telegram Command Listener...")
-    async with httpx.AsyncClient() as client:
-        while True:
+    # 之前以 webhook 模式运行过 (且没有正常退出) 时 getUpdates 会返回 409：
+    # 轮询模式下删除所有命令 bot 的 webhook
+    await delete_webhooks(_command_tokens())
+    while True:
+        try:
             try:
-                try:
-                    resp = await client.get(url, params={"offset": offset, "timeout": 30}, timeout=40.0)
-                except httpx.ReadTimeout:
-                    continue
-                except Exception as e:
-                    logger.error(f"Polling connection error: {e}")
-                    await asyncio.sleep(5)
-                    continue
-
-                if resp.status_code == 200:
-                    data = resp.json()
-                    for update in data.get("result", []):
-                        offset = update["update_id"] + 1
-                        message = update.get("message", {})
-                        text = message.get("text", "")
-                        chat_id = message.get("chat", {}).get("id")
-                        
-                        if not text:
-                            continue
-
-                        logger.info(f"Received: {text} from {chat_id}")
-
-                        # Handle commands
-                        if text.startswith("/start"):
-                            await send_tg_msg(
-                                "👋 *Hello!*\nI am your OpenNews Bot.\n\n"
-                                "Commands:\n"
-                                "/ping - Check health\n"
-                                "/status - Check connection status\n"
-                                "/help - Show this menu",
-                                chat_id
-                            )
-                        elif text.startswith("/ping"):
-                            await send_tg_msg("Pong! 🏓", chat_id)
-                        elif text.startswith("/status"):
-                            status = "🟢 Connected" if WS_CONNECTED else "🔴 Disconnected"
-                            msg = f"**System Status**\nWS Connection: {status}"
-                            if LAST_WS_ERROR:
-                                msg += f"\nLast Error: `{LAST_WS_ERROR}`"
-                            await send_tg_msg(msg, chat_id)
-                        elif text.startswith("/help"):
-                            await send_tg_msg(
-                                "🤖 **Bot Commands**\n\n"
-                                "/start - Initialize bot\n"
-                                "/ping - Check health\n"
-                                "/status - Check connection status\n"
-                                "/help - Show help",
-                                chat_id
-                            )
-                        elif "@" in text and "bot" in text.lower(): # Simple mention check
-                             await send_tg_msg("I received your message! Use /help to see what I can do.", chat_id)
-                            
-                await asyncio.sleep(0.1)
+                # 长轮询不占用 api.telegram.org 的并发名额，否则发送消息要排在它后面
+                resp = await http_pool.get(url, params={"offset": offset, "timeout": 30}, timeout=40.0, long_poll=True)
+            except httpx.ReadTimeout:
+                continue
             except Exception as e:
-                logger.error(f"TG Polling unexpected error: {e}")
+                logger.error(f"Polling connection error: {e}")
+                await asyncio.sleep(5)
+                continue
+
+            if resp.status_code != 200:
+                logger.error(f"getUpdates failed: HTTP {resp.status_code}")
                 await asyncio.sleep(5)
+                continue
+
+            # 长轮询本身会等待新消息，无需额外 sleep；每条命令在自己的任务里处理，不阻塞下一次轮询
+            data = resp.json()
+            for update in data.get("result", []):
+                offset = update["update_id"] + 1
+                _dispatch(TELEGRAM_BOT_TOKEN, update)
+        except Exception as e:
+            logger.error(f"TG Polling unexpected error: {e}")
+            await asyncio.sleep(5)
+
+def _command_tokens() -> list[str]:
+    """Bots whose commands the webhook serves: the monitor's bot plus the matrix bots A-F."""
+    tokens = [TELEGRAM_BOT_TOKEN] + [os.environ.get(f"BOT_TOKEN_{c}") for c in "ABCDEF"]
+    return list(dict.fromkeys(t for t in tokens if t))
 
 async def main():
     print("---------------------------------------------------------")
@@ -207,11 +357,26 @@ async def main():
     print("   Press Ctrl+C to stop")
     print("---------------------------------------------------------")
 
-    # Run both tasks
-    await asyncio.gather(
-        news_monitor_loop(),
-        telegram_command_loop()
-    )
+    # 配置了 webhook_url 时由本地 HTTP 服务接收全部 bot 的命令，否则长轮询监控自己的 bot
+    if TELEGRAM_WEBHOOK_URL:
+        commands = TelegramWebhook(_command_tokens(), handle_update).serve()
+    else:
+        commands = telegram_command_loop()
+
+    # Run both tasks, plus the outbox drainer (also sends what a previous run left queued)
+    for token in _command_tokens():
+        outbox.register(token)
+    try:
+        await asyncio.gather(
+            news_monitor_loop(),
+            delivery_loop(),
+            commands,
+            outbox.run(),
+        )
+    finally:
+        seen_store.close()
+        outbox.close()
+        await http_pool.aclose()
 
 if __name__ == "__main__":
     try:
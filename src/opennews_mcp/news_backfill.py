@@ -0,0 +1,81 @@
+"""REST backfill for gaps in the WebSocket news stream.
+
+The WebSocket only pushes what is published while the connection is up.
+After a reconnect, ``fetch_since`` pages through ``search_news`` (newest
+first) until it reaches the last article received before the drop, and
+returns everything newer, oldest first (``fetch_range`` also says whether
+it got there or stopped at the page cap). Callers feed the result into the
+same pipeline as the live stream; duplicates between the two are removed
+there (seen store), so overlapping a little is harmless and preferred to
+leaving a hole.
+"""
+
+import logging
+
+from opennews_mcp.api_client import NewsAPIClient
+from opennews_mcp.config import WS_BACKFILL_MAX_PAGES
+from opennews_mcp.news_item import extract_ts
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 50
+
+
+async def fetch_since(
+    client: NewsAPIClient,
+    since: int,
+    last_id=None,
+    max_pages: int = WS_BACKFILL_MAX_PAGES,
+    page_size: int = PAGE_SIZE,
+) -> list[dict]:
+    """Raw API items published at or after ``since`` (epoch seconds), oldest first.
+
+    Paging stops at the first page reaching ``since`` or the item
+    ``last_id``, or after ``max_pages`` (logged: the gap was bigger than
+    the backfill covers). Items without a publish time are skipped.
+    """
+    return (await fetch_range(client, since, last_id, max_pages, page_size))[0]
+
+
+async def fetch_range(
+    client: NewsAPIClient,
+    since: int,
+    last_id=None,
+    max_pages: int = WS_BACKFILL_MAX_PAGES,
+    page_size: int = PAGE_SIZE,
+) -> tuple[list[dict], bool]:
+    """Like ``fetch_since``, plus whether paging reached ``since``.
+
+    False means ``max_pages`` ran out first: the items returned are the
+    newest ones, and those between ``since`` and the oldest returned are
+    missing.
+    """
+    out: list[dict] = []
+    ids: set = set()
+    reached = False
+    for page in range(1, max_pages + 1):
+        result = await client.search_news(limit=page_size, page=page)
+        rows = result.get("data") or []
+        for raw in rows:
+            if not isinstance(raw, dict):
+                continue
+            item_id = raw.get("id")
+            ts = extract_ts(raw)
+            if (last_id is not None and item_id is not None and str(item_id) == str(last_id)) or \
+                    (ts is not None and ts < since):
+                reached = True
+                continue
+            # 翻页期间有新文章发布时，前一页的条目会被挤到下一页
+            ident = item_id if item_id is not None else raw.get("text") or raw.get("title")
+            if ts is None or ident in ids:
+                continue
+            ids.add(ident)
+            out.append(raw)
+        if len(rows) < page_size:
+            reached = True
+        if reached:
+            break
+    else:
+        logger.warning("Backfill stopped after %d pages before reaching the gap start", max_pages)
+    out.sort(key=extract_ts)
+    return out, reached
@@ -0,0 +1,227 @@
+"""In-memory window of the latest news, kept current by the WebSocket hub.
+
+``get_latest_news``, ``get_high_score_news`` and ``get_news_by_signal``
+only look at the newest articles, which the shared WebSocket connection
+(``ws_hub``) already pushes as they are published. ``NewsBuffer`` keeps the
+newest ``news_buffer_size`` of them ordered by publish time, so those tools
+answer from memory instead of calling ``/open/news_search`` every time.
+
+The buffer only answers while it is *live*: the hub is connected and the
+buffer was synced after the (re)connect, seeded with one REST page when
+empty, or backfilled over REST across the disconnect otherwise. Until then,
+and for anything older or larger than the window, callers fall back to REST.
+
+Every item gets a sequence number when it enters the buffer. Cursors
+(``get_news_since``) carry the buffer instance, the sequence number, the
+publish time of the newest item returned and the ids of every returned item
+with that publish time: within the same buffer they select exactly the items
+added since, including late items with an older publish time; otherwise
+the publish time is used, from memory when it is inside the window and over
+REST (``news_backfill.fetch_range``) when not, skipping the ids already
+returned so articles sharing the boundary second are neither repeated nor
+lost.
+"""
+
+import bisect
+import logging
+import secrets
+from collections.abc import Iterable
+from operator import attrgetter
+
+from opennews_mcp.api_client import NewsAPIClient
+from opennews_mcp.config import MAX_ROWS, NEWS_BUFFER_SIZE
+from opennews_mcp.news_backfill import fetch_range
+from opennews_mcp.news_item import extract_ts
+
+logger = logging.getLogger(__name__)
+
+_order = attrgetter("ts", "seq")
+_ts = attrgetter("ts")
+
+
+def make_cursor(boot: str, seq: int, ts: int, ids: Iterable = ()) -> str:
+    return f"{boot}:{seq}:{ts}:{','.join(sorted(str(i) for i in ids))}"
+
+
+def parse_cursor(cursor: str) -> tuple[str, int, int, frozenset[str]]:
+    """``(buffer id, sequence number, publish time, ids at that time)`` of a cursor; ValueError if malformed."""
+    try:
+        boot, seq, ts, ids = cursor.split(":", 3)
+        return boot, int(seq), int(ts), frozenset(filter(None, ids.split(",")))
+    except ValueError:
+        raise ValueError(f"invalid cursor {cursor!r}") from None
+
+
+def advance(ts: int, ids: Iterable, delivered: Iterable[tuple[int, object]]) -> tuple[int, frozenset[str]]:
+    """Cursor position after ``delivered`` ``(publish time, id)`` pairs: the newest time and every id at it."""
+    at = set(ids)
+    for item_ts, item_id in delivered:
+        if item_ts > ts:
+            ts, at = item_ts, set()
+        if item_ts == ts and item_id is not None:
+            at.add(str(item_id))
+    return ts, frozenset(at)
+
+
+def after(ts: int, ids: frozenset[str], item_ts: int, item_id) -> bool:
+    """Whether an item comes after the cursor position ``(ts, ids)``."""
+    return item_ts > ts or (item_ts == ts and (item_id is None or str(item_id) not in ids))
+
+
+def _key(raw: dict):
+    item_id = raw.get("id")
+    return str(item_id) if item_id is not None else raw.get("text") or raw.get("title")
+
+
+class _Entry:
+    __slots__ = ("key", "ts", "seq", "raw")
+
+    def __init__(self, key, ts: int, seq: int, raw: dict):
+        self.key = key
+        self.ts = ts
+        self.seq = seq
+        self.raw = raw
+
+
+class NewsBuffer:
+    """Bounded, publish-time ordered window of raw API items with sequence numbers."""
+
+    def __init__(self, capacity: int = NEWS_BUFFER_SIZE, client: NewsAPIClient | None = None):
+        # 至少装得下一页 REST 结果，否则种子数据自己就会被挤出去
+        self.capacity = max(capacity, MAX_ROWS)
+        self.client = client or NewsAPIClient()
+        self.boot = secrets.token_hex(4)
+        self._entries: list[_Entry] = []
+        self._by_key: dict = {}
+        self._seq = 0
+        self._evicted_seq = 0
+        self.live = False
+        # 最近一次 REST 种子读取时 API 报告的文章总数 (``get_latest_news`` 的 total)
+        self.api_total: int | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, raw: dict) -> bool:
+        """Insert a pushed or fetched item; False if it has no publish time or was already buffered."""
+        ts = extract_ts(raw)
+        if ts is None:
+            return False
+        key = _key(raw)
+        entry = self._by_key.get(key)
+        if entry is not None:
+            # 同一条新闻再次推送 (如 AI 评分完成)：更新内容，保留位置和序号
+            entry.raw = raw
+            return False
+        self._seq += 1
+        entry = _Entry(key, ts, self._seq, raw)
+        bisect.insort(self._entries, entry, key=_order)
+        self._by_key[key] = entry
+        excess = len(self._entries) - self.capacity
+        if excess > 0:
+            for old in self._entries[:excess]:
+                del self._by_key[old.key]
+                self._evicted_seq = max(self._evicted_seq, old.seq)
+            del self._entries[:excess]
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self._by_key.clear()
+        self._evicted_seq = self._seq
+        self.live = False
+
+    def invalidate(self):
+        """The feed dropped: stop answering until the next ``sync``."""
+        self.live = False
+
+    async def sync(self):
+        """Catch up after the hub (re)connected; the buffer answers reads once this succeeds."""
+        self.live = False
+        last = self._entries[-1] if self._entries else None
+        try:
+            if last is not None:
+                rows, reached = await fetch_range(self.client, last.ts, last.raw.get("id"))
+                if reached:
+                    for raw in rows:
+                        self.add(raw)
+                    self.live = True
+                    return
+                # 断开太久，补不齐：整个重新加载
+                logger.info("News buffer gap too long to backfill, reloading")
+                self.clear()
+            result = await self.client.search_news(limit=MAX_ROWS, page=1)
+            rows = [raw for raw in result.get("data") or [] if isinstance(raw, dict)]
+            for raw in reversed(rows):
+                self.add(raw)
+            self.api_total = result.get("total")
+            self.live = True
+        except Exception as e:
+            logger.warning("News buffer sync failed (%s), news tools stay on REST", e)
+
+    def latest(self, count: int) -> list[dict] | None:
+        """The ``count`` newest items, newest first; None if the buffer cannot answer."""
+        if not self.live or len(self._entries) < count:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [entry.raw for entry in reversed(self._entries[-count:])]
+
+    def head_cursor(self) -> str | None:
+        """Cursor positioned after everything currently buffered."""
+        if not self.live or not self._entries:
+            return None
+        ts = self._entries[-1].ts
+        start = bisect.bisect_left(self._entries, ts, key=_ts)
+        return make_cursor(self.boot, self._seq, ts, (e.raw.get("id") for e in self._entries[start:]))
+
+    def since(self, cursor: str | None, since: int, limit: int) -> tuple[list[dict], str, bool] | None:
+        """Items after ``cursor`` (or published at/after ``since``), oldest first, at most ``limit``.
+
+        Returns ``(items, next cursor, more available)``, or None when the
+        position is outside the window and the caller has to go to REST.
+        """
+        if not self.live:
+            self.misses += 1
+            return None
+        boot, seq, ts, ids = parse_cursor(cursor) if cursor else ("", 0, since, frozenset())
+        if boot == self.boot and seq >= self._evicted_seq:
+            picked = sorted((e for e in self._entries if e.seq > seq), key=attrgetter("seq"))
+            by_seq = True
+        elif self._entries and ts > self._entries[0].ts:
+            picked = [e for e in self._entries if after(ts, ids, e.ts, e.raw.get("id"))]
+            by_seq = False
+        else:
+            self.misses += 1
+            return None
+        self.hits += 1
+        more = len(picked) > limit
+        picked = picked[:limit]
+        ts, ids = advance(ts, ids, ((e.ts, e.raw.get("id")) for e in picked))
+        if by_seq and picked:
+            next_cursor = make_cursor(self.boot, picked[-1].seq, ts, ids)
+        elif not more:
+            # 窗口内已全部返回：之后按序号续读
+            next_cursor = make_cursor(self.boot, self._seq, ts, ids)
+        else:
+            next_cursor = make_cursor("", 0, ts, ids)
+        return [e.raw for e in picked], next_cursor, more
+
+    async def close(self):
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return {
+            "live": self.live,
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "oldest_ts": self._entries[0].ts if self._entries else None,
+            "newest_ts": self._entries[-1].ts if self._entries else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+news_buffer = NewsBuffer()
@@ -0,0 +1,227 @@
+"""Compact news item shared by every pipeline.
+
+Parsers, the feed cache, the aggregator, the scheduler, the cron job and
+the WebSocket monitor all pass ``NewsItem`` objects instead of ad-hoc dicts.
+Items use ``__slots__`` (no per-instance ``__dict__``), keep the publish
+time as integer epoch seconds, intern the source name (a handful of
+distinct strings shared by thousands of items) and compute derived values
+(``time``, normalized title, dedup hash, source rank) only when asked.
+
+``Story`` is the representative of a cluster of near-duplicate items: the
+best item plus the corroborating sources, the keyword score and the other
+members.
+"""
+
+import html
+import re
+import sys
+from datetime import datetime, timezone
+
+from opennews_mcp.seen_store import normalize_title
+
+
+class NewsItem:
+    __slots__ = ("title", "link", "source", "ts", "guid", "summary", "meta", "_norm", "_dedup")
+
+    def __init__(self, title: str, link: str, source: str, ts: int, guid: str = "", summary: str = "",
+                 meta: dict | None = None):
+        self.title = title
+        self.link = link
+        self.source = sys.intern(source) if source else ""
+        self.ts = ts
+        self.guid = guid
+        self.summary = summary
+        # 6551 API 条目的附加字段 (coins / engine_type)，RSS 条目为 None
+        self.meta = meta
+        self._norm = None
+        self._dedup = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.source!r}, {self.ts}, {self.title[:40]!r})"
+
+    def _fields(self) -> tuple:
+        return self.title, self.link, self.source, self.ts, self.guid, self.summary, self.meta
+
+    def __reduce__(self):
+        # 解析进程池把条目传回主进程时只带字段本身：dedup 哈希依赖进程的
+        # hash 种子，在主进程里惰性重算
+        return type(self), self._fields()
+
+    @property
+    def time(self) -> datetime:
+        return datetime.fromtimestamp(self.ts, timezone.utc)
+
+    @property
+    def norm_title(self) -> str:
+        if self._norm is None:
+            self._norm = normalize_title(self.title)
+        return self._norm
+
+    @property
+    def dedup_key(self) -> int:
+        """Hash of (lower-cased title, link prefix): exact duplicates within one run."""
+        if self._dedup is None:
+            self._dedup = hash((self.title.lower(), self.link[:80]))
+        return self._dedup
+
+    @property
+    def rank(self) -> int:
+        # 不缓存：条目跨轮询保留，注册表热加载后优先级可能已改变
+        # 延迟导入：source_registry -> feed_parsers -> news_item
+        from opennews_mcp.source_registry import registry
+        return registry.rank(self.source)
+
+    # 单条 NewsItem 即一个只有自己的故事；Story 用槽位覆盖这三个属性
+    @property
+    def sources(self) -> list[str]:
+        return [self.source]
+
+    @property
+    def score(self) -> float:
+        return 0.0
+
+    @property
+    def related(self) -> list["NewsItem"]:
+        return []
+
+    def to_dict(self) -> dict:
+        out = {"title": self.title, "link": self.link, "source": self.source, "ts": self.ts, "guid": self.guid}
+        if self.summary:
+            out["summary"] = self.summary
+        if self.meta:
+            out["meta"] = self.meta
+        return out
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "NewsItem":
+        # 旧版缓存里时间字段叫 time (浮点 epoch)
+        ts = raw.get("ts", raw.get("time", 0))
+        return cls(raw.get("title", ""), raw.get("link", ""), raw.get("source", ""), int(ts or 0),
+                   raw.get("guid", ""), raw.get("summary", ""), raw.get("meta"))
+
+
+class Story(NewsItem):
+    """Best item of a near-duplicate cluster, with its corroborating sources."""
+
+    __slots__ = ("sources", "score", "related")
+
+    def __reduce__(self):
+        return _story, (self._fields(), self.sources, self.score, self.related)
+
+    @classmethod
+    def of(cls, item: NewsItem, sources: list[str], score: float = 0.0,
+           related: list[NewsItem] | None = None) -> "Story":
+        story = cls(item.title, item.link, item.source, item.ts, item.guid, item.summary, item.meta)
+        story.sources = sources
+        story.score = score
+        story.related = related or []
+        return story
+
+
+def _story(fields: tuple, sources: list[str], score: float, related: list[NewsItem]) -> Story:
+    return Story.of(NewsItem(*fields), sources, score, related)
+
+
+# ---------- 6551 API payloads (REST search results / WebSocket pushes) ----------
+
+def clean_text(value) -> str:
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = str(value)
+    value = html.unescape(value)
+    value = re.sub(r"<[^>]+>", "", value)
+    value = value.replace("\r\n", "\n").replace("\r", "\n")
+    value = re.sub(r"[ \t]+", " ", value)
+    value = re.sub(r"\n{3,}", "\n\n", value)
+    return value.strip()
+
+
+def extract_title_and_body(item: dict) -> tuple[str, str]:
+    raw = (
+        item.get("title")
+        or item.get("headline")
+        or item.get("text")
+        or item.get("content")
+        or item.get("summary")
+        or item.get("description")
+        or ""
+    )
+    raw = clean_text(raw)
+    if not raw:
+        return "无标题", ""
+
+    lines = [ln.strip() for ln in raw.split("\n") if ln.strip()]
+    if not lines:
+        return "无标题", ""
+
+    title = lines[0]
+    body = "\n".join(lines[1:]).strip()
+    if not body:
+        body = clean_text(item.get("content") or item.get("summary") or item.get("description") or "")
+    return title, body
+
+
+def _parse_iso(time_str: str) -> datetime:
+    # Handle various formats like "2023-10-27T10:00:00Z" or "2023-10-27 10:00:00"
+    try:
+        if time_str.endswith("Z"):
+            time_str = time_str[:-1]
+        return datetime.fromisoformat(time_str).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return datetime.now(timezone.utc)
+
+
+def extract_ts(item: dict) -> int | None:
+    """Publish time of an API item as epoch seconds (API times are epoch ms or ISO strings)."""
+    ts = item.get("ts") or item.get("publishTime") or item.get("time") or item.get("createTime")
+    if ts is None:
+        return None
+    try:
+        if isinstance(ts, (int, float)) or (isinstance(ts, str) and ts.isdigit()):
+            return int(float(ts) / 1000.0)
+        if isinstance(ts, str):
+            return int(_parse_iso(ts).timestamp())
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return None
+
+
+def _coin_names(raw_coins) -> list[str]:
+    names = []
+    for c in raw_coins or []:
+        if isinstance(c, dict):
+            name = c.get("symbol") or c.get("name") or ""
+            if name:
+                names.append(str(name))
+        else:
+            s = str(c).strip().strip("'\"` ")
+            if s:
+                names.append(s)
+    return names
+
+
+def from_api(raw: dict) -> NewsItem:
+    """Build an item from a 6551 REST or WebSocket news payload.
+
+    Items without a publish time get ``ts`` 0; check ``extract_ts`` when
+    the difference matters.
+    """
+    title, body = extract_title_and_body(raw)
+    meta = {}
+    coins = _coin_names(raw.get("coins"))
+    if coins:
+        meta["coins"] = coins
+    engine_type = raw.get("engineType") or raw.get("engine_type")
+    if engine_type:
+        meta["engine_type"] = str(engine_type)
+    item_id = raw.get("id")
+    return NewsItem(
+        title,
+        str(raw.get("link") or raw.get("url") or ""),
+        str(raw.get("newsType") or raw.get("source") or ""),
+        extract_ts(raw) or 0,
+        "" if item_id in (None, "") else str(item_id),
+        body,
+        meta or None,
+    )
@@ -0,0 +1,285 @@
+"""Durable outbox for outbound Telegram notifications.
+
+Producers (the WebSocket monitor, the cron job) call ``outbox.enqueue``,
+which only inserts a row into a local SQLite file and returns: it never
+waits on the network, so ingest stays fast however slow Telegram is. A
+drainer task sends the queued messages through ``telegram_delivery``:
+
+* at-least-once: a row is marked sent only after Telegram accepted it;
+  messages still pending when the process stops are sent by the next run;
+* in order per chat: each chat is drained by its own worker, oldest
+  message first, and a message that keeps failing holds back the later
+  messages of that chat (but not of other chats);
+* transient failures (network, 429, 5xx) are retried with backoff until
+  the message is ``OUTBOX_TTL_HOURS`` old; permanent ones (400, 403) are
+  marked dead and logged;
+* idempotent: a message enqueued with a ``key`` that is already in the
+  outbox (pending or sent within the TTL) is dropped, so a producer that
+  restarts and replays its input does not send duplicates.
+
+A crash between Telegram's answer and the ``sent`` update can still repeat
+that one message on restart: at-least-once, not exactly-once.
+
+Rows store the bot id, never the token (the cache directory is uploaded to
+the CI cache); tokens are kept in memory as producers enqueue or
+``register`` them, and rows of bots unknown to this process wait.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+from opennews_mcp.config import CACHE_DIR, OUTBOX_TTL_HOURS
+from opennews_mcp.telegram_delivery import Delivery, TelegramDelivery, _bot_id, telegram_delivery
+
+logger = logging.getLogger(__name__)
+
+PENDING, SENT, DEAD = "pending", "sent", "dead"
+RETRY_BASE = 5.0
+RETRY_MAX = 300.0
+# 没有待发送消息时多久检查一次 (enqueue 会立即唤醒)
+IDLE_INTERVAL = 60.0
+
+
+def _retryable(result: Delivery) -> bool:
+    return result.status in (0, 429) or result.status >= 500
+
+
+class Outbox:
+    """SQLite-backed queue of Telegram messages with a per-chat ordered drainer."""
+
+    def __init__(
+        self,
+        path: Path,
+        delivery: TelegramDelivery = telegram_delivery,
+        ttl: float = OUTBOX_TTL_HOURS * 3600,
+        purge_interval: float = 3600.0,
+    ):
+        self.path = Path(path)
+        self.delivery = delivery
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._db: sqlite3.Connection | None = None
+        self._last_purge = 0.0
+        self._wake: asyncio.Event | None = None
+        self._workers: dict[tuple, asyncio.Task] = {}
+        self._tokens: dict[str, str] = {}
+        self.enqueued = 0
+        self.duplicates = 0
+        self.sent = 0
+        self.dead = 0
+        self.retries = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT UNIQUE,"
+                " bot TEXT NOT NULL,"
+                " chat TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " parse_mode TEXT,"
+                " preview INTEGER NOT NULL DEFAULT 0,"
+                " state TEXT NOT NULL DEFAULT 'pending',"
+                " created REAL NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_at REAL NOT NULL DEFAULT 0,"
+                " error TEXT NOT NULL DEFAULT '')"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS outbox_state ON outbox(state, bot, chat, id)")
+        return self._db
+
+    # ---------- producer side ----------
+
+    def register(self, token: str):
+        """Make the drainer able to send the queued messages of this bot."""
+        if token:
+            self._tokens[_bot_id(token)] = token
+
+    def enqueue(
+        self,
+        token: str,
+        chat_id,
+        text: str,
+        parse_mode: str | None = "Markdown",
+        key: str | None = None,
+        disable_preview: bool = True,
+    ) -> int | None:
+        """Queue a message and return its id; None if it was dropped.
+
+        ``key`` is an idempotency key such as ``"ws:<news id>"``: a message
+        whose key is already in the outbox is not queued again.
+        """
+        if not token or not chat_id:
+            logger.error("Telegram not configured (missing token or chat_id), dropping message")
+            return None
+        self.register(token)
+        try:
+            cur = self._conn().execute(
+                "INSERT OR IGNORE INTO outbox (key, bot, chat, text, parse_mode, preview, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, _bot_id(token), str(chat_id), text, parse_mode, 0 if disable_preview else 1, time.time()),
+            )
+        except sqlite3.Error as e:
+            logger.error("Failed to queue Telegram message in %s: %s", self.path, e)
+            return None
+        if not cur.rowcount:
+            self.duplicates += 1
+            return None
+        self.enqueued += 1
+        if self._wake is not None:
+            self._wake.set()
+        return cur.lastrowid
+
+    def state(self, ids: list[int]) -> dict[int, str]:
+        """Current state (pending / sent / dead) of the given messages."""
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        rows = self._conn().execute(f"SELECT id, state FROM outbox WHERE id IN ({marks})", ids)
+        return dict(rows.fetchall())
+
+    # ---------- drainer ----------
+
+    def _head(self, bot: str, chat: str) -> tuple | None:
+        return self._conn().execute(
+            "SELECT id, text, parse_mode, preview, created, attempts, next_at FROM outbox"
+            " WHERE state = ? AND bot = ? AND chat = ? ORDER BY id LIMIT 1",
+            (PENDING, bot, chat),
+        ).fetchone()
+
+    def _dispatch(self) -> float | None:
+        """Start a worker for every chat whose oldest message is due; seconds until the next one is."""
+        db = self._conn()
+        now = time.time()
+        heads = db.execute(
+            "SELECT o.bot, o.chat, o.next_at FROM outbox o"
+            " JOIN (SELECT MIN(id) AS id FROM outbox WHERE state = ? GROUP BY bot, chat) h ON o.id = h.id",
+            (PENDING,),
+        ).fetchall()
+        delay = None
+        for bot, chat, next_at in heads:
+            key = (bot, chat)
+            if key in self._workers or bot not in self._tokens:
+                continue
+            if next_at > now:
+                delay = next_at - now if delay is None else min(delay, next_at - now)
+                continue
+            self._workers[key] = asyncio.create_task(self._drain_chat(bot, chat))
+        if now - self._last_purge >= self.purge_interval:
+            # 已结束的消息保留一个 TTL 供幂等键去重；无人认领的待发消息 (bot 不再运行) 保留两个 TTL
+            db.execute("DELETE FROM outbox WHERE created < ? AND (state != ? OR created < ?)",
+                       (now - self.ttl, PENDING, now - 2 * self.ttl))
+            self._last_purge = now
+        return delay
+
+    async def _drain_chat(self, bot: str, chat: str):
+        try:
+            while True:
+                row = self._head(bot, chat)
+                if row is None or row[6] > time.time():
+                    return
+                await self._send(self._tokens[bot], chat, row)
+        except Exception as e:
+            logger.error("Outbox worker for chat %s failed: %s", chat, e)
+        finally:
+            self._workers.pop((bot, chat), None)
+            if self._wake is not None:
+                self._wake.set()
+
+    async def _send(self, token: str, chat: str, row: tuple):
+        msg_id, text, parse_mode, preview, created, attempts, _ = row
+        result = await self.delivery.send(token, chat, text, parse_mode=parse_mode, disable_preview=not preview)
+        db = self._conn()
+        now = time.time()
+        if result.ok:
+            self.sent += 1
+            db.execute("UPDATE outbox SET state = ?, attempts = ?, error = '' WHERE id = ?",
+                       (SENT, attempts + 1, msg_id))
+        elif _retryable(result) and now - created < self.ttl:
+            # Telegram 暂时不可用：退避后重试，同一 chat 的后续消息继续排队
+            self.retries += 1
+            delay = min(RETRY_MAX, RETRY_BASE * 2 ** attempts)
+            db.execute("UPDATE outbox SET attempts = ?, next_at = ?, error = ? WHERE id = ?",
+                       (attempts + 1, now + delay, result.error[:200], msg_id))
+            logger.warning("Outbox message %d to %s not delivered (%s), retrying in %.0fs",
+                           msg_id, chat, result.error, delay)
+        else:
+            self.dead += 1
+            db.execute("UPDATE outbox SET state = ?, attempts = ?, error = ? WHERE id = ?",
+                       (DEAD, attempts + 1, result.error[:200], msg_id))
+            logger.error("Outbox message %d to %s dropped after %d attempts: %s",
+                         msg_id, chat, attempts + 1, result.error)
+
+    def _pending(self) -> int:
+        """Pending messages this process can send (bots it has a token for)."""
+        bots = list(self._tokens)
+        if not bots:
+            return 0
+        marks = ",".join("?" * len(bots))
+        return self._conn().execute(
+            f"SELECT COUNT(*) FROM outbox WHERE state = ? AND bot IN ({marks})", (PENDING, *bots)
+        ).fetchone()[0]
+
+    async def _run(self, until_empty: bool):
+        self._wake = asyncio.Event()
+        try:
+            while True:
+                self._wake.clear()
+                delay = self._dispatch()
+                if until_empty and not self._workers and not self._pending():
+                    return
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay if delay is not None else IDLE_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in list(self._workers.values()):
+                task.cancel()
+            self._workers.clear()
+            self._wake = None
+
+    async def run(self):
+        """Drain forever; run as a background task next to the producers."""
+        await self._run(until_empty=False)
+
+    async def drain(self, timeout: float | None = None) -> int:
+        """Send until nothing is pending or ``timeout`` passes; returns the number still pending.
+
+        Messages interrupted by the timeout stay pending and are sent by the
+        next ``drain`` / ``run``.
+        """
+        try:
+            await asyncio.wait_for(self._run(until_empty=True), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._pending()
+
+    def stats(self) -> dict:
+        db = self._conn()
+        counts = dict(db.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall())
+        oldest = db.execute("SELECT MIN(created) FROM outbox WHERE state = ?", (PENDING,)).fetchone()[0]
+        return {
+            "pending": counts.get(PENDING, 0),
+            "oldest_pending_age": round(time.time() - oldest, 1) if oldest else 0.0,
+            "enqueued": self.enqueued,
+            "duplicates": self.duplicates,
+            "sent": self.sent,
+            "retries": self.retries,
+            "dead": self.dead,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+outbox = Outbox(CACHE_DIR / "outbox.sqlite3")
@@ -0,0 +1,106 @@
+"""Worker pool that keeps CPU-bound feed work off the event loop.
+
+When dozens of feeds land at once, parsing and filtering them on the event
+loop blocks everything else in the process: WebSocket receives in the
+monitor, Telegram polling, other MCP calls. ``parse_pool`` hands that work
+to worker threads (default) or, for parsing, to worker processes
+(``rss_parse_executor: "process"``, scales with cores), and awaits the
+result. Small bodies are parsed inline, where the hand-off would cost more
+than the parse.
+
+Filtering feeds a shared ``TopStories``, so it always runs on a thread
+(``run_threaded``), never in another process; seen-store lookups happen on
+the event loop before the hand-off (SQLite connection shared by all runs). Parsed items
+cross the process boundary as plain field tuples (see
+``NewsItem.__reduce__``). Worker processes are forked or spawned from this
+process, so parsers added with ``register_parser`` must be registered at
+import time to exist there.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from opennews_mcp.config import RSS_PARSE_EXECUTOR, RSS_PARSE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# 小于这个大小的 feed 直接在事件循环上解析
+INLINE_MAX_BYTES = 4 * 1024
+MAX_AUTO_WORKERS = 8
+
+
+class ParsePool:
+    """Lazily created thread / process pools for parse and filter jobs."""
+
+    def __init__(self, kind: str = RSS_PARSE_EXECUTOR, workers: int = RSS_PARSE_WORKERS,
+                 inline_max: int = INLINE_MAX_BYTES):
+        if kind not in ("thread", "process", "inline"):
+            logger.warning("Unknown rss_parse_executor %r, using threads", kind)
+            kind = "thread"
+        self.kind = kind
+        self.workers = workers or min(os.cpu_count() or 1, MAX_AUTO_WORKERS)
+        self.inline_max = inline_max
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self.jobs = 0
+        self.inline = 0
+        self.worker_seconds = 0.0
+
+    def _thread_executor(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="feed-worker")
+        return self._threads
+
+    def _executor(self) -> Executor:
+        if self.kind != "process":
+            return self._thread_executor()
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=self.workers)
+        return self._processes
+
+    async def _submit(self, executor: Executor, func: Callable, args: tuple):
+        self.jobs += 1
+        started = time.monotonic()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            self.worker_seconds += time.monotonic() - started
+
+    async def run(self, func: Callable, *args, inline: bool = False):
+        """``func(*args)`` on a worker thread or process (inline if asked or in ``inline`` mode).
+
+        ``func`` and its arguments must be picklable in process mode.
+        """
+        if inline or self.kind == "inline":
+            self.inline += 1
+            return func(*args)
+        return await self._submit(self._executor(), func, args)
+
+    async def run_threaded(self, func: Callable, *args):
+        """``func(*args)`` on a worker thread even in process mode, for work on in-process state."""
+        if self.kind == "inline":
+            self.inline += 1
+            return func(*args)
+        return await self._submit(self._thread_executor(), func, args)
+
+    def shutdown(self):
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "jobs": self.jobs,
+            "inline": self.inline,
+            "worker_seconds": round(self.worker_seconds, 3),
+        }
+
+
+parse_pool = ParsePool()
@@ -0,0 +1,140 @@
+"""Short-lived cache for 6551 REST responses, with request coalescing.
+
+MCP tool calls often ask for the same thing at about the same time:
+``get_high_score_news`` and ``get_news_by_signal`` both read the latest
+page, agents repeat searches, and ``get_engine_tree`` hardly ever changes.
+``ResponseCache`` sits inside ``NewsAPIClient`` and keeps decoded responses:
+
+* per-endpoint TTLs (``api_cache_search_ttl``, ``api_cache_engine_tree_ttl``;
+  0 disables caching for that endpoint);
+* LRU eviction under a byte budget (``api_cache_max_mb``, measured on the
+  response body);
+* singleflight: identical requests issued while one is in flight wait for
+  that one instead of calling the API again; a caller giving up does not
+  cancel the shared request;
+* a first page fetched with a larger ``limit`` also answers smaller limits.
+
+Errors are never cached. Cached values are shared between callers and must
+be treated as read-only.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from opennews_mcp.config import API_CACHE_ENGINE_TREE_TTL, API_CACHE_MAX_MB, API_CACHE_SEARCH_TTL
+
+logger = logging.getLogger(__name__)
+
+# () -> (解码后的响应, 响应体字节数)
+Fetch = Callable[[], Awaitable[tuple[object, int]]]
+
+
+class _Entry:
+    __slots__ = ("value", "size", "limit", "expires")
+
+    def __init__(self, value, size: int, limit: int, expires: float):
+        self.value = value
+        self.size = size
+        self.limit = limit
+        self.expires = expires
+
+
+class ResponseCache:
+    """LRU of decoded API responses with per-endpoint TTLs, a byte budget and request coalescing."""
+
+    def __init__(self, ttls: dict[str, float] | None = None, max_bytes: int = int(API_CACHE_MAX_MB * 1024 * 1024)):
+        self.ttls = ttls if ttls is not None else {
+            "search": API_CACHE_SEARCH_TTL,
+            "engine_tree": API_CACHE_ENGINE_TREE_TTL,
+        }
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._inflight: dict[tuple, tuple[int, asyncio.Task]] = {}
+        self.bytes = 0
+        self.evictions = 0
+        self._counts: dict[str, dict[str, int]] = {}
+
+    def _count(self, endpoint: str, what: str):
+        counts = self._counts.setdefault(endpoint, {"hits": 0, "coalesced": 0, "misses": 0})
+        counts[what] += 1
+
+    async def get(self, endpoint: str, key: str, fetch: Fetch, limit: int = 0):
+        """Cached response for ``(endpoint, key)``, fetching it at most once at a time.
+
+        ``limit`` is the number of rows asked for when ``key`` leaves it out:
+        an entry (or in-flight request) with at least that many rows answers.
+        """
+        ttl = self.ttls.get(endpoint, 0)
+        if ttl <= 0:
+            return (await fetch())[0]
+        full = (endpoint, key)
+        entry = self._entries.get(full)
+        if entry is not None:
+            if entry.expires <= time.monotonic():
+                self._drop(full)
+            elif entry.limit >= limit:
+                self._entries.move_to_end(full)
+                self._count(endpoint, "hits")
+                return entry.value
+        flight = self._inflight.get(full)
+        if flight is not None and flight[0] >= limit:
+            self._count(endpoint, "coalesced")
+            return await asyncio.shield(flight[1])
+        self._count(endpoint, "misses")
+        task = asyncio.ensure_future(self._load(full, fetch, limit, ttl))
+        task.add_done_callback(_consume)
+        self._inflight[full] = (limit, task)
+        return await asyncio.shield(task)
+
+    async def _load(self, full: tuple, fetch: Fetch, limit: int, ttl: float):
+        try:
+            value, size = await fetch()
+        finally:
+            flight = self._inflight.get(full)
+            if flight is not None and flight[1] is asyncio.current_task():
+                del self._inflight[full]
+        current = self._entries.get(full)
+        if current is not None and current.limit > limit and current.expires > time.monotonic():
+            # 期间已缓存了更大的一页，保留它
+            return value
+        self._drop(full)
+        if size <= self.max_bytes:
+            self._entries[full] = _Entry(value, size, limit, time.monotonic() + ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def _drop(self, full: tuple):
+        entry = self._entries.pop(full, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        hits = sum(c["hits"] + c["coalesced"] for c in self._counts.values())
+        misses = sum(c["misses"] for c in self._counts.values())
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "in_flight": len(self._inflight),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "evictions": self.evictions,
+            "endpoints": {ep: dict(c) for ep, c in self._counts.items()},
+        }
+
+
+def _consume(task: asyncio.Task):
+    # 所有等待者都已放弃时，避免 "exception was never retrieved"
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Cached API request failed: %s", task.exception())
@@ -0,0 +1,433 @@
+"""Offline benchmark for the RSS aggregator with record / replay.
+
+Three subcommands:
+
+``record``
+    Fetch every source in the registry once and store status, headers,
+    latency and body in a replay archive (gzipped JSON).
+``serve``
+    Serve an archive from a local stand-in HTTP server, with optional
+    latency scaling, injected errors and hanging (timed-out) responses.
+``run``
+    Replay the archive through the aggregator pipeline and report per-stage
+    timings (fetch, parse, sort, filter, render), the end-to-end time of the
+    streaming path, throughput, the memory held per parsed item and the
+    worst event-loop stall during the streaming run, with the source list
+    multiplied 1x / 10x / 100x. Set ``OPENNEWS_RSS_PARSE_EXECUTOR`` to
+    ``inline`` / ``thread`` / ``process`` to compare where feeds are parsed. With ``--baseline`` the run fails (exit code 1) if any stage got
+    slower than the stored baseline by more than ``--tolerance``.
+
+Usage:
+    python -m opennews_mcp.rss_bench record
+    python -m opennews_mcp.rss_bench run --scales 1,10,100 --save-baseline
+    python -m opennews_mcp.rss_bench run --baseline
+    python -m opennews_mcp.rss_bench serve --port 8765 --error-rate 0.1
+
+Timestamps are evaluated relative to the recording time, so an archive
+gives the same results however old it is.
+"""
+
+import argparse
+import asyncio
+import base64
+import dataclasses
+import gzip
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from opennews_mcp.config import CACHE_DIR
+from opennews_mcp.http_pool import HttpPool, http_pool
+from opennews_mcp.parse_pool import parse_pool
+from opennews_mcp.source_registry import SourceSpec, registry
+from opennews_mcp.tools.aggregator_rss import (
+    FETCH_HEADERS, FeedSnapshot, TopStories, _parse_feed, _render_line, _sort_items, _stream_into,
+)
+
+logger = logging.getLogger("rss_bench")
+
+BENCH_DIR = CACHE_DIR / "rss_bench"
+DEFAULT_ARCHIVE = BENCH_DIR / "archive.json.gz"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+STAGES = ("fetch", "parse", "sort", "filter", "render", "end_to_end")
+# 回放时保留的响应头
+_KEEP_HEADERS = ("content-type", "etag", "last-modified")
+
+
+# ---------- archive ----------
+
+async def record(path: Path, sources: list[SourceSpec]) -> dict:
+    """Fetch every source once and write the replay archive."""
+    async def one(spec: SourceSpec) -> dict:
+        entry = {"name": spec.name, "url": spec.url}
+        started = time.perf_counter()
+        try:
+            resp = await http_pool.get(spec.url, timeout=spec.timeout, headers=FETCH_HEADERS, follow_redirects=True)
+            entry["status"] = resp.status_code
+            entry["headers"] = {k: resp.headers[k] for k in _KEEP_HEADERS if k in resp.headers}
+            entry["body"] = base64.b64encode(resp.content).decode("ascii")
+        except Exception as e:
+            entry["status"] = 0
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entry["latency"] = round(time.perf_counter() - started, 4)
+        return entry
+
+    try:
+        entries = await asyncio.gather(*(one(spec) for spec in sources))
+    finally:
+        await http_pool.aclose()
+    archive = {"recorded_at": time.time(), "sources": entries}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(archive, f, ensure_ascii=False)
+    return archive
+
+
+def load_archive(path: Path) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        archive = json.load(f)
+    for entry in archive["sources"]:
+        entry["_body"] = base64.b64decode(entry.get("body", ""))
+    return archive
+
+
+# ---------- stand-in server ----------
+
+class ReplayServer:
+    """Minimal HTTP/1.1 keep-alive server answering ``/s/<index>/...`` from an archive.
+
+    ``latency_scale`` multiplies the recorded latency (0 serves instantly);
+    ``error_rate`` answers a fraction of requests with 500 and
+    ``timeout_rate`` never answers them, so the client's timeout fires.
+    """
+
+    def __init__(self, archive: dict, latency_scale: float = 0.0, error_rate: float = 0.0,
+                 timeout_rate: float = 0.0, seed: int = 6551):
+        self.entries = archive["sources"]
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self._rnd = random.Random(seed)
+        self._server: asyncio.AbstractServer | None = None
+        self._handlers: set[asyncio.Task] = set()
+        self.requests = 0
+        self.port = 0
+
+    def url(self, index: int, copy: int = 0) -> str:
+        return f"http://127.0.0.1:{self.port}/s/{index}/{copy}"
+
+    async def start(self, port: int = 0):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        # 挂起的 (模拟超时的) 连接不会自己结束
+        for task in list(self._handlers):
+            task.cancel()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                keep_alive = True
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    if line.lower().startswith(b"connection:") and b"close" in line.lower():
+                        keep_alive = False
+                self.requests += 1
+                status, headers, body, delay = self._response(request_line)
+                if status is None:
+                    await asyncio.sleep(3600)
+                    return
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                head = [f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}",
+                        f"Content-Length: {len(body)}"]
+                head += [f"{k}: {v}" for k, v in headers.items()]
+                if not keep_alive:
+                    head.append("Connection: close")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        except asyncio.CancelledError:
+            # close() 取消挂起的连接；吞掉取消，避免 asyncio 把它当作回调异常记录
+            return
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    def _response(self, request_line: bytes) -> tuple[int | None, dict, bytes, float]:
+        try:
+            path = urlsplit(request_line.split()[1].decode("latin-1")).path
+            index = int(path.split("/")[2])
+            entry = self.entries[index]
+        except (IndexError, ValueError):
+            return 404, {}, b"", 0.0
+        roll = self._rnd.random()
+        if roll < self.timeout_rate:
+            return None, {}, b"", 0.0
+        delay = entry.get("latency", 0.0) * self.latency_scale
+        if roll < self.timeout_rate + self.error_rate or not entry.get("status"):
+            return 500, {}, b"", delay
+        return entry["status"], entry.get("headers", {}), entry["_body"], delay
+
+
+# ---------- benchmark ----------
+
+def _replay_specs(server: ReplayServer, scale: int, timeout: float) -> list[SourceSpec]:
+    """Registry specs pointed at the stand-in server, multiplied ``scale`` times."""
+    specs = []
+    for copy in range(scale):
+        for index, entry in enumerate(server.entries):
+            spec = registry.get(entry["name"]) or SourceSpec(name=entry["name"], url=entry["url"], label=entry["name"])
+            name = entry["name"] if copy == 0 else f"{entry['name']}#{copy}"
+            specs.append(dataclasses.replace(spec, name=name, url=server.url(index, copy), timeout=timeout))
+    return specs
+
+
+def _item_memory(bodies: list[tuple[SourceSpec, bytes]], now: datetime) -> int:
+    """Bytes held per parsed item (tracemalloc, measured outside the timed stages)."""
+    tracemalloc.start()
+    try:
+        items = []
+        for spec, body in bodies:
+            items.extend(_parse_feed(body, spec, now=now)[0])
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(size / len(items)) if items else 0
+
+
+async def _watch_loop_lag(samples: list[float], interval: float = 0.005):
+    """Record how late the event loop wakes up from short sleeps (time it was blocked)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        t = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - t - interval)
+
+
+async def _run_once(specs: list[SourceSpec], now: datetime, max_items: int, per_host: int) -> dict:
+    timings = {}
+    pool = HttpPool(per_host=per_host, host_limits={}, http2=False)
+    try:
+        # fetch: 全部源并发请求 (走连接池)
+        t = time.perf_counter()
+        responses = await asyncio.gather(
+            *(pool.get(s.url, timeout=s.timeout, headers=FETCH_HEADERS) for s in specs),
+            return_exceptions=True,
+        )
+        timings["fetch"] = time.perf_counter() - t
+        bodies = [(s, r.content) for s, r in zip(specs, responses)
+                  if not isinstance(r, BaseException) and r.status_code == 200]
+
+        t = time.perf_counter()
+        items = []
+        for spec, body in bodies:
+            items.extend(_parse_feed(body, spec, now=now)[0])
+        timings["parse"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        ordered = _sort_items(items)
+        timings["sort"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        top = TopStories(max_items, now=now)
+        for it in ordered:
+            top.add(it)
+        picked = top.result()
+        timings["filter"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        lines = [_render_line(it) for it in picked]
+        timings["render"] = time.perf_counter() - t
+
+        # 端到端：与 aggregate_free_news 相同的流式路径 (边到边解析、增量 top-k)
+        snapshot = FeedSnapshot(ttl=0, cache=None, pool=pool, health=None, now=now)
+        lags: list[float] = []
+        watcher = asyncio.create_task(_watch_loop_lag(lags))
+        t = time.perf_counter()
+        top = TopStories(max_items, now=now)
+        await _stream_into(top, snapshot, specs)
+        [_render_line(it) for it in top.result()]
+        timings["end_to_end"] = time.perf_counter() - t
+        watcher.cancel()
+    finally:
+        await pool.aclose()
+    return {"timings": timings, "items": len(items), "picked": len(lines), "ok": len(bodies),
+            "bytes_per_item": _item_memory(bodies, now), "loop_lag": max(lags, default=0.0)}
+
+
+async def run(archive: dict, scales: list[int], repeat: int = 3, max_items: int = 20,
+              per_host: int = 64, timeout: float = 10.0, **server_opts) -> dict:
+    """Benchmark every scale ``repeat`` times; report the median of each stage."""
+    server = ReplayServer(archive, **server_opts)
+    await server.start()
+    now = datetime.fromtimestamp(archive["recorded_at"], timezone.utc)
+    report = {}
+    try:
+        for scale in scales:
+            specs = _replay_specs(server, scale, timeout)
+            runs = [await _run_once(specs, now, max_items, per_host) for _ in range(repeat)]
+            stages = {k: statistics.median(r["timings"][k] for r in runs) for k in STAGES}
+            last = runs[-1]
+            report[f"{scale}x"] = {
+                "sources": len(specs),
+                "ok": last["ok"],
+                "items": last["items"],
+                "picked": last["picked"],
+                "stages": {k: round(v, 5) for k, v in stages.items()},
+                "items_per_s": round(last["items"] / max(stages["end_to_end"], 1e-9)),
+                "bytes_per_item": last["bytes_per_item"],
+                "loop_lag_ms": round(statistics.median(r["loop_lag"] for r in runs) * 1000, 1),
+                "sources_per_s": round(len(specs) / max(stages["end_to_end"], 1e-9)),
+            }
+    finally:
+        await server.close()
+        parse_pool.shutdown()
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float, floor: float = 0.002) -> list[str]:
+    """Stages slower than the baseline by more than ``tolerance`` (ignoring sub-``floor`` s noise)."""
+    failures = []
+    for scale, result in report.items():
+        base = baseline.get(scale)
+        if not base:
+            continue
+        for stage, value in result["stages"].items():
+            before = base["stages"].get(stage)
+            if before is None or value < floor:
+                continue
+            if value > before * (1 + tolerance):
+                failures.append(f"{scale} {stage}: {value:.4f}s vs baseline {before:.4f}s "
+                                f"(+{(value / max(before, 1e-9) - 1):.0%})")
+    return failures
+
+
+def _print_report(report: dict):
+    print(f"{'scale':>6} {'sources':>8} {'items':>7} " + " ".join(f"{s:>11}" for s in STAGES) + f" {'items/s':>9} {'B/item':>7} {'loop lag':>9}")
+    for scale, r in report.items():
+        cells = " ".join(f"{r['stages'][s] * 1000:>9.1f}ms" for s in STAGES)
+        print(f"{scale:>6} {r['sources']:>8} {r['items']:>7} {cells} {r['items_per_s']:>9} "
+              f"{r.get('bytes_per_item', 0):>7} {r.get('loop_lag_ms', 0):>7.1f}ms")
+
+
+async def _serve(archive: dict, port: int, **server_opts):
+    server = ReplayServer(archive, **server_opts)
+    await server.start(port)
+    for index, entry in enumerate(server.entries):
+        print(f"{server.url(index)}  <- {entry['name']}")
+    print(f"Serving {len(server.entries)} recorded sources on port {server.port} (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m opennews_mcp.rss_bench", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_record = sub.add_parser("record", help="capture live responses of every source")
+    p_record.add_argument("--archive", type=Path, default=DEFAULT_ARCHIVE)
+    p_record.add_argument("--category", default="all")
+
+    def server_args(p):
+        p.add_argument("--archive", type=Path, default=DEFAULT_ARCHIVE)
+        p.add_argument("--latency-scale", type=float, default=0.0, help="multiply recorded latency (0 = instant)")
+        p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+        p.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests never answered")
+
+    p_serve = sub.add_parser("serve", help="serve an archive from a local stand-in server")
+    server_args(p_serve)
+    p_serve.add_argument("--port", type=int, default=8765)
+
+    p_run = sub.add_parser("run", help="benchmark the aggregator against the archive")
+    server_args(p_run)
+    p_run.add_argument("--scales", default="1,10,100", help="source count multipliers, e.g. 1,10,100")
+    p_run.add_argument("--repeat", type=int, default=3)
+    p_run.add_argument("--max-items", type=int, default=20)
+    p_run.add_argument("--per-host", type=int, default=64, help="concurrent requests to the stand-in server")
+    p_run.add_argument("--timeout", type=float, default=10.0, help="per-request timeout for replayed sources")
+    p_run.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE, type=Path,
+                       help="fail if slower than this baseline")
+    p_run.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    p_run.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, type=Path)
+    p_run.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        sources = registry.for_category(args.category)
+        archive = asyncio.run(record(args.archive, sources))
+        ok = sum(1 for e in archive["sources"] if e.get("status") == 200)
+        print(f"Recorded {ok}/{len(sources)} sources into {args.archive}")
+        return 0
+
+    if not args.archive.exists():
+        print(f"No archive at {args.archive}; run `record` first.", file=sys.stderr)
+        return 2
+    archive = load_archive(args.archive)
+    server_opts = {"latency_scale": args.latency_scale, "error_rate": args.error_rate,
+                   "timeout_rate": args.timeout_rate}
+
+    if args.command == "serve":
+        try:
+            asyncio.run(_serve(archive, args.port, **server_opts))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    scales = [int(x) for x in args.scales.split(",") if x.strip()]
+    report = asyncio.run(run(archive, scales, repeat=args.repeat, max_items=args.max_items,
+                             per_host=args.per_host, timeout=args.timeout, **server_opts))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        if not args.baseline.exists():
+            print(f"No baseline at {args.baseline}", file=sys.stderr)
+            return 2
+        failures = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        if failures:
+            print("Performance regression:", *failures, sep="\n  ")
+            return 1
+        print(f"No regression against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    # 每个请求一行的 httpx 日志会淹没报告
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    sys.exit(main())
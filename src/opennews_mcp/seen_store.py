@@ -0,0 +1,186 @@
+"""Persistent seen-item store shared by every delivery pipeline.
+
+The RSS matrix, the cron job and the WebSocket monitor all consult the same
+SQLite file before pushing an item to Telegram, so a headline is delivered
+once no matter which pipeline (or which run) sees it first.
+
+Each item is identified by up to three 64-bit keys: its upstream id, its
+normalized link and its normalized title. An item counts as seen if any of
+its keys is. Keys are stored as SQLite integer primary keys (a rowid lookup,
+no secondary index on the hot path) with an expiry timestamp; writes are
+buffered and flushed in batches, and expired rows are purged periodically.
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from opennews_mcp.config import CACHE_DIR, SEEN_TTL_HOURS
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+# 标题太短时 (如 "Breaking") 不作为去重依据，避免误杀
+_MIN_TITLE_LEN = 16
+
+
+def normalize_title(title: str) -> str:
+    return _NON_WORD.sub(" ", (title or "").casefold()).strip()
+
+
+def normalize_link(link: str) -> str:
+    """Drop scheme, ``www.``, fragments, tracking params and trailing slashes."""
+    link = (link or "").strip()
+    if not link:
+        return ""
+    try:
+        parts = urlsplit(link)
+    except ValueError:
+        return link.lower()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")
+    ))
+    out = host + parts.path.rstrip("/")
+    return f"{out}?{query}" if query else out
+
+
+def _hash64(kind: str, value: str) -> int:
+    digest = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def item_keys(title: str = "", link: str = "", item_id=None) -> list[int]:
+    """Hash keys identifying an item (id, normalized link, normalized title)."""
+    keys = []
+    if item_id not in (None, ""):
+        keys.append(_hash64("id", str(item_id)))
+    norm_link = normalize_link(link)
+    if norm_link:
+        keys.append(_hash64("link", norm_link))
+    norm_title = normalize_title(title)
+    if len(norm_title) >= _MIN_TITLE_LEN:
+        keys.append(_hash64("title", norm_title))
+    return keys
+
+
+class SeenStore:
+    """Disk-backed set of item keys with TTL expiry and batched writes."""
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = SEEN_TTL_HOURS * 3600,
+        batch_size: int = 256,
+        flush_interval: float = 5.0,
+        purge_interval: float = 3600.0,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        self._pending: dict[int, int] = {}
+        self._last_flush = time.monotonic()
+        self._last_purge = 0.0
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS seen (k INTEGER PRIMARY KEY, expires INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS seen_expires ON seen(expires)")
+        return self._db
+
+    def contains(self, keys: list[int]) -> bool:
+        """True if any of ``keys`` was marked and has not expired."""
+        if not keys:
+            return False
+        now = int(time.time())
+        for k in keys:
+            if self._pending.get(k, 0) > now:
+                return True
+        db = self._conn()
+        for k in keys:
+            row = db.execute("SELECT expires FROM seen WHERE k = ?", (k,)).fetchone()
+            if row is not None and row[0] > now:
+                return True
+        return False
+
+    def seen_keys(self, keys: list[int]) -> set[int]:
+        """The subset of ``keys`` marked and not expired, in one query per 500 keys."""
+        now = int(time.time())
+        found = {k for k in keys if self._pending.get(k, 0) > now}
+        rest = list({k for k in keys if k not in found})
+        if not rest:
+            return found
+        db = self._conn()
+        for i in range(0, len(rest), 500):
+            chunk = rest[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = db.execute(f"SELECT k FROM seen WHERE k IN ({marks}) AND expires > ?", (*chunk, now))
+            found.update(k for (k,) in rows)
+        return found
+
+    def add(self, keys: list[int]):
+        """Mark keys as seen. Written to disk in batches (see ``flush``)."""
+        expires = int(time.time() + self.ttl)
+        for k in keys:
+            self._pending[k] = expires
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def is_seen(self, title: str = "", link: str = "", item_id=None) -> bool:
+        return self.contains(item_keys(title, link, item_id))
+
+    def mark(self, title: str = "", link: str = "", item_id=None):
+        self.add(item_keys(title, link, item_id))
+
+    def check_and_mark(self, title: str = "", link: str = "", item_id=None) -> bool:
+        """Return True if the item was already seen; otherwise mark it and return False."""
+        keys = item_keys(title, link, item_id)
+        if self.contains(keys):
+            return True
+        self.add(keys)
+        return False
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            db = self._conn()
+            db.execute("BEGIN")
+            db.executemany("INSERT OR REPLACE INTO seen (k, expires) VALUES (?, ?)", pending.items())
+            if time.monotonic() - self._last_purge >= self.purge_interval:
+                db.execute("DELETE FROM seen WHERE expires <= ?", (int(time.time()),))
+                self._last_purge = time.monotonic()
+            db.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.warning("Failed to flush seen store %s: %s", self.path, e)
+            if self._db is not None and self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            # 保留未写入的键，下次再试
+            pending.update(self._pending)
+            self._pending = pending
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+seen_store = SeenStore(CACHE_DIR / "seen.sqlite3")
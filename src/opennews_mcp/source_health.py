@@ -0,0 +1,233 @@
+"""Persistent per-source health model for the RSS aggregator.
+
+Every fetch records its latency and outcome (ok / empty / error). From a
+sliding window of recent fetches we derive latency percentiles, error and
+empty-parse rates, and:
+
+* an adaptive timeout per source: the observed p95 with some headroom,
+  never above the timeout configured in sources.json;
+* a circuit breaker: after ``threshold`` consecutive failures the source is
+  skipped for a cooldown, then a single half-open probe decides whether it
+  closes again or stays open with a doubled cooldown (up to a day). Dead
+  feeds thus cost one request every few hours instead of a timeout per run.
+
+The model is saved next to the HTTP cache so it carries over between the
+cron runs of the matrix.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from opennews_mcp.config import CACHE_DIR, SOURCE_BREAKER_COOLDOWN, SOURCE_BREAKER_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+WINDOW = 50
+# 样本太少时不调整超时
+MIN_SAMPLES = 5
+MIN_TIMEOUT = 2.0
+TIMEOUT_HEADROOM = 1.5
+MAX_COOLDOWN = 24 * 3600.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+OK, EMPTY, ERROR = "o", "e", "x"
+
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100) of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+@dataclass
+class SourceHealth:
+    """Sliding-window statistics and breaker state for one source."""
+    latencies: deque = field(default_factory=lambda: deque(maxlen=WINDOW))
+    outcomes: deque = field(default_factory=lambda: deque(maxlen=WINDOW))
+    failures: int = 0
+    state: str = CLOSED
+    open_until: float = 0.0
+    cooldown: float = 0.0
+    probing: bool = False
+    wasted: float = 0.0
+    last_error: str = ""
+
+    def rate(self, outcome: str) -> float:
+        return self.outcomes.count(outcome) / len(self.outcomes) if self.outcomes else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "lat": [round(x, 3) for x in self.latencies],
+            "out": "".join(self.outcomes),
+            "failures": self.failures,
+            "state": self.state,
+            "open_until": self.open_until,
+            "cooldown": self.cooldown,
+            "wasted": round(self.wasted, 3),
+            "last_error": self.last_error,
+        }
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "SourceHealth":
+        h = cls()
+        h.latencies.extend(raw.get("lat", []))
+        h.outcomes.extend(raw.get("out", ""))
+        h.failures = raw.get("failures", 0)
+        # 进程重启时进行中的探测已不存在，按 open 处理 (到期后再探测)
+        h.state = OPEN if raw.get("state") in (OPEN, HALF_OPEN) else CLOSED
+        h.open_until = raw.get("open_until", 0.0)
+        h.cooldown = raw.get("cooldown", 0.0)
+        h.wasted = raw.get("wasted", 0.0)
+        h.last_error = raw.get("last_error", "")
+        return h
+
+
+class SourceHealthTracker:
+    """Health of every source, with adaptive timeouts and circuit breaking."""
+
+    def __init__(
+        self,
+        path: Path,
+        threshold: int = SOURCE_BREAKER_THRESHOLD,
+        cooldown: float = SOURCE_BREAKER_COOLDOWN,
+    ):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._sources: dict[str, SourceHealth] | None = None
+        self._dirty = False
+        self.skipped = 0
+
+    def _load(self) -> dict[str, SourceHealth]:
+        if self._sources is None:
+            self._sources = {}
+            if self.path.exists():
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        raw = json.load(f)
+                    self._sources = {name: SourceHealth.from_dict(h) for name, h in raw.items()}
+                except Exception as e:
+                    logger.warning("Ignoring unreadable source health file %s: %s", self.path, e)
+        return self._sources
+
+    def get(self, name: str) -> SourceHealth:
+        sources = self._load()
+        h = sources.get(name)
+        if h is None:
+            h = sources[name] = SourceHealth()
+        return h
+
+    def timeout_for(self, name: str, configured: float) -> float:
+        """Timeout for the next fetch: p95 latency with headroom, capped by ``configured``."""
+        h = self.get(name)
+        if len(h.latencies) < MIN_SAMPLES:
+            return configured
+        return min(configured, max(MIN_TIMEOUT, percentile(h.latencies, 95) * TIMEOUT_HEADROOM))
+
+    def allow(self, name: str) -> bool:
+        """Whether to fetch the source now; an expired open circuit admits one probe."""
+        h = self.get(name)
+        if h.state == CLOSED:
+            return True
+        if h.state == OPEN and time.time() >= h.open_until:
+            h.state = HALF_OPEN
+            h.probing = False
+        if h.state == HALF_OPEN and not h.probing:
+            h.probing = True
+            return True
+        self.skipped += 1
+        return False
+
+    def release(self, name: str):
+        """The fetch admitted by ``allow`` was abandoned (cancelled): let the next one probe."""
+        self.get(name).probing = False
+
+    def record(self, name: str, latency: float, items: int, error: str | None = None):
+        """Record the outcome of one fetch and update the breaker."""
+        h = self.get(name)
+        # 超时也记为延迟样本，慢源的 p95 会随之上升而不是一直卡在超时上
+        h.latencies.append(latency)
+        self._dirty = True
+        if error is None:
+            h.outcomes.append(OK if items else EMPTY)
+            h.failures = 0
+            if h.state != CLOSED:
+                logger.info("Source %s recovered, closing circuit", name)
+            h.state, h.probing, h.cooldown = CLOSED, False, 0.0
+            return
+
+        h.outcomes.append(ERROR)
+        h.failures += 1
+        h.wasted += latency
+        h.last_error = error[:200]
+        if h.state == HALF_OPEN:
+            # 探测失败：重新打开，冷却时间翻倍
+            self._open(name, h, min(h.cooldown * 2 or self.cooldown, MAX_COOLDOWN))
+        elif h.state == CLOSED and h.failures >= self.threshold:
+            self._open(name, h, self.cooldown)
+
+    def _open(self, name: str, h: SourceHealth, cooldown: float):
+        h.state, h.probing, h.cooldown = OPEN, False, cooldown
+        h.open_until = time.time() + cooldown
+        logger.warning("Source %s failed %d times in a row, skipping it for %.0fs (%s)",
+                       name, h.failures, cooldown, h.last_error)
+
+    def save(self):
+        """Write the model to disk if anything changed (atomic replace)."""
+        if not self._dirty or self._sources is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({name: h.to_dict() for name, h in self._sources.items()}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning("Failed to save source health %s: %s", self.path, e)
+
+    def report(self, timeouts: dict[str, float] | None = None) -> list[dict]:
+        """Per-source health, the sources wasting the most time on failures first."""
+        timeouts = timeouts or {}
+        now = time.time()
+        rows = []
+        for name, h in self._load().items():
+            row = {
+                "source": name,
+                "state": h.state,
+                "samples": len(h.outcomes),
+                "p50": round(percentile(h.latencies, 50), 3),
+                "p95": round(percentile(h.latencies, 95), 3),
+                "error_rate": round(h.rate(ERROR), 3),
+                "empty_rate": round(h.rate(EMPTY), 3),
+                "consecutive_failures": h.failures,
+                "wasted_seconds": round(h.wasted, 1),
+                "last_error": h.last_error,
+            }
+            if name in timeouts:
+                row["timeout"] = round(self.timeout_for(name, timeouts[name]), 2)
+            if h.state != CLOSED:
+                row["retry_in"] = max(0, round(h.open_until - now))
+            rows.append(row)
+        rows.sort(key=lambda r: (-r["wasted_seconds"], -r["error_rate"], r["source"]))
+        return rows
+
+    def stats(self) -> dict:
+        sources = self._load().values()
+        return {
+            "tracked": len(self._load()),
+            "open": sum(h.state != CLOSED for h in sources),
+            "skipped": self.skipped,
+        }
+
+
+source_health = SourceHealthTracker(CACHE_DIR / "source_health.json")
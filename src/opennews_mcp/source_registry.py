@@ -0,0 +1,151 @@
+"""Declarative registry of RSS/JSON sources for the aggregator.
+
+Sources are described in ``sources.json`` at the project root (override with
+``OPENNEWS_SOURCES_FILE`` or ``sources_file`` in config.json). Each entry
+lists the source's categories, parser (and field mapping for JSON APIs),
+priority, timeout and polling settings; the ``keywords`` section holds per-category keyword weights.
+Category -> sources and source -> rank lookups and the keyword automaton
+are built once per load, and ``maybe_reload`` picks up edits to the file in
+long-running processes.
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from opennews_mcp.config import SOURCES_FILE
+from opennews_mcp.feed_parsers import JsonMapping
+from opennews_mcp.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0
+# 未在注册表中出现的来源 / 没有来源时的排名
+UNKNOWN_RANK = 8
+EMPTY_RANK = 9
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """One feed from the registry."""
+    name: str
+    url: str
+    label: str
+    parser: str = "rss"
+    categories: tuple[str, ...] = ()
+    priority: int = UNKNOWN_RANK
+    timeout: float = DEFAULT_TIMEOUT
+    # 固定轮询间隔 (秒)；None 表示由调度器按发布频率自适应
+    poll_interval: float | None = None
+    fast_lane: bool = False
+    # parser 为 json 时的字段映射 (加载时预编译)
+    mapping: JsonMapping | None = None
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "SourceSpec":
+        return cls(
+            name=raw["name"],
+            url=raw["url"],
+            label=raw.get("label") or raw["name"],
+            parser=raw.get("parser", "rss"),
+            categories=tuple(raw.get("categories", ())),
+            priority=int(raw.get("priority", UNKNOWN_RANK)),
+            timeout=float(raw.get("timeout", DEFAULT_TIMEOUT)),
+            poll_interval=raw.get("poll_interval"),
+            fast_lane=bool(raw.get("fast_lane", False)),
+            mapping=JsonMapping.from_dict(raw["mapping"]) if raw.get("mapping") else None,
+        )
+
+
+class SourceRegistry:
+    """Sources loaded from a JSON file, with precomputed lookup tables."""
+
+    def __init__(self, path: Path, check_interval: float = 5.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.sources: list[SourceSpec] = []
+        self.default_category = "crypto"
+        self._by_name: dict[str, SourceSpec] = {}
+        self._by_category: dict[str, list[SourceSpec]] = {}
+        self._rank: dict[str, int] = {}
+        self.matcher = KeywordMatcher({})
+        self._mtime = 0.0
+        self._last_check = 0.0
+        self.version = 0
+        self.load()
+
+    def load(self):
+        """(Re)load the registry file and rebuild the lookup tables."""
+        mtime = self.path.stat().st_mtime
+        with open(self.path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        sources = [SourceSpec.from_dict(raw) for raw in doc.get("sources", [])]
+        matcher = KeywordMatcher(doc.get("keywords", {}))
+
+        by_category: dict[str, list[SourceSpec]] = {}
+        rank: dict[str, int] = {}
+        for spec in sources:
+            for cat in spec.categories:
+                by_category.setdefault(cat, []).append(spec)
+            # 条目里的 source 字段用的是 label (如 JSON 源的 "Jin10")
+            rank[spec.name] = spec.priority
+            rank.setdefault(spec.label, spec.priority)
+
+        self.sources = sources
+        self.default_category = doc.get("default_category", "crypto")
+        self._by_name = {s.name: s for s in sources}
+        self._by_category = by_category
+        self._rank = rank
+        self.matcher = matcher
+        self._mtime = mtime
+        self._last_check = time.monotonic()
+        self.version += 1
+
+    def maybe_reload(self) -> bool:
+        """Reload if the file changed (checked at most every ``check_interval`` s)."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            self.load()
+        except Exception as e:
+            # 保留旧配置，等文件再次修改后再尝试加载
+            logger.error("Failed to reload source registry %s: %s", self.path, e)
+            self._mtime = mtime
+            return False
+        logger.info("Reloaded source registry %s (%d sources)", self.path, len(self.sources))
+        return True
+
+    def get(self, name: str) -> SourceSpec | None:
+        return self._by_name.get(name)
+
+    def categories(self) -> list[str]:
+        return sorted(self._by_category)
+
+    def for_category(self, category: str) -> list[SourceSpec]:
+        """Sources for a category; ``all`` is every source, unknown categories fall back to the default one."""
+        if category == "all":
+            return self.sources
+        selected = self._by_category.get(category)
+        if selected is None:
+            selected = self._by_category.get(self.default_category, [])
+        # 分类为空时回落到全量
+        return selected or self.sources
+
+    def rank(self, source: str) -> int:
+        if not source:
+            return EMPTY_RANK
+        return self._rank.get(source, UNKNOWN_RANK)
+
+
+registry = SourceRegistry(SOURCES_FILE)
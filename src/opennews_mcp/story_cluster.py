@@ -0,0 +1,158 @@
+"""Near-duplicate story clustering across sources.
+
+The same event reaches us from Reuters, AP, CNN and Jin10 with slightly
+different headlines. Each headline is reduced to a token set (English words
+plus CJK character bigrams) and a MinHash signature; an LSH index over the
+signature bands finds candidate stories in roughly constant time, and the
+exact Jaccard similarity of the token sets decides whether the item joins
+an existing story.
+"""
+
+import random
+import re
+import zlib
+from collections.abc import Callable, Iterable
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'.$%-]*")
+_CJK = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or "
+    "over says said that the their this to was were will with after amid new "
+    "breaking update live".split()
+)
+
+_PRIME = (1 << 61) - 1
+
+
+def tokens(text: str) -> frozenset[str]:
+    """English words (minus stopwords) and CJK character bigrams of ``text``."""
+    text = (text or "").casefold()
+    out = {w.strip("'.-") for w in _WORD.findall(text)}
+    out = {w for w in out if len(w) > 1 and w not in _STOPWORDS}
+    for run in _CJK.findall(text):
+        if len(run) == 1:
+            out.add(run)
+        else:
+            out.update(run[i:i + 2] for i in range(len(run) - 1))
+    return frozenset(out)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class StoryIndex:
+    """Incremental MinHash-LSH index assigning each text to a story id.
+
+    ``bands * rows`` hash permutations are computed per text. The default
+    16 bands of 2 rows give high recall down to ~0.25 similarity; candidates
+    are then confirmed with the exact Jaccard ``threshold``. Only one text
+    per story is indexed, its representative: the first one unless
+    ``promote`` picks another, so later members are compared with it.
+    ``remove`` forgets a story, after which its near-duplicates start a new
+    one; the index then holds only the stories not removed.
+    """
+
+    def __init__(self, threshold: float = 0.5, bands: int = 16, rows: int = 2, seed: int = 6551):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rnd = random.Random(seed)
+        n = bands * rows
+        self._perms = [(rnd.randrange(1, _PRIME), rnd.randrange(0, _PRIME)) for _ in range(n)]
+        self._buckets: list[dict[tuple, list[int]]] = [{} for _ in range(bands)]
+        # 只保存各故事代表文本的 doc -> (词集, story)；其余成员比对后即丢弃
+        self._docs: dict[int, tuple[frozenset[str], int]] = {}
+        # story -> (代表文本的 doc, 其 LSH 桶键)
+        self._reps: dict[int, tuple[int, list[tuple]]] = {}
+        # 最近一次 add 的 (doc, 词集, 桶键, story)，供 promote 使用
+        self._last: tuple = (-1, frozenset(), [], -1)
+        self._doc_count = 0
+        self.story_count = 0
+
+    def _signature(self, toks: frozenset[str]) -> list[int]:
+        hashes = [zlib.crc32(t.encode("utf-8")) for t in toks]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def add(self, text: str) -> int:
+        """Index ``text`` and return its story id (an existing one if it is a near-duplicate)."""
+        toks = tokens(text)
+        doc = self._doc_count
+        self._doc_count += 1
+        if not toks:
+            story = self.story_count
+            self.story_count += 1
+            self._last = (-1, toks, [], story)
+            return story
+
+        sig = self._signature(toks)
+        keys = [tuple(sig[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+        best, best_sim = None, self.threshold
+        checked = set()
+        for band, key in enumerate(keys):
+            for other in self._buckets[band].get(key, ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                sim = jaccard(toks, self._docs[other][0])
+                if sim >= best_sim:
+                    best, best_sim = other, sim
+
+        if best is not None:
+            story = self._docs[best][1]
+            self._last = (doc, toks, keys, story)
+            return story
+
+        # 只索引每个故事的代表，桶的大小随故事数而不是条目数增长
+        story = self.story_count
+        self.story_count += 1
+        self._last = (doc, toks, keys, story)
+        self._index(story, doc, toks, keys)
+        return story
+
+    def _index(self, story: int, doc: int, toks: frozenset[str], keys: list[tuple]):
+        self._docs[doc] = (toks, story)
+        self._reps[story] = (doc, keys)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(doc)
+
+    def remove(self, story: int):
+        """Stop matching texts against ``story``."""
+        rep = self._reps.pop(story, None)
+        if rep is None:
+            return
+        doc, keys = rep
+        del self._docs[doc]
+        for band, key in enumerate(keys):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.remove(doc)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def promote(self, story: int):
+        """Make the text passed to the last ``add`` (a member of ``story``) its representative."""
+        doc, toks, keys, last_story = self._last
+        if doc < 0 or last_story != story or not keys or story not in self._reps:
+            return
+        self.remove(story)
+        self._index(story, doc, toks, keys)
+
+
+def cluster_items(items: Iterable, text: Callable = lambda it: it.title, threshold: float = 0.5) -> list[list]:
+    """Group near-duplicate items into stories, keeping first-seen order.
+
+    The first item of each story is its representative, so callers should
+    pass items sorted best-first.
+    """
+    index = StoryIndex(threshold=threshold)
+    stories: list[list] = []
+    for it in items:
+        story = index.add(text(it))
+        if story == len(stories):
+            stories.append([it])
+        else:
+            stories[story].append(it)
+    return stories
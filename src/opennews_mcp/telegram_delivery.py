@@ -0,0 +1,345 @@
+"""One Telegram delivery service shared by every bot in the project.
+
+Telegram allows roughly 30 messages per second per bot, one per second per
+chat and 20 per minute per group or channel, and answers anything faster
+with 429 and a ``retry_after``. The aggregator digests, the cron job, the
+WebSocket monitor, the MCP notification tool and the oracle all send
+through ``telegram_delivery.send``, which:
+
+* paces each bot and each chat with token buckets, so the bots of one
+  matrix run push at the allowed rate instead of being throttled;
+* sends to a chat one message at a time, in call order, so a digest split
+  over several messages arrives in order even when a send is retried;
+* on 429 pauses only the affected chat for ``retry_after`` and retries,
+  retries 5xx / network errors with backoff, and falls back to plain text
+  when Telegram cannot parse the Markdown;
+* keeps counters, the current queue depth and send latency percentiles.
+
+``pack_messages`` bin-packs rendered items into as few messages as fit
+under Telegram's 4096-character limit (counted in UTF-16 code units, as
+Telegram does), in order and without splitting an item, and
+``send_packed`` sends the packets; a digest of twenty stories is then one
+or two API calls instead of twenty.
+
+Requests go through the shared ``http_pool`` with its own 429 retry turned
+off, so a throttled chat does not stall the other chats on the same host.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import httpx
+
+from opennews_mcp.config import TELEGRAM_BOT_RATE, TELEGRAM_CHAT_RATE, TELEGRAM_GROUP_RATE
+from opennews_mcp.http_pool import HttpPool, http_pool, retry_after
+from opennews_mcp.source_health import percentile
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://api.telegram.org/bot{token}/{method}"
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0
+# 超过这个等待时间的 retry_after 不再重试，直接失败
+MAX_RETRY_AFTER = 120.0
+SEND_TIMEOUT = 15.0
+# sendMessage 的文本上限 (UTF-16 码元)
+MESSAGE_LIMIT = 4096
+CLIP_MARKER = "\n..."
+
+
+class TokenBucket:
+    """Token bucket with reservations: ``reserve`` takes a token and says how long to wait for it."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now: float) -> float:
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        self.tokens -= 1
+        # 令牌数是 updated 时刻的值；block 之后 updated 在未来
+        wait = self.updated - now + (-self.tokens / self.rate if self.tokens < 0 else 0.0)
+        return max(wait, self.blocked_until - now)
+
+    def block(self, until: float):
+        """Hold every reservation until ``until`` (Telegram's retry_after): one send then, refilling from empty."""
+        if until > self.blocked_until:
+            self.blocked_until = until
+            self.tokens = min(self.tokens, 1.0)
+            self.updated = max(self.updated, until)
+
+
+@dataclass
+class Delivery:
+    """Outcome of one ``send``."""
+    ok: bool
+    status: int = 0
+    error: str = ""
+    message_id: int | None = None
+    attempts: int = 0
+
+
+@dataclass
+class Packet:
+    """One message built by ``pack_messages``: its text and the indices of the parts in it."""
+    text: str
+    parts: range
+
+
+def utf16_len(text: str) -> int:
+    """Length as Telegram counts it: UTF-16 code units (emoji and other astral characters count 2)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def clip(text: str, limit: int = MESSAGE_LIMIT, marker: str = CLIP_MARKER) -> str:
+    """Cut ``text`` to at most ``limit`` UTF-16 code units, ending with ``marker`` when cut."""
+    if utf16_len(text) <= limit:
+        return text
+    budget = limit - utf16_len(marker)
+    data = text.encode("utf-16-le")[:max(0, budget) * 2]
+    # 不要截断在代理对中间
+    return data.decode("utf-16-le", errors="ignore") + marker
+
+
+def pack_messages(
+    parts: list[str],
+    limit: int = MESSAGE_LIMIT,
+    header: str = "",
+    footer: str = "",
+    sep: str = "\n",
+) -> list[Packet]:
+    """Bin-pack ``parts`` into as few messages of at most ``limit`` as possible.
+
+    Parts keep their order and are never split across messages; every
+    message is framed by ``header`` and ``footer`` (joined with ``sep``).
+    Filling each message before starting the next is optimal when the order
+    is fixed. A part too long for a message of its own is clipped.
+    """
+    sep_len = utf16_len(sep)
+    frame = (utf16_len(header) + sep_len if header else 0) + (utf16_len(footer) + sep_len if footer else 0)
+    room = limit - frame
+    if room <= 0:
+        raise ValueError(f"header and footer leave no room for content under {limit}")
+
+    packets: list[Packet] = []
+    chunk: list[str] = []
+    start = used = 0
+
+    def close(end: int):
+        body = sep.join(chunk)
+        text = sep.join(x for x in (header, body, footer) if x)
+        packets.append(Packet(text, range(start, end)))
+
+    for i, part in enumerate(parts):
+        size = utf16_len(part)
+        if size > room:
+            part = clip(part, room)
+            size = utf16_len(part)
+        need = size + (sep_len if chunk else 0)
+        if chunk and used + need > room:
+            close(i)
+            chunk, start, used = [], i, 0
+            need = size
+        chunk.append(part)
+        used += need
+    if chunk:
+        close(len(parts))
+    return packets
+
+
+def _bot_id(token: str) -> str:
+    # 只用 token 中冒号前的 bot id 做键和日志，不泄露 token
+    return token.split(":", 1)[0]
+
+
+def _is_group(chat_id) -> bool:
+    # 群组 / 频道的 id 是负数，频道也可以用 @username
+    chat = str(chat_id)
+    return chat.startswith("-") or chat.startswith("@")
+
+
+class TelegramDelivery:
+    """Rate-limited, ordered, retrying ``sendMessage`` for any number of bots and chats."""
+
+    def __init__(
+        self,
+        pool: HttpPool = http_pool,
+        bot_rate: float = TELEGRAM_BOT_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        group_rate_per_minute: float = TELEGRAM_GROUP_RATE,
+    ):
+        self.pool = pool
+        self.bot_rate = bot_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate_per_minute / 60.0
+        self.group_burst = group_rate_per_minute
+        self._bots: dict[str, TokenBucket] = {}
+        self._chats: dict[tuple, TokenBucket] = {}
+        self._groups: dict[tuple, TokenBucket] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.queued = 0
+        self.max_queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.throttled = 0
+        self.retries = 0
+        self._latencies: deque = deque(maxlen=500)
+        self._waits: deque = deque(maxlen=500)
+
+    def _lock(self, key: tuple) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 锁绑定事件循环；每次 asyncio.run 都是新的循环
+            self._locks.clear()
+            self._loop = loop
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def _reserve(self, bot: str, key: tuple, group: bool) -> float:
+        now = time.monotonic()
+        bot_bucket = self._bots.get(bot)
+        if bot_bucket is None:
+            bot_bucket = self._bots[bot] = TokenBucket(self.bot_rate, self.bot_rate)
+        chat_bucket = self._chats.get(key)
+        if chat_bucket is None:
+            chat_bucket = self._chats[key] = TokenBucket(self.chat_rate)
+        wait = max(bot_bucket.reserve(now), chat_bucket.reserve(now))
+        if group:
+            group_bucket = self._groups.get(key)
+            if group_bucket is None:
+                group_bucket = self._groups[key] = TokenBucket(self.group_rate, self.group_burst)
+            wait = max(wait, group_bucket.reserve(now))
+        return wait
+
+    async def send(
+        self,
+        token: str,
+        chat_id,
+        text: str,
+        parse_mode: str | None = "Markdown",
+        disable_preview: bool = True,
+        **extra,
+    ) -> Delivery:
+        """Send ``text`` to ``chat_id`` as the bot ``token``; never raises for delivery errors."""
+        if not token or not chat_id:
+            return Delivery(False, error="Telegram not configured (missing token or chat_id)")
+        bot = _bot_id(token)
+        key = (bot, str(chat_id))
+        payload = {"chat_id": chat_id, "text": text, "disable_web_page_preview": disable_preview, **extra}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+
+        started = time.monotonic()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            async with self._lock(key):
+                self._waits.append(time.monotonic() - started)
+                result = await self._deliver(token, key, payload)
+        finally:
+            self.queued -= 1
+        if result.ok:
+            self.sent += 1
+            self._latencies.append(time.monotonic() - started)
+        else:
+            self.failed += 1
+            logger.warning("Telegram send to %s via bot %s failed: %s", key[1], bot, result.error)
+        return result
+
+    async def send_packed(
+        self,
+        token: str,
+        chat_id,
+        parts: list[str],
+        header: str = "",
+        footer: str = "",
+        sep: str = "\n",
+        **kwargs,
+    ) -> list[tuple[Packet, Delivery]]:
+        """Pack ``parts`` with ``pack_messages`` and send the packets in order.
+
+        Returns each packet with its delivery, so callers can tell which
+        parts reached the chat when only some of the packets were sent.
+        """
+        out = []
+        for packet in pack_messages(parts, header=header, footer=footer, sep=sep):
+            out.append((packet, await self.send(token, chat_id, packet.text, **kwargs)))
+        return out
+
+    async def _deliver(self, token: str, key: tuple, payload: dict) -> Delivery:
+        url = API_URL.format(token=token, method="sendMessage")
+        group = _is_group(key[1])
+        result = Delivery(False)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            result.attempts = attempt
+            wait = self._reserve(key[0], key, group)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                resp = await self.pool.post(url, json=payload, timeout=SEND_TIMEOUT, retries=0)
+            except httpx.HTTPError as e:
+                result.status, result.error = 0, f"{type(e).__name__}: {e}"
+                await self._backoff(attempt)
+                continue
+
+            result.status = resp.status_code
+            try:
+                body = resp.json()
+            except ValueError:
+                body = {}
+            if resp.status_code == 200 and body.get("ok", True):
+                result.ok, result.error = True, ""
+                result.message_id = (body.get("result") or {}).get("message_id")
+                return result
+            result.error = body.get("description") or resp.text[:200]
+
+            if resp.status_code == 429:
+                self.throttled += 1
+                delay = retry_after(resp) or BACKOFF_BASE * 2 ** attempt
+                if delay > MAX_RETRY_AFTER:
+                    return result
+                # 只暂停被限流的 chat，其他 chat / bot 照常发送
+                self._chats[key].block(time.monotonic() + delay)
+                self.retries += 1
+                continue
+            if resp.status_code == 400 and "parse entities" in result.error and "parse_mode" in payload:
+                # 标题里的 * _ [ 等字符破坏了 Markdown：改为纯文本重发
+                payload = {k: v for k, v in payload.items() if k != "parse_mode"}
+                self.retries += 1
+                continue
+            if resp.status_code >= 500:
+                await self._backoff(attempt)
+                continue
+            return result
+        return result
+
+    async def _backoff(self, attempt: int):
+        if attempt < MAX_ATTEMPTS:
+            self.retries += 1
+            await asyncio.sleep(BACKOFF_BASE * 2 ** (attempt - 1))
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "latency_p50": round(percentile(self._latencies, 50), 3),
+            "latency_p95": round(percentile(self._latencies, 95), 3),
+            "queue_wait_p95": round(percentile(self._waits, 95), 3),
+        }
+
+
+telegram_delivery = TelegramDelivery()
@@ -0,0 +1,176 @@
+"""Webhook receiver for Telegram bot commands.
+
+Instead of every bot long-polling ``getUpdates``, Telegram pushes each
+update to ``<webhook_url>/telegram/<bot id>``. One small local HTTP server
+(starlette + uvicorn, both already installed with ``mcp``) receives the
+updates of any number of bots, checks the ``X-Telegram-Bot-Api-Secret-Token``
+header against the secret registered with ``setWebhook``, answers 200 right
+away and handles the update in its own task, so a slow handler never
+delays the next update and there are no idle polling requests.
+
+The server listens on ``webhook_host:webhook_port`` (127.0.0.1:8080 by
+default); Telegram only calls HTTPS URLs on ports 443, 80, 88 or 8443, so
+``webhook_url`` normally points at a reverse proxy in front of it.
+
+While a webhook is set Telegram refuses ``getUpdates`` for that bot (409),
+which breaks ``get_chat_id.py`` and any poller of the same token, so the
+webhooks are deleted again when the server stops, and polling mode deletes
+them on start (``delete_webhooks``).
+"""
+
+import asyncio
+import hmac
+import logging
+import secrets
+from collections.abc import Awaitable, Callable
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from opennews_mcp.config import (
+    TELEGRAM_WEBHOOK_HOST, TELEGRAM_WEBHOOK_PORT, TELEGRAM_WEBHOOK_SECRET, TELEGRAM_WEBHOOK_URL,
+)
+from opennews_mcp.http_pool import HttpPool, http_pool
+from opennews_mcp.telegram_delivery import API_URL, _bot_id
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# Telegram 对同一个 webhook 的最大并发连接数 (1-100)
+MAX_CONNECTIONS = 40
+
+# (bot token, update) -> 处理协程
+UpdateHandler = Callable[[str, dict], Awaitable[None]]
+
+
+async def delete_webhooks(tokens: list[str], pool: HttpPool = http_pool) -> int:
+    """Remove the webhook of each bot so ``getUpdates`` works again; returns how many succeeded."""
+    ok = 0
+    for token in dict.fromkeys(t for t in tokens if t):
+        try:
+            resp = await pool.post(API_URL.format(token=token, method="deleteWebhook"))
+            if resp.status_code == 200 and resp.json().get("ok"):
+                ok += 1
+                continue
+            logger.warning("deleteWebhook failed for bot %s: HTTP %d", _bot_id(token), resp.status_code)
+        except Exception as e:
+            logger.warning("deleteWebhook failed for bot %s: %s", _bot_id(token), e)
+    return ok
+
+
+class TelegramWebhook:
+    """One HTTP endpoint receiving the updates of several bots, one task per update."""
+
+    def __init__(
+        self,
+        tokens: list[str],
+        handler: UpdateHandler,
+        base_url: str = TELEGRAM_WEBHOOK_URL,
+        secret: str = TELEGRAM_WEBHOOK_SECRET,
+        host: str = TELEGRAM_WEBHOOK_HOST,
+        port: int = TELEGRAM_WEBHOOK_PORT,
+        pool: HttpPool = http_pool,
+    ):
+        self.bots = {_bot_id(t): t for t in tokens if t}
+        self.handler = handler
+        self.base_url = base_url.rstrip("/")
+        # setWebhook 每次启动都会重新注册，未配置时随机生成即可
+        self.secret = secret or secrets.token_urlsafe(32)
+        self.host = host
+        self.port = port
+        self.pool = pool
+        self._tasks: set[asyncio.Task] = set()
+        self.received = 0
+        self.rejected = 0
+        self.failed = 0
+        self.app = Starlette(routes=[
+            Route("/telegram/{bot}", self._receive, methods=["POST"]),
+            Route("/healthz", self._health, methods=["GET"]),
+        ])
+
+    def url_for(self, token: str) -> str:
+        return f"{self.base_url}/telegram/{_bot_id(token)}"
+
+    async def _receive(self, request: Request) -> Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            self.rejected += 1
+            return Response(status_code=403)
+        token = self.bots.get(request.path_params["bot"])
+        if token is None:
+            self.rejected += 1
+            return Response(status_code=404)
+        try:
+            update = await request.json()
+        except ValueError:
+            self.rejected += 1
+            return Response(status_code=400)
+        self.received += 1
+        # 先应答 Telegram 再处理：处理慢不会让 Telegram 重发或积压后续更新
+        self.spawn(self.handler(token, update))
+        return Response(status_code=200)
+
+    async def _health(self, request: Request) -> Response:
+        return JSONResponse(self.stats())
+
+    def spawn(self, coro: Awaitable[None]):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
+            logger.error("Telegram update handler failed: %s", task.exception())
+
+    async def register(self) -> int:
+        """Point every bot's webhook at this server; returns how many bots were registered."""
+        ok = 0
+        for bot, token in self.bots.items():
+            payload = {
+                "url": self.url_for(token),
+                "secret_token": self.secret,
+                "allowed_updates": ["message"],
+                "max_connections": MAX_CONNECTIONS,
+            }
+            try:
+                resp = await self.pool.post(API_URL.format(token=token, method="setWebhook"), json=payload)
+                body = resp.json()
+            except Exception as e:
+                logger.error("setWebhook failed for bot %s: %s", bot, e)
+                continue
+            if resp.status_code == 200 and body.get("ok"):
+                ok += 1
+            else:
+                logger.error("setWebhook failed for bot %s: %s", bot, body.get("description") or resp.status_code)
+        logger.info("Webhook registered for %d/%d bots at %s/telegram/<bot id>", ok, len(self.bots), self.base_url)
+        return ok
+
+    async def serve(self):
+        """Register the webhooks, serve until stopped, then delete the webhooks again."""
+        if not self.bots:
+            logger.warning("No bot tokens configured, webhook not started")
+            return
+        await self.register()
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", lifespan="off")
+        server = uvicorn.Server(config)
+        try:
+            await server.serve()
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            # 停止后不再接收推送：删除 webhook，让 getUpdates (get_chat_id.py、轮询模式) 恢复可用
+            removed = await delete_webhooks(list(self.bots.values()), self.pool)
+            logger.info("Webhook removed for %d/%d bots", removed, len(self.bots))
+
+    def stats(self) -> dict:
+        return {
+            "bots": len(self.bots),
+            "received": self.received,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "in_flight": len(self._tasks),
+        }
@@ -1,264 +1,489 @@
 import asyncio
-import re
+import heapq
+import itertools
+import time
 from datetime import datetime, timezone, timedelta
-from email.utils import parsedate_to_datetime
-import httpx
-from xml.etree import ElementTree as ET
 from mcp.server.fastmcp import Context
 from opennews_mcp.app import mcp
-from opennews_mcp.config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
-
-SOURCES = [
-    # Finance / Crypto (High Speed / Arbitrage)
-    ("Wallstreetcn (华尔街见闻)", "https://api.wallstreetcn.com/v2/it/articles?limit=20&category=global"),
-    ("Jin10 (金十数据)", "https://flash-api.jin10.com/get_flash_list?channel=-24"),
-    ("Investing.com", "https://www.investing.com/rss/news.rss"),
-    ("Yahoo Finance", "https://finance.yahoo.com/news/rssindex"),
-    ("The Block", "https://www.theblock.co/rss.xml"),
-    ("Foresight News", "https://foresightnews.pro/rss"),
-    ("CoinDesk", "https://www.coindesk.com/arc/outboundfeeds/rss/"),
-    ("Cointelegraph", "https://cointelegraph.com/rss"),
-    ("Reuters Business", "https://feeds.reuters.com/reuters/businessNews"),
-    ("Coinbase", "https://blog.coinbase.com/feed"),
-    ("Kraken", "https://blog.kraken.com/feed/"),
-    ("CoinGecko", "https://blog.coingecko.com/rss"),
-    ("CFTC", "https://www.cftc.gov/PressRoom/PressReleases/rss"),
-    ("SEC", "https://www.sec.gov/rss/news/press.xml"),
-    
-    # Politics / World (Geopolitics)
-    ("Reuters World", "https://feeds.reuters.com/reuters/worldNews"),
-    ("AP News (美联社)", "https://apnews.com/hub/world-news/feed"),
-    ("CNN World", "http://rss.cnn.com/rss/edition_world.rss"),
-    ("Al Jazeera", "https://www.aljazeera.com/xml/rss/all.xml"),
-    ("Politico", "https://rss.politico.com/politics-news.xml"),
-    ("Fox News", "http://feeds.foxnews.com/foxnews/latest"),
-    
-    # Military / Defense (Conflict Monitoring)
-    ("Defence Blog", "https://defence-blog.com/feed/"),
-    ("Military.com", "http://www.military.com/rss-feeds/content?type=news"),
-    ("Defense One", "https://www.defenseone.com/rss/all/"),
-    
-    # Entertainment / Social / Trends
-    ("Variety", "https://variety.com/feed/"),
-    ("E! Online", "https://www.eonline.com/news/rss.xml"),
-    ("TMZ", "https://www.tmz.com/rss.xml"),
-    ("YouTube: Bloomberg", "https://rsshub.app/youtube/channel/UCOAYqZ5qiQC78px6fLPz_OQ"),
-    ("YouTube: CNBC", "https://rsshub.app/youtube/channel/UCvJJ_dzjViJCoLf5uK9txAw"),
-    ("Twitter: Elon Musk (via RSSHub)", "https://rsshub.app/twitter/user/elonmusk"),
-    ("Weibo: Hot Search (via RSSHub)", "https://rsshub.app/weibo/search/hot"),
-    # New Streaming Sources (2026 Trend)
-    ("Xiaohongshu: Tech Trends", "https://rsshub.app/xiaohongshu/topic/tech"),
-    ("Xiaohongshu: Finance", "https://rsshub.app/xiaohongshu/topic/finance"),
-    ("TikTok: Crypto Trends", "https://rsshub.app/tiktok/tag/crypto"),
-    # New On-chain & Macro Data (2026 Trend)
-    ("Whale Alert (Big Transfers)", "https://rsshub.app/twitter/user/whale_alert"),
-    ("Economic Calendar (Investing.com)", "https://rsshub.app/investing/economic-calendar"),
-    ("Fed Calendar (Federal Reserve)", "https://www.federalreserve.gov/feeds/press_monetary.xml"),
-]
-
-KEYWORDS = re.compile(r"(SEC|ETF|listing|suspend|halt|hack|merger|liquidation|bankruptcy|court|lawsuit|approval|上市|暂停|黑客|诉讼|合并|破产|下架|批准|传闻|war|conflict|strike|election|policy|scandal|movie|star|army|navy|air force|missile|tank|drone|interest rate|fed|cpi|inflation|rates|rate hike|cut|stimulus|gdp|nfp|payroll|oil|gold|btc|eth|crypto|regulation|sanction|trade war|tariff|video|trailer|interview)", re.I)
-
-PRIORITY = {
-    "Wallstreetcn": 1,
-    "Jin10": 1,
-    "Reuters": 1,
-    "AP News": 1,
-    "The Block": 1,
-    "Foresight News": 1,
-    "Investing.com": 1,
-    "Yahoo Finance": 1,
-    "CNN World": 2,
-    "Al Jazeera": 2,
-    "CoinDesk": 2,
-    "Politico": 2,
-    "Fox News": 2,
-    "Defense One": 2,
-    "Defence Blog": 2,
-    "Military.com": 2,
-    "YouTube": 2, # High priority for video content
-    "Twitter": 2,
-    "Variety": 2,
-    "TMZ": 2,
-    "E! Online": 3,
+from opennews_mcp.config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, RSS_SNAPSHOT_TTL, RSS_LATENCY_BUDGET
+from opennews_mcp.feed_cache import FeedCache, body_hash, feed_cache
+from opennews_mcp.feed_parsers import FEED_WINDOW, parse_feed
+from opennews_mcp.http_pool import HttpPool, http_pool
+from opennews_mcp.news_item import NewsItem, Story
+from opennews_mcp.parse_pool import parse_pool
+from opennews_mcp.seen_store import SeenStore, item_keys, seen_store
+from opennews_mcp.source_health import SourceHealthTracker, source_health
+from opennews_mcp.source_registry import SourceSpec, registry
+from opennews_mcp.story_cluster import StoryIndex
+from opennews_mcp.telegram_delivery import telegram_delivery
+
+def _parse_feed(data: bytes, spec: SourceSpec, stop_guid: str | None = None,
+                now: datetime | None = None) -> tuple[list[NewsItem], bool]:
+    """Parse a fetched feed body, stopping early at the 24h cutoff or ``stop_guid``.
+
+    Returns the new items and whether ``stop_guid`` (the newest item seen on
+    the previous run) was reached. The parser comes from the source's
+    registry entry (rss / atom / rdf / json with a field mapping). ``now``
+    pins the cutoff and the time given to undated items (used when replaying
+    recorded feeds).
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - FEED_WINDOW
+    return parse_feed(data, spec.parser, spec.label, spec.mapping, cutoff, stop_guid)
+
+
+async def _parse_off_loop(data: bytes, spec: SourceSpec, stop_guid: str | None = None,
+                          now: datetime | None = None) -> tuple[list[NewsItem], bool]:
+    """``_parse_feed`` on the parse pool, so a burst of feeds does not block the event loop."""
+    cutoff = (now or datetime.now(timezone.utc)) - FEED_WINDOW
+    return await parse_pool.run(parse_feed, data, spec.parser, spec.label, spec.mapping, cutoff, stop_guid,
+                                inline=len(data) <= parse_pool.inline_max)
+
+
+# Add headers to mimic browser and avoid 403/301 blocks
+FETCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/rss+xml, application/xml, text/xml, */*"
 }
 
 
-def _rank(src: str) -> int:
-    if not src:
-        return 9
-    for k, v in PRIORITY.items():
-        if k.lower() in src.lower():
-            return v
-    return 8
-
-
-def _parse_time(ts: str) -> datetime:
-    if not ts:
-        return datetime.now(timezone.utc)
-    try:
-        return parsedate_to_datetime(ts).astimezone(timezone.utc)
-    except Exception:
-        return datetime.now(timezone.utc)
-
-
-def _parse_wallstreetcn(text: str) -> list[dict]:
-    import json
-    items = []
-    try:
-        data = json.loads(text)
-        articles = data.get("data", {}).get("items", [])
-        for art in articles:
-            # 华尔街见闻 API 结构
-            title = art.get("title", "")
-            content = art.get("content_text", "") or art.get("digest", "")
-            url = art.get("uri", "")
-            ts = art.get("display_time", 0)
-            
-            # 过滤不需要的
-            if not title: continue
-            
-            dt = datetime.fromtimestamp(ts, timezone.utc)
-            items.append({
-                "title": title.strip(),
-                "link": url,
-                "source": "Wallstreetcn",
-                "time": dt,
-                "summary": content[:200]
-            })
-    except Exception:
-        pass
-    return items
+async def _fetch(pool: HttpPool, spec: SourceSpec, cache: FeedCache | None = None, timeout: float | None = None,
+                 now: datetime | None = None, clock: dict | None = None) -> list[NewsItem]:
+    """抓取并解析一个源；网络 / HTTP 错误向上抛出，由调用方记录到源健康模型。
+
+    传入 ``clock`` 时记下请求真正发出 (拿到主机名额、退避结束之后) 的时间
+    ``sent`` 和收到响应的时间 ``received``。
+    """
+    name, url = spec.name, spec.url
+    headers = dict(FETCH_HEADERS)
+    if cache is not None:
+        headers.update(cache.request_headers(name, url))
+    on_send = None
+    if clock is not None:
+        def on_send():
+            clock["sent"] = time.monotonic()
+    # 共享连接池：复用 keep-alive 连接，按主机限制并发 (RSSHub)，429 时退避重试
+    resp = await pool.get(url, timeout=timeout or spec.timeout, headers=headers, follow_redirects=True,
+                          on_send=on_send)
+    if clock is not None:
+        clock["received"] = time.monotonic()
+    if resp.status_code == 304 and cache is not None:
+        cached = cache.not_modified_items(name, url)
+        if cached is not None:
+            return cached
+    resp.raise_for_status()
+    body = resp.content
+    if cache is None:
+        return (await _parse_off_loop(body, spec, now=now))[0]
 
-def _parse_jin10(text: str) -> list[dict]:
-    import json
-    items = []
-    try:
-        data = json.loads(text)
-        flash_list = data.get("data", [])
-        for flash in flash_list:
-            # 金十 API 结构
-            content = flash.get("data", {}).get("content", "")
-            if not content: continue
-            
-            # 金十快讯通常没有标题，直接用内容前段做标题
-            title = content[:50] + "..." if len(content) > 50 else content
-            ts = flash.get("time_txt", "") # 格式可能需要处理，这里简化
-            raw_time = flash.get("time", "") # "2023-10-27 10:00:00"
-            
-            try:
-                dt = datetime.strptime(raw_time, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone(timedelta(hours=8)))
-            except:
-                dt = datetime.now(timezone.utc)
-
-            link = flash.get("link", "")
-            
-            items.append({
-                "title": title,
-                "link": link,
-                "source": "Jin10",
-                "time": dt,
-                "summary": content
-            })
-    except Exception:
-        pass
+    # 有些服务器忽略校验头，内容没变时用 body hash 跳过解析
+    digest = body_hash(body)
+    cached = cache.unchanged_items(name, url, digest, resp.headers)
+    if cached is not None:
+        return cached
+    items, reached = await _parse_off_loop(body, spec, cache.head_guid(name, url), now)
+    if reached:
+        # 解析到上次的最新条目为止，其余沿用上次的解析结果
+        cutoff = ((now or datetime.now(timezone.utc)) - FEED_WINDOW).timestamp()
+        items += [it for it in cache.items(name, url) if it.ts >= cutoff]
+    cache.store(name, url, resp.headers, digest, len(body), items)
     return items
 
-def _parse_rss(xml: str, source: str) -> list[dict]:
-    # Special handling for JSON APIs
-    if "Wallstreetcn" in source:
-        return _parse_wallstreetcn(xml)
-    if "Jin10" in source:
-        return _parse_jin10(xml)
-        
-    out = []
-    try:
-        # 尝试解析 JSON 格式 (某些 API 虽然叫 RSS 但返回 JSON)
-        if xml.strip().startswith("{") or xml.strip().startswith("["):
-             # 这里可以扩展其他 JSON 格式的处理
-             pass
-
-        root = ET.fromstring(xml)
-    except Exception:
-        return out
-    channel = root.find("channel")
-    if channel is not None:
-        for item in channel.findall("item"):
-            title_el = item.find("title")
-            link_el = item.find("link")
-            pub_el = item.find("pubDate")
-            title = title_el.text.strip() if title_el is not None and title_el.text else ""
-            link = link_el.text.strip() if link_el is not None and link_el.text else ""
-            pub = _parse_time(pub_el.text.strip()) if pub_el is not None and pub_el.text else datetime.now(timezone.utc)
-            if title:
-                out.append({"title": title, "link": link, "source": source, "time": pub})
-        return out
-    for entry in root.findall("{http://www.w3.org/2005/Atom}entry"):
-        title_el = entry.find("{http://www.w3.org/2005/Atom}title")
-        link_el = entry.find("{http://www.w3.org/2005/Atom}link")
-        pub_el = entry.find("{http://www.w3.org/2005/Atom}updated") or entry.find("{http://www.w3.org/2005/Atom}published")
-        title = title_el.text.strip() if title_el is not None and title_el.text else ""
-        href = ""
-        if link_el is not None:
-            href = link_el.get("href", "").strip()
-        pub = _parse_time(pub_el.text.strip()) if pub_el is not None and pub_el.text else datetime.now(timezone.utc)
-        if title:
-            out.append({"title": title, "link": href, "source": source, "time": pub})
-    return out
-
-
-async def _fetch(client: httpx.AsyncClient, name: str, url: str) -> list[dict]:
-    try:
-        # Add headers to mimic browser and avoid 403/301 blocks
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "application/rss+xml, application/xml, text/xml, */*"
-        }
-        resp = await client.get(url, timeout=10.0, headers=headers, follow_redirects=True)
-        resp.raise_for_status()
-        return _parse_rss(resp.text, name)
-    except Exception:
-        return []
-
-
-def _filter(items: list[dict], max_items: int) -> list[dict]:
-    seen = set()
-    out = []
-    # 宽松的时间窗口：只看过去 24 小时内的新闻，避免挖坟
-    # Strict 20-min window is too risky for RSS delays. 24h is safer, rely on seen/dedup logic.
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
-    
-    for it in items:
-        title = it.get("title", "")
-        link = it.get("link", "")
-        pub_time = it.get("time")
-        
+
+class FeedSnapshot:
+    """进程内的 RSS 源快照，同一轮矩阵中所有分类/机器人共享。
+
+    每个源在 ``ttl`` 秒内最多抓取并解析一次；并发请求同一个源时
+    共享同一个进行中的抓取任务。各分类只从快照中读取自己的子集。
+    """
+
+    def __init__(
+        self,
+        ttl: float = RSS_SNAPSHOT_TTL,
+        cache: FeedCache | None = feed_cache,
+        pool: HttpPool = http_pool,
+        health: SourceHealthTracker | None = source_health,
+        now: datetime | None = None,
+    ):
+        self.ttl = ttl
+        self.cache = cache
+        self.pool = pool
+        self.health = health
+        # 固定的 "当前时间"，回放录制的 feed 时使用 (见 rss_bench)
+        self.now = now
+        self._entries: dict[str, tuple[float, list[NewsItem]]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.fetches = 0
+        self.hits = 0
+
+    def invalidate(self):
+        """丢弃所有已缓存的源，下一次读取会重新抓取。"""
+        self._entries.clear()
+
+    def save(self):
+        """把 HTTP 缓存和源健康模型写回磁盘。"""
+        if self.cache is not None:
+            self.cache.save()
+        if self.health is not None:
+            self.health.save()
+
+    def _skipped_items(self, spec: SourceSpec) -> list[NewsItem]:
+        # 熔断中的源不发请求，沿用 HTTP 缓存里仍在时间窗口内的条目
+        if self.cache is None:
+            return []
+        cutoff = ((self.now or datetime.now(timezone.utc)) - FEED_WINDOW).timestamp()
+        return [it for it in self.cache.items(spec.name, spec.url) if it.ts >= cutoff]
+
+    async def _do_fetch(self, spec: SourceSpec) -> list[NewsItem]:
+        try:
+            health = self.health
+            if health is not None and not health.allow(spec.name):
+                items = self._skipped_items(spec)
+            else:
+                self.fetches += 1
+                timeout = health.timeout_for(spec.name, spec.timeout) if health is not None else None
+                # 延迟只算服务器的响应时间：不含等主机名额 / 退避的排队，也不含解析
+                clock: dict[str, float] = {}
+                error = None
+                try:
+                    items = await _fetch(self.pool, spec, self.cache, timeout, self.now, clock)
+                except asyncio.CancelledError:
+                    if health is not None:
+                        health.release(spec.name)
+                    raise
+                except Exception as e:
+                    items, error = [], f"{type(e).__name__}: {e}"
+                if health is not None:
+                    ended = clock.get("received") or time.monotonic()
+                    health.record(spec.name, ended - clock.get("sent", ended), len(items), error)
+            self._entries[spec.name] = (time.monotonic(), items)
+            return items
+        finally:
+            self._inflight.pop(spec.name, None)
+
+    async def refresh(self, spec: SourceSpec) -> list[NewsItem]:
+        """强制重新抓取一个源并更新快照 (若已有进行中的抓取则共享它)。"""
+        task = self._inflight.get(spec.name)
+        if task is None:
+            task = asyncio.create_task(self._do_fetch(spec))
+            self._inflight[spec.name] = task
+        else:
+            self.hits += 1
+        # shield: 某个调用方被取消时不影响其他共享该抓取的调用方
+        return await asyncio.shield(task)
+
+    async def _source(self, spec: SourceSpec) -> list[NewsItem]:
+        entry = self._entries.get(spec.name)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+        return await self.refresh(spec)
+
+    async def get(self, sources: list[SourceSpec]) -> list[NewsItem]:
+        """返回给定源的全部条目，必要时抓取过期或缺失的源。"""
+        results = await asyncio.gather(*(self._source(spec) for spec in sources))
+        self.save()
+        items = []
+        for arr in results:
+            items.extend(arr)
+        return items
+
+    async def stream(self, sources: list[SourceSpec], deadline: float | None = None, missed: list | None = None):
+        """按完成顺序产出 ``(spec, items)``，快照中未过期的源最先产出。
+
+        ``deadline`` 是 ``loop.time()`` 的时间点，到期仍未完成的源不再等待，
+        其名字追加到 ``missed``。这些源的抓取在后台继续 (见 ``refresh`` 的
+        shield)，结果照常写入快照，下一次读取即可命中。
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        fresh = []
+        pending: dict[asyncio.Future, SourceSpec] = {}
+        for spec in sources:
+            entry = self._entries.get(spec.name)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.hits += 1
+                fresh.append((spec, entry[1]))
+            else:
+                pending[asyncio.ensure_future(self.refresh(spec))] = spec
+        try:
+            for pair in fresh:
+                yield pair
+            while pending:
+                timeout = None if deadline is None else deadline - loop.time()
+                if timeout is not None and timeout <= 0:
+                    break
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    yield pending.pop(fut), fut.result()
+        finally:
+            for fut, spec in pending.items():
+                fut.cancel()
+                if missed is not None:
+                    missed.append(spec.name)
+            self.save()
+
+    def stats(self) -> dict:
+        return {"fetches": self.fetches, "hits": self.hits, "cached_sources": len(self._entries)}
+
+
+feed_snapshot = FeedSnapshot()
+
+
+class TopStories:
+    """增量筛选 + 近似重复聚类，只保留排名最高的 ``k`` 个故事。
+
+    条目可以按任意顺序逐个 ``add`` (如按源的完成顺序)：关键词 + 时间窗口 +
+    去重筛选后归入故事，故事按最佳成员的 (来源排名, 发布时间) 排序，用大小
+    为 ``k`` 的堆淘汰最差的故事。只保留堆内故事的成员、去重键和聚类索引：
+    被淘汰或未入选的条目全部释放，内存随前 ``k`` 个故事的成员数增长，而不是
+    随处理过的条目数增长。
+    """
+
+    def __init__(self, k: int, store: SeenStore | None = None, category: str = "all", now: datetime | None = None):
+        self.k = k
+        self.store = store
+        self.category = category
+        self.matcher = registry.matcher
+        # 宽松的时间窗口：只看过去 24 小时内的新闻，避免挖坟
+        # Strict 20-min window is too risky for RSS delays. 24h is safer, rely on seen/dedup logic.
+        self.cutoff = ((now or datetime.now(timezone.utc)) - FEED_WINDOW).timestamp()
+        self._index = StoryIndex()
+        self._keys: set[int] = set()
+        # story id -> [(排序键, 条目, 得分)]，首个元素是最佳成员；只保存堆内的故事
+        self._stories: dict[int, list[tuple]] = {}
+        # 堆顶是当前最差的故事: (-rank, ts, -seq, story)；更新过的旧记录惰性删除
+        self._heap: list[tuple] = []
+        self._seq = itertools.count()
+
+    def _admit(self, it: NewsItem) -> float | None:
+        """筛选一条；通过时返回关键词得分。"""
+        title = it.title
+
         # 1. 基础字段检查
         if not title:
-            continue
-            
-        # 2. 关键词过滤 (Keywords)
-        if not KEYWORDS.search(title):
-            continue
-            
+            return None
+
+        # 2. 关键词过滤 (Keywords)：标题 + 摘要一次扫描，按分类词表打分
+        # 注册表没有配置词表时不做关键词过滤
+        score = 0.0
+        if len(self.matcher):
+            score, _ = self.matcher.score(f"{title}\n{it.summary}", self.category)
+            if score <= 0:
+                return None
+
         # 3. 时间过滤 (Time Window)
-        # 如果 RSS 没有时间，默认认为是新的 (_parse_time 会返回 now)
+        # 如果 RSS 没有时间，默认认为是新的 (feed_parsers 解析时记为 now)
         # 如果有时间，丢弃 24 小时以前的旧闻
-        if pub_time and pub_time < cutoff:
-            continue
+        if it.ts and it.ts < self.cutoff:
+            return None
+
+        # 4. 去重 (Deduplication)：标题 + 链接前缀的哈希
+        # 跨运行 / 跨管道去重 (已推送过的不再推) 在 unseen 里、事件循环上完成
+        key = it.dedup_key
+        if key in self._keys:
+            return None
+        self._keys.add(key)
+        return score
+
+    def _worst(self) -> tuple:
+        heap = self._heap
+        while True:
+            _, _, neg_seq, story = heap[0]
+            members = self._stories.get(story)
+            if members is not None and members[0][0][2] == -neg_seq:
+                return heap[0]
+            heapq.heappop(heap)
+
+    def _push(self, key: tuple, story: int):
+        rank, neg_ts, seq = key
+        heapq.heappush(self._heap, (-rank, -neg_ts, -seq, story))
+
+    def add(self, it: NewsItem) -> float | None:
+        """加入一条；当它作为新故事进入前 ``k`` 名时返回其关键词得分，否则返回 None。"""
+        score = self._admit(it)
+        if score is None:
+            return None
+        key = (it.rank, -it.ts, next(self._seq))
+        # 6. 近似重复聚类：同一事件归为一个故事
+        story = self._index.add(it.title)
+        members = self._stories.get(story)
+        if members is not None:
+            members.append((key, it, score))
+            if key < members[0][0]:
+                # 更好的成员成为代表：排序键和聚类索引都改用它
+                members[0], members[-1] = members[-1], members[0]
+                self._push(key, story)
+                self._index.promote(story)
+            return None
+        if self.k <= 0:
+            self._reject(it, story)
+            return None
+        if len(self._stories) >= self.k:
+            worst = self._worst()
+            if key >= (-worst[0], -worst[1], -worst[2]):
+                self._reject(it, story)
+                return None
+            heapq.heappop(self._heap)
+            evicted = self._stories.pop(worst[3])
+            # 被淘汰的故事不再吸收后来的近似条目；它的条目即使再次出现也排不进
+            # 前 k 名 (堆中最差的故事只会越来越好)，去重键可以一起释放
+            self._index.remove(worst[3])
+            self._keys.difference_update(m[1].dedup_key for m in evicted)
+        self._stories[story] = [(key, it, score)]
+        self._push(key, story)
+        return score
+
+    def _reject(self, it: NewsItem, story: int):
+        self._index.remove(story)
+        self._keys.discard(it.dedup_key)
+
+    def unseen(self, items: list[NewsItem]) -> list[NewsItem]:
+        """Drop the items already pushed according to the seen store, with one batched lookup.
 
-        # 4. 去重 (Deduplication)
-        key = (title.lower(), link[:80])
-        if key in seen:
+        Call it on the event loop before ``add`` / ``add_many``: the seen
+        store's SQLite connection is shared by every concurrent run and is
+        not used from worker threads.
+        """
+        return _unseen(items, self.store)
+
+    def add_many(self, items: list[NewsItem]) -> list[tuple[NewsItem, float]]:
+        """``add`` each item; returns the ones that entered the top ``k`` as new stories, with their scores."""
+        admitted = []
+        for it in items:
+            score = self.add(it)
+            if score is not None:
+                admitted.append((it, score))
+        return admitted
+
+    def __len__(self) -> int:
+        return len(self._stories)
+
+    def result(self) -> list[Story]:
+        """当前前 ``k`` 个故事：排名最高的一条作代表，并附上佐证来源。"""
+        picked = []
+        for members in sorted(self._stories.values(), key=lambda m: m[0][0]):
+            members = sorted(members, key=lambda m: m[0])
+            # 新建 Story，不改动快照里的共享条目
+            picked.append(Story.of(
+                members[0][1],
+                list(dict.fromkeys(m[1].source for m in members)),
+                members[0][2],
+                [m[1] for m in members[1:]],
+            ))
+        return picked
+
+
+def _unseen(items: list[NewsItem], store: SeenStore | None) -> list[NewsItem]:
+    if store is None or not items:
+        return items
+    keyed = [(it, item_keys(it.title, it.link)) for it in items]
+    seen = store.seen_keys([k for _, keys in keyed for k in keys])
+    if not seen:
+        return items
+    return [it for it, keys in keyed if seen.isdisjoint(keys)]
+
+
+def _filter(items: list[NewsItem], max_items: int, store: SeenStore | None = None, category: str = "all") -> list[Story]:
+    """关键词 + 时间窗口 + 去重筛选；传入 ``store`` 时跳过已推送过的条目。
+
+    传入 ``store`` 时只能在事件循环上调用；在线程上筛选时先用 ``_unseen`` 过滤。
+
+    关键词按 ``category`` 的词表加权匹配，结果带 ``score`` (命中词权重之和)。
+    """
+    top = TopStories(max_items, store=store, category=category)
+    for it in _sort_items(top.unseen(items)):
+        top.add(it)
+    return top.result()
+
+
+def _sort_items(items: list[NewsItem]) -> list[NewsItem]:
+    # 先按排名排序：每个故事的首条就是最佳条目，聚类时不必再替换代表
+    return sorted(items, key=lambda x: (x.rank, -x.ts))
+
+
+async def _stream_into(top: TopStories, snapshot: FeedSnapshot, sources: list[SourceSpec],
+                       deadline: float | None = None, missed: list | None = None, progress=None):
+    """把各源的条目按到达顺序筛进 ``top``；筛选在解析池的线程上执行，不阻塞事件循环。"""
+    done = 0
+    async for _, items in snapshot.stream(sources, deadline, missed):
+        items = top.unseen(items)
+        if items:
+            await parse_pool.run_threaded(top.add_many, items)
+        done += 1
+        if progress is not None:
+            await progress(done, len(sources))
+
+
+async def iter_free_news(
+    category: str = "all",
+    max_items: int | None = None,
+    latency_budget: float = RSS_LATENCY_BUDGET,
+    store: SeenStore | None = None,
+    missed: list | None = None,
+):
+    """按源的完成顺序逐条产出通过筛选的新故事，不必等最慢的源。
+
+    近似重复的条目只产出第一条。``latency_budget`` 秒后 (0 表示不限) 停止
+    等待剩余的源，其名字追加到 ``missed``。
+    """
+    registry.maybe_reload()
+    deadline = asyncio.get_running_loop().time() + latency_budget if latency_budget > 0 else None
+    top = TopStories(max_items if max_items is not None else 1 << 30, store=store, category=category)
+    count = 0
+    async for _, items in feed_snapshot.stream(registry.for_category(category), deadline, missed):
+        items = top.unseen(items)
+        admitted = await parse_pool.run_threaded(top.add_many, items) if items else []
+        for it, score in admitted:
+            yield Story.of(it, [it.source], score)
+            count += 1
+            if max_items is not None and count >= max_items:
+                return
+
+
+# 正在推送中的条目键：并发运行的机器人 (矩阵) 在各自筛选时都还没有标记已推送，
+# 发送前在事件循环里认领 (检查与认领之间没有 await)，同一条目只由一个机器人推送
+_claimed: set[int] = set()
+
+
+def _claim(picked: list[Story], store: SeenStore) -> tuple[list[Story], list[int]]:
+    """Drop stories another concurrent run is pushing (or has pushed); claim the rest."""
+    out, claimed = [], []
+    for it in picked:
+        keys = [k for m in (it, *it.related) for k in item_keys(m.title, m.link)]
+        if _claimed.intersection(keys) or store.contains(keys):
             continue
-        seen.add(key)
+        _claimed.update(keys)
+        claimed.extend(keys)
         out.append(it)
-        
-    out.sort(key=lambda x: (_rank(x.get("source", "")), -x["time"].timestamp()))
-    return out[:max_items]
+    return out, claimed
+
+
+def _render_line(it: NewsItem) -> str:
+    """渲染一条 Telegram Markdown 消息行"""
+    tstr = it.time.astimezone(timezone(timedelta(hours=8))).strftime("%H:%M")
+    src = it.source
+    title = it.title.replace("[", "(").replace("]", ")").replace("*", "") # 简单的Markdown转义
+    link = it.link
 
+    # 美化每一行
+    line = f"⏰ `{tstr}` | *{src}*"
+    # 同一事件的其他佐证来源数
+    extra = len(it.sources) - 1
+    if extra > 0:
+        line += f" +{extra}"
+    line += f"\n{title}"
+    if link:
+        line += f"\n[🔗 点击阅读]({link})"
+    return line + "\n"
 
-async def _send_telegram(lines: list[str], category: str = "all", bot_token: str = None, chat_id: str = None) -> str:
-    """发送消息到 Telegram Bot"""
+
+async def _send_telegram(lines: list[str], category: str = "all", bot_token: str = None, chat_id: str = None,
+                         delivered: list[int] | None = None) -> str:
+    """发送消息到 Telegram Bot
+
+    条目按顺序装进尽量少的消息 (每条不超过 4096 字符，条目不会被拆开)；
+    送达的消息里的条目下标追加到 ``delivered``。
+    """
     if not lines:
         return "skip"
     
@@ -274,31 +499,30 @@ async def _send_telegram(lines: list[str], category: str = "all", bot_token: str
     }
     header = headers.get(category, headers["all"])
     
-    # 构建消息体 (支持 Markdown)
-    msg_body = f"{header}\n━━━━━━━━━━━━━━━━━━\n" + "\n".join(lines) + "\n━━━━━━━━━━━━━━━━━━\n_Powered by Wisteria_"
-    
-    async with httpx.AsyncClient(timeout=15.0) as c:
-        # Use provided bot_token/chat_id if available, else use global
-        target_token = bot_token or TELEGRAM_BOT_TOKEN
-        target_chat = chat_id or TELEGRAM_CHAT_ID
-        
-        # Ensure chat_id is integer-like if possible (but Telegram API accepts string for channel username @channel)
-        # If it's a private/group ID (e.g. "-100..."), ensure it's a string or int.
-        
-        r = await c.post(
-            f"https://api.telegram.org/bot{target_token}/sendMessage",
-            json={
-                "chat_id": target_chat, 
-                "text": msg_body, 
-                "parse_mode": "Markdown", # 启用 Markdown 美化
-                "disable_web_page_preview": True
-            },
-        )
-        try:
-            r.raise_for_status()
-            return "ok"
-        except Exception as e:
-            return f"error:{e} (Response: {r.text})"
+    # Use provided bot_token/chat_id if available, else use global
+    target_token = bot_token or TELEGRAM_BOT_TOKEN
+    target_chat = chat_id or TELEGRAM_CHAT_ID
+
+    # 统一的投递服务：按 bot / chat 限速，遵守 retry_after (启用 Markdown 美化)；
+    # 每条消息都带 Header 和 Footer
+    results = await telegram_delivery.send_packed(
+        target_token, target_chat, lines,
+        header=f"{header}\n━━━━━━━━━━━━━━━━━━",
+        footer="━━━━━━━━━━━━━━━━━━\n_Powered by Wisteria_",
+        parse_mode="Markdown",
+    )
+    errors = []
+    for packet, result in results:
+        if result.ok:
+            if delivered is not None:
+                delivered.extend(packet.parts)
+        else:
+            errors.append(f"error:{result.error} (HTTP {result.status})")
+    if not errors:
+        return "ok"
+    if len(errors) < len(results):
+        return f"partial:{len(results) - len(errors)}/{len(results)} messages sent, {errors[0]}"
+    return errors[0]
 
 
 @mcp.tool()
@@ -308,7 +532,8 @@ async def aggregate_free_news(
     send_to_telegram: bool = True,
     category: str = "all",  # all, finance, tech, world
     bot_token: str = None,
-    chat_id: str = None
+    chat_id: str = None,
+    latency_budget: float = None,
 ) -> dict:
     """
     聚合免费 RSS 新闻源并可选推送到 Telegram。
@@ -319,63 +544,41 @@ async def aggregate_free_news(
         category: 资讯类别 (all/finance/tech/world)，影响来源筛选
         bot_token: 可选，指定发送用的 Bot Token (覆盖默认)
         chat_id: 可选，指定发送用的 Chat ID (覆盖默认)
+        latency_budget: 可选，最多等待源返回的秒数 (默认取配置，0 表示等待全部源)；
+            超时未返回的源列在结果的 missed_sources 中
     """
-    # 1. 根据 category 筛选源
-    selected_sources = []
-    for name, url in SOURCES:
-        # 简单分类逻辑 (可根据实际需求细化)
-        if category == "all":
-            selected_sources.append((name, url))
-        elif category == "finance" and name in ["SEC", "CFTC", "Reuters", "WSJ", "Financial Times", "Bloomberg", "Yahoo Finance", "Investing.com", "The Block", "Foresight News", "CoinDesk"]:
-            selected_sources.append((name, url))
-        elif category == "tech" and name in ["CoinDesk", "The Block", "TechCrunch", "Foresight News"]: # 示例
-            selected_sources.append((name, url))
-        elif category == "world" and name in ["Reuters", "BBC World", "BBC Politics", "CNN World", "Al Jazeera", "Reuters World"]: 
-            selected_sources.append((name, url))
-        elif category == "politics" and name in ["BBC Politics", "Reuters", "Politico", "Fox News Politics"]:
-            selected_sources.append((name, url))
-        elif category == "entertainment" and name in ["Variety", "E! Online", "TMZ", "YouTube: Bloomberg", "YouTube: CNBC", "Twitter: Elon Musk (Demo)"]:
-            selected_sources.append((name, url))
-        elif category == "military" and name in ["Defence Blog", "Military.com", "Defense One"]:
-            selected_sources.append((name, url))
-        # 默认回落到 crypto 相关源
-        elif category not in ["all", "finance", "tech", "world", "politics", "entertainment", "military"] and name in ["CoinDesk", "Cointelegraph", "Coinbase"]:
-             selected_sources.append((name, url))
-
-    if not selected_sources and category != "all":
-        # 如果分类筛选后为空，默认用全量，或者针对 crypto 优化
-        selected_sources = SOURCES
-
-    async with httpx.AsyncClient() as client:
-        tasks = [asyncio.create_task(_fetch(client, name, url)) for name, url in selected_sources]
-        results = await asyncio.gather(*tasks)
-    
-    items = []
-    for arr in results:
-        items.extend(arr)
-    
-    picked = _filter(items, max_items)
-    lines = []
-    for it in picked:
-        tstr = it["time"].astimezone(timezone(timedelta(hours=8))).strftime("%H:%M")
-        src = it.get("source", "")
-        title = it.get("title", "").replace("[", "(").replace("]", ")").replace("*", "") # 简单的Markdown转义
-        link = it.get("link", "")
-        
-        # 美化每一行
-        line = f"⏰ `{tstr}` | *{src}*\n{title}"
-        if link:
-            line += f"\n[🔗 点击阅读]({link})"
-        lines.append(line + "\n")
+    # 1. 根据 category 筛选源 (分类索引在注册表加载时预先建好，文件修改后自动重载)
+    registry.maybe_reload()
+    selected_sources = registry.for_category(category)
+
+    # 从共享快照读取，同一轮内其他分类已抓取过的源不会再次请求。
+    # 按源的完成顺序边到边筛选，只保留前 max_items 个故事；延迟预算到期后不再等慢源
+    budget = RSS_LATENCY_BUDGET if latency_budget is None else latency_budget
+    deadline = asyncio.get_running_loop().time() + budget if budget > 0 else None
+    # 推送时排除已经推送过的条目 (与 cron / WS 监控共用同一个去重库)
+    top = TopStories(max_items, store=seen_store if send_to_telegram else None, category=category)
+    missed: list[str] = []
+    await _stream_into(top, feed_snapshot, selected_sources, deadline, missed,
+                       progress=ctx.report_progress if ctx is not None else None)
+    picked = top.result()
     
     status = None
     if send_to_telegram:
+        picked, claimed = _claim(picked, seen_store)
         # 临时覆盖全局配置 (如果传入了特定参数)
-        # Note: We now pass token/chat_id directly to _send_telegram via a modified signature or globals
-        # But _send_telegram uses global variables by default. 
-        # Let's refactor _send_telegram to accept arguments to avoid global state issues.
-        
-        status = await _send_telegram(lines, category=category, bot_token=bot_token, chat_id=chat_id)
+        delivered: list[int] = []
+        try:
+            status = await _send_telegram([_render_line(it) for it in picked], category=category,
+                                          bot_token=bot_token, chat_id=chat_id, delivered=delivered)
+            # 只标记实际送达的条目；部分消息失败时其余条目下次重试
+            for i in delivered:
+                it = picked[i]
+                for m in [it, *it.related]:
+                    seen_store.mark(m.title, m.link)
+            if delivered:
+                seen_store.flush()
+        finally:
+            _claimed.difference_update(claimed)
 
     return {
         "success": True,
@@ -383,15 +586,42 @@ async def aggregate_free_news(
         "count": len(picked),
         "items": [
             {
-                "title": it["title"],
-                "link": it["link"],
-                "source": it["source"],
-                "time": it["time"].isoformat(),
-                "rank": _rank(it["source"]),
+                "title": it.title,
+                "link": it.link,
+                "source": it.source,
+                "time": it.time.isoformat(),
+                "rank": it.rank,
+                "sources": it.sources,
+                "score": it.score,
             }
             for it in picked
         ],
+        "missed_sources": missed,
         "telegram": status or "skip",
+        "cache": feed_cache.stats(),
+    }
+
+
+@mcp.tool()
+async def get_rss_source_health(ctx: Context, category: str = "all") -> dict:
+    """
+    查看 RSS 源的健康状况：延迟分位数、错误率、空解析率、熔断状态和自适应超时。
+
+    结果按失败浪费的时间排序，排在前面的源最值得修复或移除。
+
+    Args:
+        category: 资讯类别 (all/finance/tech/world...)，只看该分类的源
+    """
+    registry.maybe_reload()
+    specs = registry.for_category(category)
+    timeouts = {s.name: s.timeout for s in specs}
+    rows = [r for r in source_health.report(timeouts) if r["source"] in timeouts]
+    return {
+        "success": True,
+        "category": category,
+        "count": len(rows),
+        "sources": rows,
+        "breaker": source_health.stats(),
     }
 
 
@@ -406,5 +636,12 @@ if __name__ == "__main__":
     
     # 手动运行测试
     print("Running aggregator test locally...")
-    result = asyncio.run(aggregate_free_news(None, max_items=5, send_to_telegram=True))
+    async def _main():
+        try:
+            return await aggregate_free_news(None, max_items=5, send_to_telegram=True)
+        finally:
+            await http_pool.aclose()
+            seen_store.close()
+
+    result = asyncio.run(_main())
     print(f"Result: {result}")
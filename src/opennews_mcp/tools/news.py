@@ -1,6 +1,8 @@
 """News content tools — search and retrieve crypto news via REST API.
 
-Uses POST /open/news_search as the primary data source.
+Uses POST /open/news_search as the primary data source. The "latest"
+tools (latest, high score, signal, since) answer from the in-memory buffer
+fed by the shared WebSocket when it is live, and fall back to REST otherwise.
 Returns raw article data as-is from the API.
 """
 
@@ -8,6 +10,21 @@ from mcp.server.fastmcp import Context
 
 from opennews_mcp.app import mcp
 from opennews_mcp.config import clamp_limit, make_serializable, MAX_ROWS
+from opennews_mcp.news_backfill import fetch_range
+from opennews_mcp.news_buffer import advance, after, make_cursor, parse_cursor
+from opennews_mcp.news_item import extract_ts
+
+
+def _buffered(ctx: Context, count: int) -> list[dict] | None:
+    """The ``count`` newest articles from the live buffer (newest first), or None to use REST."""
+    app = ctx.request_context.lifespan_context
+    # 每次读取都让共享 WebSocket 保持连接 (或开始连接)，之后的调用就能走内存
+    app.hub.touch()
+    return app.buffer.latest(count)
+
+
+def _stamps(rows: list[dict]):
+    return ((extract_ts(raw) or 0, raw.get("id")) for raw in rows)
 
 
 @mcp.tool()
@@ -19,14 +36,20 @@ async def get_latest_news(ctx: Context, limit: int = 10) -> dict:
     Args:
         limit: Maximum number of articles to return (default 10, max 100).
     """
-    api = ctx.request_context.lifespan_context.api
+    app = ctx.request_context.lifespan_context
     limit = clamp_limit(limit)
     try:
-        result = await api.search_news(limit=limit, page=1)
-        data = result.get("data", [])[:limit]
+        data = _buffered(ctx, limit)
+        if data is not None:
+            # API 的文章总数取自填充缓冲区的那次 REST 请求，不是本进程收到的条数
+            total = app.buffer.api_total
+        else:
+            result = await app.api.search_news(limit=limit, page=1)
+            data = result.get("data", [])[:limit]
+            total = result.get("total", 0)
         return make_serializable({
             "success": True, "data": data,
-            "count": len(data), "total": result.get("total", 0),
+            "count": len(data), "total": total,
         })
     except Exception as e:
         return {"success": False, "error": str(e) or repr(e)}
@@ -182,8 +205,10 @@ async def get_high_score_news(ctx: Context, min_score: int = 70, limit: int = 10
     limit = clamp_limit(limit)
     try:
         fetch_limit = min(limit * 3, MAX_ROWS)
-        result = await api.search_news(limit=fetch_limit, page=1)
-        raw = result.get("data", [])
+        raw = _buffered(ctx, fetch_limit)
+        if raw is None:
+            result = await api.search_news(limit=fetch_limit, page=1)
+            raw = result.get("data", [])
 
         filtered = [it for it in raw
                      if (it.get("aiRating") or {}).get("score", 0) >= min_score]
@@ -212,8 +237,10 @@ async def get_news_by_signal(signal: str, ctx: Context, limit: int = 10) -> dict
     limit = clamp_limit(limit)
     try:
         fetch_limit = min(limit * 3, MAX_ROWS)
-        result = await api.search_news(limit=fetch_limit, page=1)
-        raw = result.get("data", [])
+        raw = _buffered(ctx, fetch_limit)
+        if raw is None:
+            result = await api.search_news(limit=fetch_limit, page=1)
+            raw = result.get("data", [])
 
         filtered = [it for it in raw
                      if (it.get("aiRating") or {}).get("signal") == signal
@@ -225,3 +252,74 @@ async def get_news_by_signal(signal: str, ctx: Context, limit: int = 10) -> dict
         })
     except Exception as e:
         return {"success": False, "error": str(e) or repr(e)}
+
+
+@mcp.tool()
+async def get_news_since(ctx: Context, cursor: str = "", since: int = 0, limit: int = 50) -> dict:
+    """Get only the news published since the last call, oldest first (cheap polling).
+
+    Pass the ``next_cursor`` of the previous response as ``cursor`` to get
+    exactly the articles that arrived since; ``more`` means another call
+    returns the rest right away. ``truncated`` means the gap since the
+    cursor was longer than the REST API pages back: articles between the
+    cursor and the first one returned were skipped (use ``search_news`` to
+    fill them in). Without a cursor, starts at ``since``
+    (epoch seconds), or at the latest ``limit`` articles if ``since`` is 0.
+    Recent windows are served from memory, older ones from the REST API.
+
+    Args:
+        cursor: The next_cursor returned by the previous call.
+        since: Start time in epoch seconds, used when there is no cursor.
+        limit: Maximum articles per call (default 50, max 100).
+    """
+    app = ctx.request_context.lifespan_context
+    limit = clamp_limit(limit)
+    try:
+        if not cursor and not since:
+            data = _buffered(ctx, limit)
+            next_cursor = app.buffer.head_cursor()
+            if data is None:
+                result = await app.api.search_news(limit=limit, page=1)
+                data = result.get("data", [])[:limit]
+                next_cursor = make_cursor("", 0, *advance(0, (), _stamps(data))) if data else None
+            return make_serializable({
+                "success": True, "data": data[::-1], "count": len(data),
+                "next_cursor": next_cursor, "more": False, "truncated": False,
+            })
+
+        app.hub.touch()
+        answer = app.buffer.since(cursor or None, since, limit)
+        truncated = False
+        if answer is not None:
+            data, next_cursor, more = answer
+        else:
+            _, _, ts, ids = parse_cursor(cursor) if cursor else ("", 0, since, frozenset())
+            rows, reached = await fetch_range(app.api, ts)
+            rows = [raw for raw in rows if after(ts, ids, extract_ts(raw), raw.get("id"))]
+            truncated = not reached
+            # 只推进到实际返回的最后一条，余下的下次接着取
+            data, more = rows[:limit], len(rows) > limit
+            next_cursor = make_cursor("", 0, *advance(ts, ids, _stamps(data)))
+        return make_serializable({
+            "success": True, "data": data, "count": len(data),
+            "next_cursor": next_cursor, "more": more, "truncated": truncated,
+        })
+    except Exception as e:
+        return {"success": False, "error": str(e) or repr(e)}
+
+
+@mcp.tool()
+async def get_news_cache_stats(ctx: Context) -> dict:
+    """Hit/miss statistics of the REST response cache and the live news buffer.
+
+    Shows how many tool calls were answered without an API request: cache
+    hits, requests coalesced with an identical one in flight, misses, memory
+    used, plus the state of the WebSocket-fed buffer and its connection.
+    """
+    app = ctx.request_context.lifespan_context
+    return {
+        "success": True,
+        "api_cache": app.api.cache.stats() if app.api.cache is not None else None,
+        "buffer": app.buffer.stats(),
+        "websocket": app.hub.stats(),
+    }
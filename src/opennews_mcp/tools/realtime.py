@@ -4,6 +4,7 @@ from mcp.server.fastmcp import Context
 
 from opennews_mcp.app import mcp
 from opennews_mcp.config import make_serializable
+from opennews_mcp.ws_hub import NewsFilter
 
 
 @mcp.tool()
@@ -17,17 +18,18 @@ async def subscribe_latest_news(
 ) -> dict:
     """Subscribe to real-time news updates via WebSocket.
 
-    Connects to the WebSocket feed, subscribes to news with optional filters,
-    and collects incoming messages for the specified duration.
+    Listens on the server's shared WebSocket connection (opened on first use
+    and kept alive between calls) for news matching the optional filters,
+    until ``max_items`` arrived or ``wait_seconds`` passed in total.
 
     Args:
-        wait_seconds: How long to listen for news (default 10, max 30 seconds).
+        wait_seconds: How long to listen for news in total (default 10, max 30 seconds).
         max_items: Maximum news items to collect (default 5, max 20).
         coins: Comma-separated coin symbols to filter (e.g. "BTC,ETH").
         engine_types: Engine type filter in format "type1:cat1,cat2;type2:cat3".
         has_coin: If true, only receive news that have associated coins.
     """
-    ws = ctx.request_context.lifespan_context.ws
+    hub = ctx.request_context.lifespan_context.hub
     wait_seconds = min(max(1, wait_seconds), 30)
     max_items = min(max(1, max_items), 20)
 
@@ -44,25 +46,15 @@ async def subscribe_latest_news(
                 engine_types_dict[engine] = cat_list
 
     try:
-        sub_result = await ws.subscribe_latest(
-            engine_types=engine_types_dict,
-            coins=coin_list,
-            has_coin=has_coin,
-        )
-
-        items = []
-        for _ in range(max_items):
-            msg = await ws.receive_news(timeout=float(wait_seconds))
-            if msg is None:
-                break
-            items.append(msg)
+        # 共享连接上的一个轻量监听者：整体只等待 wait_seconds，不再逐条计时
+        news_filter = NewsFilter.of(coins=coin_list, engine_types=engine_types_dict, has_coin=has_coin)
+        items = await hub.collect(news_filter, max_items=max_items, timeout=float(wait_seconds))
 
         return make_serializable({
             "success": True,
             "data": items,
             "count": len(items),
+            "connected": hub.connected,
         })
     except Exception as e:
         return {"success": False, "error": str(e) or repr(e)}
-    finally:
-        await ws.close()
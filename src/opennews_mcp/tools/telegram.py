@@ -1,10 +1,10 @@
 """Tool for sending notifications to Telegram."""
 
-import httpx
 from mcp.server.fastmcp import Context
 
 from opennews_mcp.app import mcp
 from opennews_mcp.config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from opennews_mcp.telegram_delivery import telegram_delivery
 
 @mcp.tool()
 async def send_telegram_notification(message: str, ctx: Context) -> str:
@@ -16,19 +16,18 @@ async def send_telegram_notification(message: str, ctx: Context) -> str:
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         return "Error: Telegram is not configured. Please set bot_token and chat_id in config.json."
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "parse_mode": "Markdown"
-    }
+    result = await telegram_delivery.send(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, message,
+                                          parse_mode="Markdown", disable_preview=False)
+    if result.ok:
+        return f"Message sent to Telegram chat {TELEGRAM_CHAT_ID}"
+    if result.status:
+        return f"Failed to send message: HTTP {result.status} - {result.error}"
+    return f"Failed to send message: {result.error}"
 
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.post(url, json=payload, timeout=10.0)
-            resp.raise_for_status()
-            return f"Message sent to Telegram chat {TELEGRAM_CHAT_ID}"
-        except httpx.HTTPStatusError as e:
-            return f"Failed to send message: HTTP {e.response.status_code} - {e.response.text}"
-        except Exception as e:
-            return f"Failed to send message: {str(e)}"
+
+@mcp.tool()
+async def get_telegram_delivery_stats(ctx: Context) -> dict:
+    """Telegram delivery counters: sent / failed / throttled (429) / retries,
+    current and peak queue depth, and send latency percentiles in seconds.
+    """
+    return {"success": True, **telegram_delivery.stats()}
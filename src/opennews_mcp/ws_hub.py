@@ -0,0 +1,236 @@
+"""One shared WebSocket connection for every real-time subscription.
+
+``subscribe_latest_news`` used to connect, subscribe and close a socket per
+call, and concurrent calls overwrote each other's connection. The hub keeps
+a single authenticated connection subscribed to the whole feed and fans
+each pushed item out to lightweight listeners, each with its own filter
+(coins, engine types, has-coin) applied locally. Listening is therefore
+free after the first handshake, any number of tool calls can listen at
+once, and each call waits on one overall deadline.
+
+The connection is opened on the first listener, reconnects with jittered
+exponential backoff, and is closed after ``ws_hub_idle_timeout`` seconds
+without listeners. Every item also goes into the hub's ``NewsBuffer``
+(synced after each connect), and reads from the buffer count as use
+(``touch``), so the news tools keep the feed open while they are called.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from opennews_mcp.api_client import NewsWSClient
+from opennews_mcp.config import API_TOKEN, WS_HUB_IDLE_TIMEOUT, WSS_URL
+from opennews_mcp.news_buffer import NewsBuffer, news_buffer
+from opennews_mcp.news_item import _coin_names
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_BASE = 1.0
+RECONNECT_MAX = 60.0
+RECEIVE_TIMEOUT = 20.0
+# 每个监听者最多缓冲的条目数，消费太慢时丢弃最新的
+LISTENER_QUEUE = 200
+
+
+@dataclass(frozen=True)
+class NewsFilter:
+    """Which pushed items a listener wants; an empty filter matches everything.
+
+    ``engine_types`` maps an engine type to the news types wanted from it
+    (an empty tuple means all of them), like the ``engineTypes`` parameter
+    of ``news.subscribe``.
+    """
+    coins: frozenset = frozenset()
+    engine_types: tuple = ()
+    has_coin: bool = False
+
+    @classmethod
+    def of(cls, coins: list[str] | None = None, engine_types: dict[str, list[str]] | None = None,
+           has_coin: bool = False) -> "NewsFilter":
+        return cls(
+            coins=frozenset(c.upper() for c in coins or []),
+            engine_types=tuple((e, tuple(cats)) for e, cats in (engine_types or {}).items()),
+            has_coin=has_coin,
+        )
+
+    def matches(self, raw: dict) -> bool:
+        if self.coins or self.has_coin:
+            coins = {c.upper() for c in _coin_names(raw.get("coins"))}
+            if self.has_coin and not coins:
+                return False
+            if self.coins and not self.coins & coins:
+                return False
+        if self.engine_types:
+            engine = raw.get("engineType") or raw.get("engine_type")
+            news_type = raw.get("newsType")
+            if not any(engine == e and (not cats or news_type in cats) for e, cats in self.engine_types):
+                return False
+        return True
+
+
+class Listener:
+    """A filtered view of the hub's stream; use as a context manager (``hub.listen``)."""
+
+    def __init__(self, hub: "WSHub", news_filter: NewsFilter):
+        self.hub = hub
+        self.filter = news_filter
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LISTENER_QUEUE)
+
+    def offer(self, raw: dict):
+        if not self.filter.matches(raw):
+            return
+        try:
+            self.queue.put_nowait(raw)
+        except asyncio.QueueFull:
+            self.hub.dropped += 1
+
+    async def __aenter__(self) -> "Listener":
+        self.hub._attach(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.hub._detach(self)
+
+    async def collect(self, max_items: int, timeout: float) -> list[dict]:
+        """Items received until ``max_items`` arrived or ``timeout`` seconds passed in total."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        items: list[dict] = []
+        while len(items) < max_items:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+
+class WSHub:
+    """Single long-lived WebSocket subscription multiplexed to many listeners."""
+
+    def __init__(self, wss_url: str = WSS_URL, token: str = API_TOKEN, idle_timeout: float = WS_HUB_IDLE_TIMEOUT,
+                 buffer: NewsBuffer | None = None):
+        self.wss_url = wss_url
+        self.token = token
+        self.idle_timeout = idle_timeout
+        self.buffer = buffer
+        self._listeners: set[Listener] = set()
+        self._task: asyncio.Task | None = None
+        self._sync: asyncio.Task | None = None
+        self._idle_since = time.monotonic()
+        self.connected = False
+        self.connects = 0
+        self.received = 0
+        self.dropped = 0
+        self.last_error = ""
+
+    def listen(self, news_filter: NewsFilter | None = None) -> Listener:
+        return Listener(self, news_filter or NewsFilter())
+
+    async def collect(self, news_filter: NewsFilter | None = None, max_items: int = 5, timeout: float = 10.0) -> list[dict]:
+        async with self.listen(news_filter) as listener:
+            return await listener.collect(max_items, timeout)
+
+    def _attach(self, listener: Listener):
+        self._listeners.add(listener)
+        self._ensure_running()
+
+    def _detach(self, listener: Listener):
+        self._listeners.discard(listener)
+        if not self._listeners:
+            self._idle_since = time.monotonic()
+
+    def touch(self):
+        """Record a buffer read: keep the connection open (or open it) for another idle period."""
+        if not self._listeners:
+            self._idle_since = time.monotonic()
+        self._ensure_running()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _publish(self, raw: dict):
+        """Hand one pushed item to the buffer and every listener."""
+        self.received += 1
+        if self.buffer is not None:
+            self.buffer.add(raw)
+        for listener in list(self._listeners):
+            listener.offer(raw)
+
+    def _idle(self) -> bool:
+        return not self._listeners and time.monotonic() - self._idle_since >= self.idle_timeout
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            ws = NewsWSClient(self.wss_url, self.token)
+            try:
+                await ws.connect()
+                # 订阅全部新闻，过滤在各监听者本地进行
+                await ws.subscribe_latest()
+                self.connected, self.last_error = True, ""
+                self.connects += 1
+                attempt = 0
+                if self.buffer is not None:
+                    # 补齐断线期间的新闻；期间推送的条目照常进入缓冲
+                    self._sync = asyncio.create_task(self.buffer.sync())
+                while ws.connected:
+                    if self._idle():
+                        logger.info("No WebSocket listeners for %.0fs, closing the hub connection", self.idle_timeout)
+                        return
+                    msg = await ws.receive_news(timeout=RECEIVE_TIMEOUT)
+                    if not isinstance(msg, dict):
+                        continue
+                    data = msg.get("data") if isinstance(msg.get("data"), dict) else msg
+                    if isinstance(data, dict) and ("title" in data or "text" in data):
+                        self._publish(data)
+                raise ConnectionError("WebSocket connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                delay = min(RECONNECT_MAX, RECONNECT_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                logger.warning("WebSocket hub error (%s), reconnecting in %.1fs", self.last_error, delay)
+                await asyncio.sleep(delay)
+                if self._idle():
+                    return
+            finally:
+                self.connected = False
+                if self.buffer is not None:
+                    self.buffer.invalidate()
+                if self._sync is not None:
+                    self._sync.cancel()
+                    self._sync = None
+                try:
+                    await ws.close()
+                except Exception:
+                    pass
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "listeners": len(self._listeners),
+            "connects": self.connects,
+            "received": self.received,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
+
+
+ws_hub = WSHub(buffer=news_buffer)
@@ -1,6 +1,8 @@
+import argparse
 import asyncio
 import os
 import sys
+import time
 from pathlib import Path
 
 # Add project root to sys.path so we can import opennews_mcp
@@ -11,9 +13,23 @@ if str(project_root) not in sys.path:
 
 # Try importing with and without src prefix
 try:
-    from opennews_mcp.tools.aggregator_rss import aggregate_free_news
+    from opennews_mcp.config import MATRIX_BOT_TIMEOUT, MATRIX_CONCURRENCY
+    from opennews_mcp.tools.aggregator_rss import aggregate_free_news, feed_snapshot
+    from opennews_mcp.feed_cache import feed_cache
+    from opennews_mcp.http_pool import http_pool
+    from opennews_mcp.parse_pool import parse_pool
+    from opennews_mcp.seen_store import seen_store
+    from opennews_mcp.source_health import source_health
+    from opennews_mcp.telegram_delivery import telegram_delivery
 except ImportError:
-    from src.opennews_mcp.tools.aggregator_rss import aggregate_free_news
+    from src.opennews_mcp.config import MATRIX_BOT_TIMEOUT, MATRIX_CONCURRENCY
+    from src.opennews_mcp.tools.aggregator_rss import aggregate_free_news, feed_snapshot
+    from src.opennews_mcp.feed_cache import feed_cache
+    from src.opennews_mcp.http_pool import http_pool
+    from src.opennews_mcp.parse_pool import parse_pool
+    from src.opennews_mcp.seen_store import seen_store
+    from src.opennews_mcp.source_health import source_health
+    from src.opennews_mcp.telegram_delivery import telegram_delivery
 
 # --- Configuration Matrix ---
 # Define your bots here. 
@@ -57,45 +73,116 @@ BOT_MATRIX = [
     },
 ]
 
-async def run_matrix():
-    print("🚀 Starting Multi-Bot News Matrix...")
+async def _run_bot(bot_config: dict, out: list[str]) -> str:
+    """Aggregate and push one bot's category; returns its Telegram status."""
+    out.append(f"📂 Category: {bot_config['category']}")
+
+    # Debug: Print Token Masked
+    masked_token = bot_config["bot_token"][:4] + "***" + bot_config["bot_token"][-4:]
+    out.append(f"   🔑 Using Token: {masked_token} | Chat ID: {bot_config['chat_id']}")
+
+    result = await aggregate_free_news(
+        ctx=None,
+        max_items=10,
+        send_to_telegram=True,
+        category=bot_config["category"],
+        bot_token=bot_config["bot_token"],
+        chat_id=bot_config["chat_id"]
+    )
+
+    status = result.get("telegram", "unknown")
+    count = result.get("count", 0)
+    out.append(f"✅ Success. Fetched {count} items. Telegram status: {status}")
+    missed = result.get("missed_sources") or []
+    if missed:
+        out.append(f"   ⏱️  Missed latency budget: {', '.join(missed)}")
+    return status
+
+
+async def _run_oracle(out: list[str]) -> str:
+    # 与矩阵共用同一个进程内的源快照：先知读取的分类不会再次抓取
+    try:
+        from bot_f_oracle import run_oracle
+    except ImportError:
+        from src.bot_f_oracle import run_oracle
+    await run_oracle()
+    return "done"
+
+
+async def _timed(name: str, job, limit: asyncio.Semaphore, timeout: float) -> dict:
+    """Run one bot under the concurrency limit; its errors and timeout stay its own."""
+    out = [f"\n--------------------------------------------------", f"🤖 Running: {name}"]
+    row = {"name": name, "status": "error", "wait": 0.0, "seconds": 0.0}
+    queued = time.monotonic()
+    async with limit:
+        started = time.monotonic()
+        row["wait"] = started - queued
+        try:
+            row["status"] = await asyncio.wait_for(job(out), timeout)
+        except asyncio.TimeoutError:
+            out.append(f"❌ Timed out after {timeout:.0f}s: {name}")
+            row["status"] = "timeout"
+        except Exception as e:
+            out.append(f"❌ Error running {name}: {e}")
+        row["seconds"] = time.monotonic() - started
+    # 并发运行时各机器人的输出整块打印，不互相穿插
+    print("\n".join(out), flush=True)
+    return row
+
+
+async def run_matrix(concurrency: int = MATRIX_CONCURRENCY, timeout: float = MATRIX_BOT_TIMEOUT,
+                     with_oracle: bool = False):
+    print(f"🚀 Starting Multi-Bot News Matrix ({concurrency} bots at a time)...")
     
+    limit = asyncio.Semaphore(max(1, concurrency))
+    jobs = []
     for bot_config in BOT_MATRIX:
         if not bot_config["enabled"]:
             continue
             
-        print(f"\n--------------------------------------------------")
-        print(f"🤖 Running: {bot_config['name']}")
-        print(f"📂 Category: {bot_config['category']}")
-        
         # Skip if credentials missing (demo safety)
         if not bot_config["bot_token"] or not bot_config["chat_id"]:
             print(f"⚠️  Skipping: Missing token or chat_id for {bot_config['name']}")
             print(f"   (Please set environment variables or edit this script)")
             continue
-        
-        # Debug: Print Token Masked
-        masked_token = bot_config["bot_token"][:4] + "***" + bot_config["bot_token"][-4:]
-        print(f"   🔑 Using Token: {masked_token} | Chat ID: {bot_config['chat_id']}")
 
-        try:
-            result = await aggregate_free_news(
-                ctx=None,
-                max_items=10,
-                send_to_telegram=True,
-                category=bot_config["category"],
-                bot_token=bot_config["bot_token"],
-                chat_id=bot_config["chat_id"]
-            )
-            
-            status = result.get("telegram", "unknown")
-            count = result.get("count", 0)
-            print(f"✅ Success. Fetched {count} items. Telegram status: {status}")
-            
-        except Exception as e:
-            print(f"❌ Error running {bot_config['name']}: {e}")
+        jobs.append(_timed(bot_config["name"], lambda out, cfg=bot_config: _run_bot(cfg, out), limit, timeout))
+    if with_oracle:
+        jobs.append(_timed("🔮 Foxtrot-Oracle (先知)", _run_oracle, limit, timeout))
+
+    started = time.monotonic()
+    rows = await asyncio.gather(*jobs)
+    elapsed = time.monotonic() - started
+
+    snap = feed_snapshot.stats()
+    pool = http_pool.stats()
+    parsing = parse_pool.stats()
+    await http_pool.aclose()
+    parse_pool.shutdown()
+    seen_store.close()
 
     print("\n--------------------------------------------------")
+    cache = feed_cache.stats()
+    print(f"📦 Feed snapshot: {snap['fetches']} fetches, {snap['hits']} reused")
+    print(f"💾 HTTP cache: {cache['not_modified']} not modified, {cache['hash_hits']} unchanged bodies, "
+          f"{cache['bytes_saved']} bytes and {cache['parses_saved']} parses saved")
+    print(f"🔌 HTTP pool: {pool['requests']} requests, {pool['retries']} retries "
+          f"({pool['throttled']} throttled), HTTP/2: {'on' if pool['http2'] else 'off'}")
+    print(f"🧵 Parse pool ({parsing['executor']} x{parsing['workers']}): {parsing['jobs']} feeds off-loop, "
+          f"{parsing['inline']} inline")
+    health = source_health.stats()
+    print(f"🩺 Source health: {health['open']} circuit(s) open, {health['skipped']} fetch(es) skipped")
+    for row in source_health.report()[:3]:
+        if row["wasted_seconds"] > 0:
+            print(f"   - {row['source']}: {row['state']}, error rate {row['error_rate']:.0%}, "
+                  f"{row['wasted_seconds']}s wasted ({row['last_error'][:60]})")
+    tg = telegram_delivery.stats()
+    print(f"📨 Telegram: {tg['sent']} sent, {tg['failed']} failed, {tg['throttled']} throttled (429), "
+          f"peak queue {tg['max_queue_depth']}, latency p50 {tg['latency_p50']}s / p95 {tg['latency_p95']}s")
+    if rows:
+        print(f"⏲️  Per-bot timing: {elapsed:.1f}s wall clock, {sum(r['seconds'] for r in rows):.1f}s summed over bots")
+        for r in sorted(rows, key=lambda r: -r["seconds"]):
+            print(f"   - {r['name']}: {r['seconds']:.1f}s (waited {r['wait']:.1f}s for a slot), {r['status']}")
     print("🏁 Matrix Run Complete.")
 
 if __name__ == "__main__":
@@ -103,4 +190,12 @@ if __name__ == "__main__":
     # from dotenv import load_dotenv
     # load_dotenv()
     
-    asyncio.run(run_matrix())
+    parser = argparse.ArgumentParser(description="Run the news bot matrix (bots A-E) concurrently.")
+    parser.add_argument("--concurrency", type=int, default=MATRIX_CONCURRENCY,
+                        help="bots running at the same time (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=MATRIX_BOT_TIMEOUT,
+                        help="seconds before a single bot is abandoned (default: %(default)s)")
+    parser.add_argument("--with-oracle", action="store_true",
+                        help="also run the oracle (bot F) in this process, sharing the feed snapshot")
+    args = parser.parse_args()
+    asyncio.run(run_matrix(args.concurrency, args.timeout, args.with_oracle))
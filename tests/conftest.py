@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# 模块级单例 (seen store / outbox / feed cache) 的路径在导入时确定：测试不碰真实缓存目录
+os.environ.setdefault("OPENNEWS_CACHE_DIR", tempfile.mkdtemp(prefix="opennews-test-"))
@@ -0,0 +1,68 @@
+import httpx
+
+from opennews_mcp.feed_cache import FeedCache, body_hash
+from opennews_mcp.news_item import NewsItem
+
+URL = "https://a.example/rss"
+BODY = b"<rss>...</rss>"
+ITEMS = [NewsItem("First", "https://a.example/1", "a", 200, guid="g1"),
+         NewsItem("Second", "https://a.example/2", "a", 100, guid="g2")]
+
+
+def _headers(**kw) -> httpx.Headers:
+    return httpx.Headers({k.replace("_", "-"): v for k, v in kw.items()})
+
+
+def _stored(tmp_path) -> FeedCache:
+    cache = FeedCache(tmp_path / "cache.json")
+    cache.store("a", URL, _headers(etag='"v1"', last_modified="Sun, 01 Mar 2026 12:00:00 GMT"),
+                body_hash(BODY), len(BODY), ITEMS)
+    return cache
+
+
+def test_unknown_source_has_no_validators_or_items(tmp_path):
+    cache = FeedCache(tmp_path / "cache.json")
+    assert cache.request_headers("a", URL) == {}
+    assert cache.not_modified_items("a", URL) is None
+    assert cache.head_guid("a", URL) is None
+
+
+def test_stored_validators_become_conditional_get_headers(tmp_path):
+    cache = _stored(tmp_path)
+    assert cache.request_headers("a", URL) == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Sun, 01 Mar 2026 12:00:00 GMT"}
+    assert cache.head_guid("a", URL) == "g1"
+    # 源地址改了，旧的校验头和条目都不能再用
+    assert cache.request_headers("a", "https://a.example/feed") == {}
+    assert cache.items("a", "https://a.example/feed") == []
+
+
+def test_not_modified_reuses_items_and_counts_savings(tmp_path):
+    cache = _stored(tmp_path)
+    items = cache.not_modified_items("a", URL)
+    assert [(it.title, it.guid, it.ts) for it in items] == [("First", "g1", 200), ("Second", "g2", 100)]
+    assert cache.stats() == {"not_modified": 1, "hash_hits": 0, "bytes_saved": len(BODY), "parses_saved": 1}
+
+
+def test_unchanged_body_hash_reuses_items_and_refreshes_validators(tmp_path):
+    cache = _stored(tmp_path)
+    assert cache.unchanged_items("a", URL, body_hash(b"<rss>changed</rss>"), _headers()) is None
+
+    items = cache.unchanged_items("a", URL, body_hash(BODY), _headers(etag='"v2"'))
+    assert [it.guid for it in items] == ["g1", "g2"]
+    assert cache.request_headers("a", URL) == {"If-None-Match": '"v2"'}
+    assert cache.stats()["hash_hits"] == 1
+
+
+def test_save_round_trips_through_disk(tmp_path):
+    cache = _stored(tmp_path)
+    cache.save()
+    reloaded = FeedCache(tmp_path / "cache.json")
+    assert reloaded.head_guid("a", URL) == "g1"
+    assert [it.link for it in reloaded.items("a", URL)] == ["https://a.example/1", "https://a.example/2"]
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert FeedCache(path).items("a", URL) == []
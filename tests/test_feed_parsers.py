@@ -0,0 +1,119 @@
+import json
+from datetime import datetime, timezone
+
+from opennews_mcp.feed_parsers import FEED_WINDOW, PARSERS, JsonMapping, parse_feed, plain_summary, register_parser
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel>
+<item><title>Fed holds rates</title><link>https://example.com/a</link>
+<pubDate>Sun, 01 Mar 2026 12:00:00 GMT</pubDate>
+<description>&lt;p&gt;Bitcoin &amp;amp; stocks &lt;b&gt;rally&lt;/b&gt;&lt;/p&gt;</description></item>
+<item><title>ETF flows</title><link>https://example.com/b</link><guid>b-1</guid>
+<content:encoded><![CDATA[<div>Record <i>inflows</i></div>]]></content:encoded></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+<entry><title>Miners sell</title><link href="https://example.com/c"/><id>urn:c</id>
+<updated>2026-03-01T12:00:00Z</updated><summary type="html">&lt;p&gt;Hashprice slump&lt;/p&gt;</summary></entry>
+</feed>"""
+
+RDF = b"""<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"
+ xmlns:dc="http://purl.org/dc/elements/1.1/">
+<item rdf:about="https://example.com/d"><title>Central bank update</title><link>https://example.com/d</link>
+<dc:date>2026-03-01T12:00:00Z</dc:date><description>Policy unchanged</description></item>
+</rdf:RDF>"""
+
+
+def test_rss_items_with_html_descriptions_as_plain_summaries():
+    items, reached = parse_feed(RSS, "rss", "Example")
+    assert not reached
+    assert [(it.title, it.guid, it.summary) for it in items] == [
+        ("Fed holds rates", "https://example.com/a", "Bitcoin & stocks rally"),
+        ("ETF flows", "b-1", "Record inflows"),
+    ]
+    assert items[0].ts == 1772366400
+
+
+def test_atom_and_rdf_summaries():
+    (entry,), _ = parse_feed(ATOM, "atom", "Example")
+    assert (entry.link, entry.guid, entry.summary) == ("https://example.com/c", "urn:c", "Hashprice slump")
+    (item,), _ = parse_feed(RDF, "rdf", "Example")
+    assert (item.guid, item.summary) == ("https://example.com/d", "Policy unchanged")
+
+
+def test_stop_guid_ends_parsing():
+    items, reached = parse_feed(RSS, "rss", "Example", stop_guid="b-1")
+    assert reached and [it.title for it in items] == ["Fed holds rates"]
+
+
+def test_plain_summary_is_bounded():
+    summary = plain_summary("<p>" + "word " * 200 + "</p>", limit=20)
+    assert len(summary) == 20 and summary.startswith("word word")
+    assert plain_summary("") == ""
+
+
+def test_json_mapping_with_alternatives_and_title_cut():
+    mapping = JsonMapping.from_dict({
+        "items": "data.list", "title": "title|content", "link": "url", "time": "ts",
+        "time_format": "epoch_ms", "summary": "content", "title_max": 10,
+    })
+    doc = {"data": {"list": [
+        {"id": 1, "content": "A long flash message about rates", "ts": 1772366400000, "url": "https://e.com/1"},
+        {"id": 2, "title": "Short", "ts": 1772366400000},
+        {"id": 3},
+    ]}}
+    items, _ = parse_feed(json.dumps(doc).encode(), "json", "Flash", mapping)
+    assert [(it.title, it.guid, it.ts) for it in items] == [
+        ("A long fla...", "1", 1772366400),
+        ("Short", "2", 1772366400),
+    ]
+    assert items[0].summary == "A long flash message about rates"
+
+
+def test_registered_parsers_are_used_by_name(monkeypatch):
+    monkeypatch.setitem(PARSERS, "custom", None)
+    register_parser("custom", lambda data, source, mapping, cutoff, stop_guid: ([data.decode()], False))
+    assert parse_feed(b"raw", "custom", "Example") == (["raw"], False)
+
+
+def test_undated_items_get_the_pinned_time_not_the_clock():
+    now = datetime(2020, 1, 2, tzinfo=timezone.utc)
+    pinned = int(now.timestamp())
+    rss = RSS.replace(b"<pubDate>Sun, 01 Mar 2026 12:00:00 GMT</pubDate>", b"<pubDate>garbage</pubDate>")
+    items, _ = parse_feed(rss, "rss", "Example", cutoff=now - FEED_WINDOW)
+    assert [it.ts for it in items] == [pinned, pinned]
+
+    mapping = JsonMapping.from_dict({"time": "t", "time_format": "iso"})
+    doc = json.dumps([{"title": "no time"}, {"title": "bad time", "t": "soon"}]).encode()
+    items, _ = parse_feed(doc, "json", "Flash", mapping, cutoff=now - FEED_WINDOW)
+    assert [it.ts for it in items] == [pinned, pinned]
+
+
+def _rss_at(*hours: int) -> bytes:
+    """RSS feed with one item per entry of ``hours`` (publish hour on 2026-03-01)."""
+    items = "".join(f"<item><title>h{h}</title><guid>g{i}</guid>"
+                    f"<pubDate>Sun, 01 Mar 2026 {h:02d}:00:00 GMT</pubDate></item>"
+                    for i, h in enumerate(hours))
+    return f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+
+
+CUTOFF = datetime(2026, 3, 1, 10, tzinfo=timezone.utc)
+
+
+def test_cutoff_skips_isolated_old_items_but_stops_after_a_stale_run():
+    # 零星的旧条目（乱序的 feed）只被跳过
+    items, _ = parse_feed(_rss_at(12, 9, 11, 8, 9, 11), "rss", "Example", cutoff=CUTOFF)
+    assert [it.title for it in items] == ["h12", "h11", "h11"]
+    # 连续三条早于 cutoff 后不再解析，后面较新的条目也不会出现
+    items, _ = parse_feed(_rss_at(12, 9, 8, 7, 11), "rss", "Example", cutoff=CUTOFF)
+    assert [it.title for it in items] == ["h12"]
+
+
+def test_truncated_feed_keeps_the_items_parsed_so_far():
+    data = _rss_at(12, 11, 10)
+    items, reached = parse_feed(data[:data.index(b"<item>", data.index(b"h11"))] + b"<item><title>cut",
+                                "rss", "Example")
+    assert not reached
+    assert [it.title for it in items] == ["h12", "h11"]
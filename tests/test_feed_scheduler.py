@@ -0,0 +1,83 @@
+import asyncio
+
+from opennews_mcp.feed_scheduler import DEFAULT_INTERVAL, FeedScheduler, SourceSchedule
+from opennews_mcp.news_item import NewsItem
+from opennews_mcp.source_registry import SourceSpec
+
+
+def _spec(name: str, **kw) -> SourceSpec:
+    return SourceSpec.from_dict({"name": name, "url": f"https://{name}.example/rss", **kw})
+
+
+def _items(*stamps: int) -> list[NewsItem]:
+    return [NewsItem(f"t{ts}", f"https://x.example/{ts}", "x", ts, guid=str(ts)) for ts in stamps]
+
+
+class FakeSnapshot:
+    def __init__(self, feeds: list[list[NewsItem]]):
+        self.feeds = feeds
+
+    async def refresh(self, spec):
+        return self.feeds.pop(0)
+
+    def save(self):
+        pass
+
+
+def test_interval_per_source_kind():
+    scheduler = FeedScheduler(
+        [_spec("flash", fast_lane=True), _spec("fixed", poll_interval=90), _spec("blog")],
+        fast_interval=5, min_interval=30, max_interval=3600)
+    s = scheduler.schedules
+    assert (s["flash"].interval, s["fixed"].interval, s["blog"].interval) == (5, 90.0, DEFAULT_INTERVAL)
+    assert [sched.adaptive for sched in s.values()] == [False, False, True]
+
+
+def test_learn_polls_twice_per_publish_gap_within_bounds():
+    sched = SourceSchedule(spec=_spec("wire"), polls=1)
+    # 平均每 600s 一条 -> 300s 轮询一次
+    sched.learn(_items(0, 600, 1200, 1800), min_interval=30, max_interval=3600)
+    assert sched.interval == 300
+    sched.polls = 2
+    # 之后平滑：(300 + 30) / 2，目标被下限截住
+    sched.learn(_items(0, 10, 20), min_interval=30, max_interval=3600)
+    assert sched.interval == 165
+    # 没有新内容时逐步放慢，但不超过上限
+    for _ in range(10):
+        sched.learn([], min_interval=30, max_interval=3600)
+    assert 3000 < sched.interval <= 3600
+
+
+def test_fixed_intervals_are_not_learned():
+    sched = SourceSchedule(spec=_spec("fixed", poll_interval=90), interval=90.0, polls=1)
+    sched.learn(_items(0, 600, 1200), min_interval=30, max_interval=3600)
+    assert sched.interval == 90.0
+
+
+def test_poll_reports_only_items_new_since_the_previous_poll():
+    got = []
+
+    async def on_items(name, items):
+        got.append((name, [it.ts for it in items]))
+
+    snapshot = FakeSnapshot([_items(100, 200), _items(100, 200, 300), _items(200, 300)])
+    scheduler = FeedScheduler([_spec("wire")], on_items=on_items, snapshot=snapshot)
+    sched = scheduler.schedules["wire"]
+
+    async def run():
+        for _ in range(3):
+            await scheduler._poll(sched)
+
+    asyncio.run(run())
+    # 首轮只建立基线；第三轮没有新条目，不回调
+    assert got == [("wire", [300])]
+    assert (sched.polls, sched.new_items) == (3, 1)
+
+
+def test_reloaded_spec_keeps_learned_interval_and_state():
+    scheduler = FeedScheduler([_spec("blog")], min_interval=30, max_interval=3600)
+    old = scheduler.schedules["blog"]
+    old.interval, old.polls = 1234.0, 7
+    new = scheduler._schedule(_spec("blog", label="Blog"), old)
+    assert (new.interval, new.polls) == (1234.0, 7)
+    assert scheduler._schedule(_spec("blog", fast_lane=True), old).interval == scheduler.fast_interval
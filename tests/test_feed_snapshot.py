@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+
+from opennews_mcp.source_registry import SourceSpec
+from opennews_mcp.tools.aggregator_rss import FeedSnapshot
+
+NOW = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+
+
+def _rss(*titles: str) -> bytes:
+    items = "".join(
+        f"<item><title>{t}</title><link>https://example.com/{i}</link>"
+        f"<pubDate>{format_datetime(NOW - timedelta(minutes=i))}</pubDate></item>"
+        for i, t in enumerate(titles)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+
+
+class FakePool:
+    """Stands in for ``HttpPool``: serves a fixed body per URL after its delay and counts requests."""
+
+    def __init__(self, bodies: dict[str, bytes], delay: dict[str, float] | None = None):
+        self.bodies = bodies
+        self.delay = delay or {}
+        self.requests: dict[str, int] = {}
+
+    async def get(self, url, on_send=None, **kwargs):
+        self.requests[url] = self.requests.get(url, 0) + 1
+        if on_send is not None:
+            on_send()
+        await asyncio.sleep(self.delay.get(url, 0.0))
+        return httpx.Response(200, content=self.bodies[url], request=httpx.Request("GET", url))
+
+
+def _spec(name: str) -> SourceSpec:
+    return SourceSpec.from_dict({"name": name, "url": f"https://{name}.example/rss"})
+
+
+def _snapshot(pool, ttl=60.0) -> FeedSnapshot:
+    return FeedSnapshot(ttl=ttl, cache=None, pool=pool, health=None, now=NOW)
+
+
+A, B = _spec("a"), _spec("b")
+BODIES = {A.url: _rss("A one", "A two"), B.url: _rss("B one")}
+
+
+def test_categories_in_one_cycle_share_one_fetch_per_source():
+    pool = FakePool(BODIES, delay={A.url: 0.01, B.url: 0.01})
+    snap = _snapshot(pool)
+
+    async def run():
+        # 两个分类同时读取重叠的源：进行中的抓取被共享，之后命中快照
+        first, second = await asyncio.gather(snap.get([A, B]), snap.get([A]))
+        third = await snap.get([B])
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert [it.title for it in first] == ["A one", "A two", "B one"]
+    assert [it.title for it in second] == ["A one", "A two"]
+    assert [it.title for it in third] == ["B one"]
+    assert pool.requests == {A.url: 1, B.url: 1}
+    assert (snap.fetches, snap.hits) == (2, 2)
+
+
+def test_expired_or_invalidated_sources_are_fetched_again():
+    pool = FakePool(BODIES)
+    snap = _snapshot(pool, ttl=0.0)
+
+    async def run():
+        await snap.get([A])
+        await snap.get([A])
+        snap.ttl = 60.0
+        snap.invalidate()
+        await snap.get([A])
+        await snap.get([A])
+
+    asyncio.run(run())
+    assert pool.requests == {A.url: 3}
+
+
+def test_stream_yields_cached_sources_first_and_reports_missed_ones():
+    pool = FakePool(BODIES, delay={A.url: 0.0, B.url: 5.0})
+    snap = _snapshot(pool)
+
+    async def run():
+        await snap.refresh(A)
+        missed: list[str] = []
+        loop = asyncio.get_running_loop()
+        got = [spec.name async for spec, _ in snap.stream([B, A], deadline=loop.time() + 0.05, missed=missed)]
+        return got, missed
+
+    got, missed = asyncio.run(run())
+    assert got == ["a"]
+    assert missed == ["b"]
@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+
+from opennews_mcp.http_pool import MAX_RETRY_WAIT, HttpPool, retry_after
+
+
+def _attach(pool: HttpPool, handler):
+    # 在当前事件循环上挂一个走 MockTransport 的客户端，其余逻辑照常
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    pool._loop = asyncio.get_running_loop()
+
+
+def test_retry_after_sources():
+    req = httpx.Request("GET", "https://x.example")
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "3"}, request=req)) == 3.0
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 < retry_after(httpx.Response(503, headers={"Retry-After": when}, request=req)) <= 60
+    # Telegram 把等待秒数放在 JSON 正文里
+    body = httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 7}}, request=req)
+    assert retry_after(body) == 7.0
+    assert retry_after(httpx.Response(429, request=req)) is None
+
+
+def test_per_host_semaphores_cap_concurrency_per_host():
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200)
+
+    pool = HttpPool(per_host=2, host_limits={"rsshub.app": 1}, http2=False)
+
+    async def run():
+        _attach(pool, handler)
+        urls = [f"https://{h}/{i}" for h in ("www.rsshub.app", "other.example") for i in range(4)]
+        await asyncio.gather(*(pool.get(u) for u in urls))
+        await pool.aclose()
+
+    asyncio.run(run())
+    # 父域限制同样作用于子域
+    assert peak == {"www.rsshub.app": 1, "other.example": 2}
+    assert pool.requests == 8
+
+
+def test_429_is_retried_after_the_requested_wait():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.05"})
+        return httpx.Response(200)
+
+    pool = HttpPool(http2=False)
+    sends = []
+
+    async def run():
+        _attach(pool, handler)
+        loop = asyncio.get_running_loop()
+        resp = await pool.get("https://api.example/x", on_send=lambda: sends.append(loop.time()))
+        await pool.aclose()
+        return resp
+
+    resp = asyncio.run(run())
+    assert resp.status_code == 200
+    assert len(sends) == 2 and sends[1] - sends[0] >= 0.05
+    assert pool.stats() == {"requests": 2, "retries": 1, "throttled": 1, "http2": False}
+
+
+def test_long_waits_and_exhausted_retries_return_the_response():
+    pool = HttpPool(http2=False)
+
+    async def run():
+        _attach(pool, lambda request: httpx.Response(503, headers={"Retry-After": str(MAX_RETRY_WAIT + 1)}))
+        resp = await pool.get("https://api.example/x")
+        await pool.aclose()
+        return resp
+
+    assert asyncio.run(run()).status_code == 503
+    assert pool.retries == 0
+
+    pool = HttpPool(http2=False)
+
+    async def run_exhausted():
+        _attach(pool, lambda request: httpx.Response(429, headers={"Retry-After": "0"}))
+        resp = await pool.get("https://api.example/x", retries=2)
+        await pool.aclose()
+        return resp
+
+    assert asyncio.run(run_exhausted()).status_code == 429
+    assert (pool.requests, pool.retries) == (3, 2)
+
+
+def test_long_poll_does_not_hold_a_host_slot():
+    release = None
+
+    async def handler(request):
+        if request.url.path == "/getUpdates":
+            await release.wait()
+        return httpx.Response(200)
+
+    pool = HttpPool(per_host=1, http2=False)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        _attach(pool, handler)
+        poll = asyncio.create_task(pool.get("https://api.telegram.org/getUpdates", long_poll=True))
+        await asyncio.sleep(0)
+        # 长轮询挂起期间，普通请求照常拿到唯一的槽位
+        send = await asyncio.wait_for(pool.post("https://api.telegram.org/sendMessage"), 1.0)
+        release.set()
+        await poll
+        await pool.aclose()
+        return send
+
+    assert asyncio.run(run()).status_code == 200
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from opennews_mcp.ingest_queue import BLOCK, DROP_NEWEST, DROP_OLDEST, BurstDetector, IngestQueue
+
+
+def _fill(policy: str, n: int, maxsize: int = 3) -> tuple[IngestQueue, list]:
+    async def run():
+        queue = IngestQueue(maxsize, policy)
+        for i in range(n):
+            await queue.put(i)
+        return queue, [await queue.get() for _ in range(len(queue))]
+
+    return asyncio.run(run())
+
+
+def test_drop_oldest_keeps_the_newest_messages():
+    queue, got = _fill(DROP_OLDEST, 5)
+    assert got == [2, 3, 4]
+    stats = queue.stats()
+    assert (stats["received"], stats["dropped"], stats["max_depth"], stats["depth"]) == (5, 2, 3, 0)
+
+
+def test_drop_newest_keeps_the_backlog():
+    queue, got = _fill(DROP_NEWEST, 5)
+    assert got == [0, 1, 2]
+    assert queue.dropped == 2
+
+
+def test_block_waits_for_room_and_loses_nothing():
+    async def run():
+        queue = IngestQueue(2, BLOCK)
+        await queue.put(0)
+        await queue.put(1)
+        writer = asyncio.create_task(queue.put(2))
+        await asyncio.sleep(0.02)
+        # 队列满时写入方停下，直到读出一条
+        assert not writer.done()
+        first = await queue.get()
+        await writer
+        return queue, [first, await queue.get(), await queue.get()]
+
+    queue, got = asyncio.run(run())
+    assert got == [0, 1, 2]
+    assert queue.dropped == 0 and queue.blocked >= 0.01
+
+
+def test_replayed_items_are_read_first_and_never_dropped():
+    async def run():
+        queue = IngestQueue(2)
+        await queue.put("live-1")
+        queue.replay(f"old-{i}" for i in range(4))
+        queue.replay([])
+        await queue.put("live-2")
+        return queue, [await queue.get() for _ in range(len(queue))]
+
+    queue, got = asyncio.run(run())
+    assert got == ["old-0", "old-1", "old-2", "old-3", "live-1", "live-2"]
+    assert (queue.replayed, queue.dropped) == (4, 0)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError, match="drop_oldest"):
+        IngestQueue(10, "drop_random")
+
+
+def test_burst_mode_has_hysteresis():
+    burst = BurstDetector(rate_per_minute=10, window=60, exit_ratio=0.5)
+    # 1 分钟内 9 条：未到阈值
+    assert not any(burst.tick(float(t)) for t in range(9))
+    assert burst.tick(9.0) and burst.bursts == 1
+    # 63.5s 时窗口内剩 4..9 共 6 条：低于进入阈值，仍高于退出阈值 (5/min)，保持
+    assert burst.update(63.5) and burst.rate(63.5) == 6
+    # 65.5s 时只剩 4 条，退出
+    assert not burst.update(65.5)
+    assert burst.bursts == 1
+
+
+def test_zero_rate_disables_bursts():
+    burst = BurstDetector(rate_per_minute=0)
+    assert not any(burst.tick(t / 10) for t in range(100))
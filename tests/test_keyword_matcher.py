@@ -0,0 +1,51 @@
+import pytest
+
+from opennews_mcp.keyword_matcher import KeywordMatcher
+
+
+@pytest.fixture
+def matcher():
+    return KeywordMatcher({
+        "default": {"fed": 2, "missile*": 1, "etf": 1},
+        "crypto": {"bitcoin": 3, "etf": 2},
+        "china": {"央行": 2},
+    })
+
+
+def _terms(matcher, text, category="all"):
+    return [m.term for m in matcher.find(text, category)]
+
+
+@pytest.mark.parametrize("text", ["FedEx ships parcels", "Bonds offered at par", "federal budget"])
+def test_latin_terms_respect_word_boundaries(matcher, text):
+    assert _terms(matcher, text) == []
+
+
+def test_matches_are_case_insensitive_with_positions(matcher):
+    (match,) = matcher.find("The FED holds", "default")
+    assert (match.start, match.end, match.term, match.weight) == (4, 7, "fed", 2.0)
+
+
+def test_prefix_terms(matcher):
+    assert _terms(matcher, "Missiles launched") == ["missile"]
+    assert _terms(matcher, "A missile test") == ["missile"]
+    assert _terms(matcher, "antimissile shield") == []
+
+
+def test_cjk_terms_match_anywhere_and_next_to_latin(matcher):
+    assert _terms(matcher, "中国人民央行降准") == ["央行"]
+    assert _terms(matcher, "ETF上市") == ["etf"]
+
+
+def test_category_sets_extend_and_override_default(matcher):
+    assert matcher.score("Bitcoin ETF approved by Fed", "crypto")[0] == 3 + 2 + 2
+    assert matcher.score("Bitcoin ETF approved by Fed", "default")[0] == 1 + 2
+    assert matcher.score("Bitcoin ETF approved by Fed", "unknown")[0] == 1 + 2
+    # all: 每个词取各词表中的最高权重
+    assert matcher.score("Bitcoin ETF approved by Fed")[0] == 3 + 2 + 2
+
+
+def test_score_counts_each_term_once(matcher):
+    score, matches = matcher.score("fed, fed and the fed", "default")
+    assert score == 2.0
+    assert len(matches) == 3
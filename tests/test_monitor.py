@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from opennews_mcp import monitor
+from opennews_mcp.ingest_queue import BurstDetector, IngestQueue
+
+
+class FakeClient:
+    def __init__(self, token=None):
+        pass
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def small_ingest(monkeypatch):
+    ingest = IngestQueue(3)
+    burst = BurstDetector(5)
+    monkeypatch.setattr(monitor, "ingest", ingest)
+    monkeypatch.setattr(monitor, "burst", burst)
+    monkeypatch.setattr(monitor, "NewsAPIClient", FakeClient)
+    return ingest, burst
+
+
+def test_backfill_longer_than_the_queue_loses_nothing(small_ingest, monkeypatch):
+    ingest, burst = small_ingest
+    rows = [{"id": i, "title": f"gap {i}"} for i in range(20)]
+
+    async def fetch_since(client, since, last_id=None):
+        return rows
+
+    monkeypatch.setattr(monitor, "fetch_since", fetch_since)
+
+    async def run():
+        await ingest.put({"id": "live-0"})
+        await monitor.backfill_gap(0)
+        # 重放期间实时消息照常入队，满了按 drop_oldest 丢的也只是实时消息
+        for i in range(1, 5):
+            await ingest.put({"id": f"live-{i}"})
+        return [(await ingest.get())["id"] for _ in range(len(ingest))]
+
+    got = asyncio.run(run())
+    assert got[:20] == list(range(20))
+    assert got[20:] == ["live-2", "live-3", "live-4"]
+    assert ingest.stats()["replayed"] == 20
+    # 重放的旧文章不算入接收速率，不会触发摘要模式
+    assert burst.rate() == 0 and not burst.active
+
+
+def test_replay_wakes_a_waiting_reader(small_ingest):
+    ingest, _ = small_ingest
+
+    async def run():
+        reader = asyncio.ensure_future(ingest.get())
+        await asyncio.sleep(0)
+        ingest.replay([{"id": 1}])
+        item = await asyncio.wait_for(reader, 1)
+        return item, len(ingest)
+
+    assert asyncio.run(run()) == ({"id": 1}, 0)
@@ -0,0 +1,75 @@
+import asyncio
+
+from opennews_mcp.news_backfill import fetch_range, fetch_since
+
+BASE = 1_700_000_000
+
+
+def _raw(i, ts=None):
+    return {"id": i, "ts": (BASE + (i if ts is None else ts)) * 1000, "text": f"news {i}"}
+
+
+class FakeAPI:
+    """Pages ``rows`` (newest first); ``inserted`` rows are published in front of them after page 1."""
+
+    def __init__(self, rows, inserted=()):
+        self.rows = list(rows)
+        self.inserted = list(inserted)
+        self.pages = 0
+
+    async def search_news(self, limit, page):
+        self.pages += 1
+        if page == 2 and self.inserted:
+            self.rows = self.inserted + self.rows
+        return {"data": self.rows[(page - 1) * limit: page * limit]}
+
+
+def _fetch(api, since, last_id=None, max_pages=10, page_size=5):
+    return asyncio.run(fetch_range(api, since, last_id, max_pages, page_size))
+
+
+def test_pages_back_to_since_and_returns_oldest_first():
+    api = FakeAPI([_raw(i) for i in range(30, 0, -1)])
+    items, reached = _fetch(api, BASE + 18)
+    assert reached
+    assert [raw["id"] for raw in items] == list(range(18, 31))
+    # 第 3 页已跨过 since，不再往后翻
+    assert api.pages == 3
+
+
+def test_stops_at_the_last_received_id():
+    api = FakeAPI([_raw(i) for i in range(30, 0, -1)])
+    items, reached = _fetch(api, BASE, last_id="24")
+    ids = [raw["id"] for raw in items]
+    # last_id 之后不再翻页；同一页上更旧的条目作为重叠保留，由 seen store 去重
+    assert reached and api.pages == 2
+    assert 24 not in ids and ids[-6:] == list(range(25, 31))
+    assert ids == sorted(ids) and min(ids) >= 21
+
+
+def test_page_cap_reports_the_gap_as_not_reached():
+    api = FakeAPI([_raw(i) for i in range(30, 0, -1)])
+    items, reached = _fetch(api, BASE, max_pages=2)
+    assert not reached
+    assert [raw["id"] for raw in items] == list(range(21, 31))
+    assert asyncio.run(fetch_since(FakeAPI([_raw(i) for i in range(30, 0, -1)]), BASE, max_pages=2, page_size=5)) == items
+
+
+def test_short_last_page_means_the_feed_has_no_more_history():
+    items, reached = _fetch(FakeAPI([_raw(i) for i in range(7, 0, -1)]), BASE - 100)
+    assert reached and len(items) == 7
+
+
+def test_items_pushed_to_the_next_page_are_not_repeated():
+    # 翻到第 2 页前发布了两条新文章，第 1 页的末尾两条被挤到第 2 页
+    api = FakeAPI([_raw(i) for i in range(30, 0, -1)], inserted=[_raw(32), _raw(31)])
+    items, _ = _fetch(api, BASE + 22)
+    ids = [raw["id"] for raw in items]
+    assert len(ids) == len(set(ids))
+    assert ids == list(range(22, 31))
+
+
+def test_undated_and_malformed_rows_are_skipped():
+    rows = [_raw(5), {"id": 4, "text": "no time"}, "garbage", _raw(3), _raw(1)]
+    items, reached = _fetch(FakeAPI(rows), BASE + 2)
+    assert reached and [raw["id"] for raw in items] == [3, 5]
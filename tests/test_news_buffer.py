@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from opennews_mcp.news_buffer import NewsBuffer, make_cursor, parse_cursor
+
+BASE = 1_700_000_000
+
+
+def _raw(i, ts=None):
+    # 每三条共用同一秒的发布时间，API 时间是毫秒
+    return {"id": i, "ts": (BASE + (i // 3 if ts is None else ts)) * 1000, "text": f"news {i}"}
+
+
+class FakeAPI:
+    def __init__(self, rows):
+        self.rows = rows  # 最新在前，和 /open/news_search 一样
+
+    async def search_news(self, limit, page):
+        return {"data": self.rows[(page - 1) * limit: page * limit], "total": len(self.rows)}
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def buffer():
+    buf = NewsBuffer(capacity=0, client=FakeAPI([]))
+    buf.capacity = 20
+    for i in range(30):
+        buf.add(_raw(i))
+    buf.live = True
+    return buf
+
+
+def _ids(items):
+    return [raw["id"] for raw in items]
+
+
+def _read_all(buffer, cursor, limit):
+    ids = []
+    while True:
+        items, cursor, more = buffer.since(cursor, 0, limit)
+        ids += _ids(items)
+        if not more:
+            return ids, cursor
+
+
+def test_cursor_round_trip():
+    cursor = make_cursor("b00t", 7, BASE, [3, 1, 2])
+    assert parse_cursor(cursor) == ("b00t", 7, BASE, frozenset({"1", "2", "3"}))
+    with pytest.raises(ValueError):
+        parse_cursor("garbage")
+
+
+def test_head_cursor_then_new_items_by_sequence(buffer):
+    cursor = buffer.head_cursor()
+    buffer.add(_raw(30))
+    # 晚到的条目发布时间更早，按序号仍然能读到
+    buffer.add(_raw(31, ts=5))
+    items, cursor, more = buffer.since(cursor, 0, 10)
+    assert (_ids(items), more) == ([30, 31], False)
+    assert buffer.since(cursor, 0, 10)[0] == []
+
+
+def test_foreign_cursor_resumes_strictly_after_boundary_ids(buffer):
+    # 另一个进程的游标：已返回 id 19 (第 6 秒)，同一秒的 18、20 还没有
+    cursor = make_cursor("other", 99, BASE + 6, [19])
+    ids, cursor = _read_all(buffer, cursor, limit=2)
+    assert sorted(ids) == [18, 20, *range(21, 30)]
+    assert len(ids) == len(set(ids))
+    _, seq, ts, boundary = parse_cursor(cursor)
+    assert (ts, boundary) == (BASE + 9, {"27", "28", "29"})
+    assert buffer.since(cursor, 0, 10)[0] == []
+
+
+def test_since_timestamp_without_cursor(buffer):
+    items, _, more = buffer.since(None, BASE + 8, 10)
+    assert (sorted(_ids(items)), more) == ([24, 25, 26, 27, 28, 29], False)
+
+
+def test_positions_outside_the_window_go_to_rest(buffer):
+    assert buffer.since(None, BASE, 10) is None
+    evicted = make_cursor(buffer.boot, 1, BASE, [0])
+    assert buffer.since(evicted, 0, 10) is None
+    buffer.invalidate()
+    assert buffer.since(buffer.head_cursor(), BASE + 8, 10) is None
+
+
+def test_sync_backfills_the_gap_after_a_reconnect(buffer):
+    newer = [_raw(i) for i in range(45, 29, -1)]
+    buffer.client = FakeAPI(newer + [_raw(i) for i in range(29, -1, -1)])
+    buffer.invalidate()
+    asyncio.run(buffer.sync())
+    assert buffer.live
+    assert sorted(_ids(buffer.latest(16))) == list(range(30, 46))
+
+
+class _Context:
+    """Just enough of an MCP context for the news tools (by default the buffer cannot answer, REST does)."""
+
+    def __init__(self, api, buffer=None):
+        buffer = buffer or NewsBuffer(client=api)
+        hub = type("Hub", (), {"touch": lambda self: None})()
+        app = type("App", (), {"api": api, "buffer": buffer, "hub": hub})()
+        self.request_context = type("Request", (), {"lifespan_context": app})()
+
+
+def test_rest_fallback_neither_repeats_nor_skips_same_second_articles():
+    from opennews_mcp.tools.news import get_news_since
+
+    ctx = _Context(FakeAPI([_raw(i) for i in range(29, -1, -1)]))
+    cursor, ids = make_cursor("", 0, BASE + 6, [19]), []
+    while True:
+        answer = asyncio.run(get_news_since(ctx, cursor=cursor, limit=2))
+        assert answer["success"] and not answer["truncated"]
+        ids += _ids(answer["data"])
+        cursor = answer["next_cursor"]
+        if not answer["more"]:
+            break
+    assert sorted(ids) == [18, 20, *range(21, 30)]
+    assert len(ids) == len(set(ids))
+    assert asyncio.run(get_news_since(ctx, cursor=cursor))["data"] == []
+
+
+def test_rest_fallback_flags_gaps_longer_than_the_backfill(monkeypatch):
+    from opennews_mcp.tools import news
+
+    original = news.fetch_range
+    monkeypatch.setattr(news, "fetch_range", lambda client, since: original(client, since, max_pages=1, page_size=5))
+    ctx = _Context(FakeAPI([_raw(i) for i in range(29, -1, -1)]))
+    answer = asyncio.run(news.get_news_since(ctx, since=BASE, limit=3))
+    assert answer["truncated"] and answer["more"]
+    # 游标只推进到实际返回的最后一条
+    _, _, ts, boundary = parse_cursor(answer["next_cursor"])
+    assert (ts, boundary) == (BASE + 9, {str(answer["data"][-1]["id"])})
+    rest = asyncio.run(news.get_news_since(ctx, cursor=answer["next_cursor"], limit=3))
+    assert not rest["truncated"] and not rest["more"]
+    assert len(set(_ids(answer["data"]) + _ids(rest["data"]))) == 5
+
+
+def test_latest_news_from_the_buffer_reports_the_api_total():
+    from opennews_mcp.tools.news import get_latest_news
+
+    api = FakeAPI([_raw(i) for i in range(29, -1, -1)])
+    buffer = NewsBuffer(client=api)
+    asyncio.run(buffer.sync())
+    for i in range(30, 40):
+        buffer.add(_raw(i))
+    answer = asyncio.run(get_latest_news(_Context(api, buffer), limit=5))
+    assert _ids(answer["data"])[0] == 39
+    # API 的文章总数，而不是本进程收到的推送条数
+    assert answer["total"] == 30
@@ -0,0 +1,51 @@
+import json
+import os
+import pickle
+
+from opennews_mcp import source_registry
+from opennews_mcp.news_item import NewsItem, Story
+from opennews_mcp.source_registry import SourceRegistry
+
+
+def _write(path, priority):
+    path.write_text(json.dumps({"sources": [
+        {"name": "Example Wire", "label": "Example", "url": "https://example.com/rss", "priority": priority},
+    ]}), encoding="utf-8")
+
+
+def test_rank_follows_a_registry_reload(tmp_path, monkeypatch):
+    path = tmp_path / "sources.json"
+    _write(path, 3)
+    registry = SourceRegistry(path, check_interval=0)
+    monkeypatch.setattr(source_registry, "registry", registry)
+    item = NewsItem("Fed holds rates", "https://example.com/a", "Example", 1)
+    assert item.rank == 3
+
+    _write(path, 1)
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert registry.maybe_reload()
+    # 跨轮询保留的条目也使用新的优先级
+    assert item.rank == 1
+
+
+def test_pickle_round_trip_keeps_fields_only():
+    item = NewsItem("Fed holds rates", "https://example.com/a", "Example", 1700000000, "g1", "summary", {"coins": ["BTC"]})
+    item.dedup_key
+    clone = pickle.loads(pickle.dumps(item))
+    assert clone.to_dict() == item.to_dict()
+    assert clone.dedup_key == item.dedup_key
+
+
+def test_story_keeps_sources_and_related_through_pickle():
+    member = NewsItem("Fed holds rates steady", "https://example.com/b", "Other", 1700000001)
+    story = Story.of(NewsItem("Fed holds rates", "https://example.com/a", "Example", 1700000000),
+                     ["Example", "Other"], 2.0, [member])
+    clone = pickle.loads(pickle.dumps(story))
+    assert (clone.sources, clone.score, [m.title for m in clone.related]) == (["Example", "Other"], 2.0,
+                                                                                ["Fed holds rates steady"])
+
+
+def test_from_dict_reads_legacy_time_field():
+    item = NewsItem.from_dict({"title": "Old cache", "link": "", "source": "Example", "time": 1700000000.5})
+    assert item.ts == 1700000000
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from opennews_mcp.outbox import DEAD, PENDING, SENT, Outbox
+from opennews_mcp.telegram_delivery import Delivery
+
+TOKEN = "123:secret"
+
+
+class FakeDelivery:
+    """Records sends; answers with the status configured per text (200 by default)."""
+
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.sent: list[tuple[str, str]] = []
+
+    async def send(self, token, chat, text, parse_mode=None, disable_preview=True):
+        await asyncio.sleep(0)
+        status = self.statuses.get(text, 200)
+        if status != 200:
+            return Delivery(False, status, f"HTTP {status}")
+        self.sent.append((chat, text))
+        return Delivery(True, 200)
+
+
+@pytest.fixture
+def delivery():
+    return FakeDelivery()
+
+
+@pytest.fixture
+def box(tmp_path, delivery):
+    box = Outbox(tmp_path / "outbox.sqlite3", delivery)
+    yield box
+    box.close()
+
+
+def _sent_to(delivery, chat):
+    return [text for c, text in delivery.sent if c == chat]
+
+
+def test_drain_sends_each_chat_in_order(box, delivery):
+    for i in range(3):
+        box.enqueue(TOKEN, 1, f"a{i}")
+        box.enqueue(TOKEN, 2, f"b{i}")
+    assert asyncio.run(box.drain(timeout=5)) == 0
+    assert _sent_to(delivery, "1") == ["a0", "a1", "a2"]
+    assert _sent_to(delivery, "2") == ["b0", "b1", "b2"]
+    assert box.stats()["pending"] == 0
+
+
+def test_enqueue_is_idempotent_per_key(box, delivery):
+    first = box.enqueue(TOKEN, 1, "hello", key="ws:1")
+    assert first is not None
+    assert box.enqueue(TOKEN, 1, "hello again", key="ws:1") is None
+    asyncio.run(box.drain(timeout=5))
+    # 已发送的键在 TTL 内仍然去重
+    assert box.enqueue(TOKEN, 1, "hello", key="ws:1") is None
+    assert delivery.sent == [("1", "hello")]
+    assert box.state([first]) == {first: SENT}
+    assert box.duplicates == 2
+
+
+def test_transient_failure_holds_back_its_chat_only(box, delivery):
+    delivery.statuses["stuck"] = 502
+    stuck = box.enqueue(TOKEN, 1, "stuck")
+    behind = box.enqueue(TOKEN, 1, "behind")
+    box.enqueue(TOKEN, 2, "other")
+    assert asyncio.run(box.drain(timeout=0.5)) == 2
+    assert delivery.sent == [("2", "other")]
+    assert box.state([stuck, behind]) == {stuck: PENDING, behind: PENDING}
+
+
+def test_permanent_failure_is_dead_and_unblocks_the_chat(box, delivery):
+    delivery.statuses["bad"] = 400
+    bad = box.enqueue(TOKEN, 1, "bad")
+    box.enqueue(TOKEN, 1, "good")
+    assert asyncio.run(box.drain(timeout=5)) == 0
+    assert delivery.sent == [("1", "good")]
+    assert box.state([bad]) == {bad: DEAD}
+
+
+def test_pending_messages_survive_a_restart(tmp_path, delivery):
+    path = tmp_path / "outbox.sqlite3"
+    first = Outbox(path, delivery)
+    first.enqueue(TOKEN, 1, "queued before the crash")
+    first.close()
+
+    second = Outbox(path, delivery)
+    try:
+        # 行里只有 bot id：新进程要先知道 token 才能发送
+        assert asyncio.run(second.drain(timeout=0.2)) == 0
+        assert delivery.sent == []
+        second.register(TOKEN)
+        assert asyncio.run(second.drain(timeout=5)) == 0
+        assert delivery.sent == [("1", "queued before the crash")]
+    finally:
+        second.close()
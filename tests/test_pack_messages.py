@@ -0,0 +1,42 @@
+import pytest
+
+from opennews_mcp.telegram_delivery import CLIP_MARKER, clip, pack_messages, utf16_len
+
+
+def test_utf16_len_counts_astral_characters_twice():
+    assert utf16_len("abc") == 3
+    assert utf16_len("新闻") == 2
+    assert utf16_len("🚀") == 2
+
+
+def test_packs_in_order_without_splitting_parts():
+    parts = ["a" * 4, "b" * 4, "c" * 4, "d" * 4]
+    packets = pack_messages(parts, limit=9)
+    assert [p.text for p in packets] == ["aaaa\nbbbb", "cccc\ndddd"]
+    assert [p.parts for p in packets] == [range(0, 2), range(2, 4)]
+
+
+def test_limit_is_measured_in_utf16_code_units():
+    parts = ["🚀" * 3, "🚀" * 3]
+    # 每条 6 个 UTF-16 单元：两条加分隔符是 13，按 Python 字符数只有 7
+    assert len(pack_messages(parts, limit=12)) == 2
+    assert len(pack_messages(parts, limit=13)) == 1
+
+
+def test_header_and_footer_frame_every_message():
+    packets = pack_messages(["x" * 5] * 3, limit=16, header="H", footer="F")
+    assert [p.text for p in packets] == ["H\nxxxxx\nxxxxx\nF", "H\nxxxxx\nF"]
+    assert all(utf16_len(p.text) <= 16 for p in packets)
+
+
+def test_oversized_part_is_clipped_without_breaking_surrogate_pairs():
+    (packet,) = pack_messages(["🚀" * 10], limit=11)
+    assert packet.text.endswith(CLIP_MARKER)
+    assert utf16_len(packet.text) <= 11
+    packet.text.encode("utf-16-le").decode("utf-16-le")
+    assert clip("🚀" * 10, 11) == packet.text
+
+
+def test_frame_larger_than_limit_raises():
+    with pytest.raises(ValueError):
+        pack_messages(["x"], limit=4, header="HEAD", footer="F")
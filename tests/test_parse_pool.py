@@ -0,0 +1,64 @@
+import asyncio
+import os
+import threading
+
+from opennews_mcp.parse_pool import ParsePool
+
+
+def _thread_name() -> str:
+    return threading.current_thread().name
+
+
+def test_thread_mode_runs_jobs_on_worker_threads():
+    pool = ParsePool("thread", workers=2)
+
+    async def run():
+        return await pool.run(_thread_name), await pool.run(_thread_name, inline=True)
+
+    try:
+        worker, inline = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    # 小 feed 传 inline=True 时留在事件循环线程
+    assert worker.startswith("feed-worker") and inline == threading.current_thread().name
+    stats = pool.stats()
+    assert (stats["executor"], stats["workers"], stats["jobs"], stats["inline"]) == ("thread", 2, 1, 1)
+
+
+def test_inline_mode_never_hands_off():
+    pool = ParsePool("inline", workers=2)
+
+    async def run():
+        return await pool.run(_thread_name), await pool.run_threaded(_thread_name)
+
+    assert asyncio.run(run()) == (threading.current_thread().name,) * 2
+    assert (pool.jobs, pool.inline) == (0, 2)
+
+
+def test_process_mode_parses_in_workers_but_filters_on_threads():
+    pool = ParsePool("process", workers=1)
+
+    async def run():
+        return await pool.run(os.getpid), await pool.run_threaded(_thread_name)
+
+    try:
+        pid, thread = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert pid != os.getpid()
+    assert thread.startswith("feed-worker")
+    assert pool.jobs == 2
+
+
+def test_unknown_kind_falls_back_to_threads_and_survives_shutdown():
+    pool = ParsePool("fibers", workers=1)
+    assert pool.kind == "thread"
+
+    async def run():
+        return await pool.run(sum, [1, 2, 3])
+
+    assert asyncio.run(run()) == 6
+    pool.shutdown()
+    # 关闭后再用会重新建线程池
+    assert asyncio.run(run()) == 6
+    pool.shutdown()
@@ -0,0 +1,139 @@
+import asyncio
+
+from opennews_mcp.response_cache import ResponseCache
+
+
+class Counter:
+    """A fetch returning ``limit`` rows after an optional delay, counting its calls."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self, limit):
+        async def fetch():
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("API down")
+            return list(range(limit)), 10 * limit
+        return fetch
+
+
+def _cache(**kwargs):
+    return ResponseCache({"search": 60, "engine_tree": 0}, **kwargs)
+
+
+def test_hit_after_miss():
+    cache, fetch = _cache(), Counter()
+
+    async def run():
+        first = await cache.get("search", "q", fetch(10), limit=10)
+        second = await cache.get("search", "q", fetch(10), limit=10)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second and fetch.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_larger_limit_answers_smaller_but_not_the_reverse():
+    cache, fetch = _cache(), Counter()
+
+    async def run():
+        await cache.get("search", "latest", fetch(50), limit=50)
+        small = await cache.get("search", "latest", fetch(10), limit=10)
+        assert fetch.calls == 1 and len(small) == 50
+        await cache.get("search", "latest", fetch(100), limit=100)
+        assert fetch.calls == 2
+        # 更大的一页替换了之前的缓存
+        await cache.get("search", "latest", fetch(60), limit=60)
+        assert fetch.calls == 2
+
+    asyncio.run(run())
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    cache, fetch = _cache(), Counter(delay=0.05)
+
+    async def run():
+        return await asyncio.gather(
+            cache.get("search", "q", fetch(20), limit=20),
+            cache.get("search", "q", fetch(20), limit=10),
+            cache.get("search", "q", fetch(20), limit=20),
+        )
+
+    results = asyncio.run(run())
+    assert fetch.calls == 1
+    assert all(r is results[0] for r in results)
+    assert cache.stats()["endpoints"]["search"] == {"hits": 0, "coalesced": 2, "misses": 1}
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_request():
+    cache, fetch = _cache(), Counter(delay=0.05)
+
+    async def run():
+        impatient = asyncio.ensure_future(cache.get("search", "q", fetch(5), limit=5))
+        patient = asyncio.ensure_future(cache.get("search", "q", fetch(5), limit=5))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(run()) == list(range(5))
+    assert fetch.calls == 1
+
+
+def test_errors_are_not_cached():
+    cache, failing = _cache(), Counter(delay=0.01, fail=True)
+
+    async def run():
+        results = await asyncio.gather(
+            cache.get("search", "q", failing(5), limit=5),
+            cache.get("search", "q", failing(5), limit=5),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert failing.calls == 1
+        ok = Counter()
+        assert await cache.get("search", "q", ok(5), limit=5) == list(range(5))
+        assert ok.calls == 1
+
+    asyncio.run(run())
+    assert cache.stats()["entries"] == 1
+
+
+def test_zero_ttl_endpoint_always_fetches():
+    cache, fetch = _cache(), Counter()
+
+    async def run():
+        for _ in range(3):
+            await cache.get("engine_tree", "", fetch(1))
+
+    asyncio.run(run())
+    assert fetch.calls == 3 and cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_under_the_byte_budget():
+    cache, fetch = _cache(max_bytes=250), Counter()
+
+    async def run():
+        for key in ("a", "b", "c"):
+            await cache.get("search", key, fetch(10), limit=10)
+        await cache.get("search", "a", fetch(10), limit=10)
+
+    asyncio.run(run())
+    assert cache.bytes <= 250 and cache.evictions == 2
+    assert fetch.calls == 4
+
+
+def test_expired_entries_are_refetched():
+    cache, fetch = ResponseCache({"search": 0.01}), Counter()
+
+    async def run():
+        await cache.get("search", "q", fetch(1), limit=1)
+        await asyncio.sleep(0.02)
+        await cache.get("search", "q", fetch(1), limit=1)
+
+    asyncio.run(run())
+    assert fetch.calls == 2
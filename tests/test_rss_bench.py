@@ -0,0 +1,75 @@
+import asyncio
+import base64
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+
+from opennews_mcp.rss_bench import STAGES, ReplayServer, compare, load_archive, run
+
+RECORDED = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+
+
+def _rss(prefix: str, n: int) -> bytes:
+    items = "".join(
+        f"<item><title>{prefix} headline number {i} about markets</title><link>https://{prefix}.example/{i}</link>"
+        f"<pubDate>{format_datetime(RECORDED - timedelta(minutes=i))}</pubDate></item>"
+        for i in range(n)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+
+
+def _archive(tmp_path):
+    sources = [
+        {"name": "alpha", "url": "https://alpha.example/rss", "status": 200, "latency": 0.2,
+         "headers": {"content-type": "application/rss+xml"}, "body": base64.b64encode(_rss("alpha", 5)).decode()},
+        {"name": "beta", "url": "https://beta.example/rss", "status": 200, "latency": 0.1,
+         "body": base64.b64encode(_rss("beta", 3)).decode()},
+        {"name": "down", "url": "https://down.example/rss", "status": 0, "error": "ConnectError", "latency": 10.0},
+    ]
+    path = tmp_path / "archive.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"recorded_at": RECORDED.timestamp(), "sources": sources}, f)
+    return load_archive(path)
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"1x": {"stages": {"fetch": 0.100, "parse": 0.010, "sort": 0.001}}}
+    report = {"1x": {"stages": {"fetch": 0.125, "parse": 0.0105, "sort": 0.0019}},
+              "10x": {"stages": {"fetch": 9.0}}}
+    failures = compare(report, baseline, tolerance=0.2)
+    # sort 低于噪声下限，parse 在容差内，10x 没有基线
+    assert failures == ["1x fetch: 0.1250s vs baseline 0.1000s (+25%)"]
+
+
+def test_replay_server_serves_archive_and_injected_errors(tmp_path):
+    archive = _archive(tmp_path)
+    assert archive["sources"][0]["_body"] == _rss("alpha", 5)
+
+    async def fetch(server: ReplayServer, *paths: str) -> list[httpx.Response]:
+        await server.start()
+        try:
+            async with httpx.AsyncClient() as client:
+                return [await client.get(f"http://127.0.0.1:{server.port}{p}") for p in paths]
+        finally:
+            await server.close()
+
+    ok, failed, missing = asyncio.run(fetch(ReplayServer(archive), "/s/0/0", "/s/2/0", "/nope"))
+    assert (ok.status_code, ok.content, ok.headers["content-type"]) == (200, _rss("alpha", 5), "application/rss+xml")
+    # 录制时失败的源回放为 500
+    assert (failed.status_code, missing.status_code) == (500, 404)
+
+    (resp,) = asyncio.run(fetch(ReplayServer(archive, error_rate=1.0), "/s/1/3"))
+    assert resp.status_code == 500
+
+
+def test_run_reports_every_stage_per_scale(tmp_path):
+    report = asyncio.run(run(_archive(tmp_path), scales=[1, 2], repeat=1, max_items=4))
+    assert list(report) == ["1x", "2x"]
+    one, two = report["1x"], report["2x"]
+    assert (one["sources"], one["ok"], one["items"]) == (3, 2, 8)
+    assert (two["sources"], two["ok"], two["items"]) == (6, 4, 16)
+    assert set(one["stages"]) == set(STAGES)
+    assert one["picked"] <= 4 and one["bytes_per_item"] > 0
@@ -0,0 +1,71 @@
+import asyncio
+
+import run_multibot_matrix as matrix
+
+
+def _bot(name: str, token: str | None = "123:abcdefgh") -> dict:
+    return {"name": name, "category": name, "bot_token": token, "chat_id": "-100", "enabled": True}
+
+
+def test_timed_bounds_concurrency_and_keeps_failures_per_bot(capsys):
+    running, peak = 0, 0
+
+    async def ok(out):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        out.append("sent")
+        return "ok"
+
+    async def broken(out):
+        raise RuntimeError("feed exploded")
+
+    async def hangs(out):
+        await asyncio.sleep(10)
+
+    async def run():
+        limit = asyncio.Semaphore(2)
+        jobs = [matrix._timed(f"bot{i}", ok, limit, 1.0) for i in range(4)]
+        jobs += [matrix._timed("broken", broken, limit, 1.0), matrix._timed("hangs", hangs, limit, 0.05)]
+        return await asyncio.gather(*jobs)
+
+    rows = asyncio.run(run())
+    assert peak == 2
+    assert [r["status"] for r in rows] == ["ok"] * 4 + ["error", "timeout"]
+    # 后排队的机器人记录了等待槽位的时间
+    assert rows[0]["wait"] < 0.01 < rows[3]["wait"]
+    out = capsys.readouterr().out
+    assert "❌ Error running broken: feed exploded" in out
+    assert "❌ Timed out after 0s: hangs" in out
+
+
+def test_run_matrix_runs_bots_concurrently_and_prints_timings(monkeypatch, capsys):
+    started = []
+
+    async def fake_run_bot(cfg, out):
+        started.append(cfg["category"])
+        await asyncio.sleep(0.1)
+        if cfg["category"] == "politics":
+            raise RuntimeError("boom")
+        return "ok"
+
+    monkeypatch.setattr(matrix, "BOT_MATRIX",
+                        [_bot("world"), _bot("finance"), _bot("politics"), _bot("missing", token=None)])
+    monkeypatch.setattr(matrix, "_run_bot", fake_run_bot)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        t = loop.time()
+        await matrix.run_matrix(concurrency=3, timeout=5)
+        return loop.time() - t
+
+    elapsed = asyncio.run(run())
+    # 三个机器人并发：总耗时接近最慢的一个而不是三者之和
+    assert elapsed < 0.25
+    assert started == ["world", "finance", "politics"]
+    out = capsys.readouterr().out
+    assert "Skipping: Missing token or chat_id for missing" in out
+    assert "Per-bot timing:" in out
+    assert "- politics:" in out and "error" in out.split("- politics:")[1].splitlines()[0]
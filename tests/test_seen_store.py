@@ -0,0 +1,73 @@
+import sqlite3
+import time
+
+from opennews_mcp.seen_store import SeenStore, item_keys, normalize_link
+
+TITLE = "Fed holds rates steady in March"
+
+
+def _rows(path) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+
+def test_keys_are_signed_64_bit_integers():
+    keys = item_keys(TITLE, "https://example.com/a", 42)
+    assert len(keys) == 3
+    assert all(isinstance(k, int) and -(1 << 63) <= k < (1 << 63) for k in keys)
+    # 短标题不参与去重
+    assert len(item_keys("Breaking", "https://example.com/a")) == 1
+
+
+def test_link_normalization_matches_tracking_and_www_variants():
+    assert normalize_link("https://www.Example.com/a/?utm_source=x&b=2#top") == "example.com/a?b=2"
+    store_keys = item_keys(link="http://example.com/a?b=2")
+    assert store_keys == item_keys(link="https://www.example.com/a/?b=2&utm_medium=y")
+
+
+def test_writes_are_batched_until_batch_size(tmp_path):
+    path = tmp_path / "seen.sqlite3"
+    store = SeenStore(path, batch_size=4, flush_interval=3600)
+    store.add([1, 2, 3])
+    # 还在内存缓冲里，但查询已经能看到
+    assert store.seen_keys([1, 2, 3, 9]) == {1, 2, 3}
+    assert _rows(path) == 0
+    store.add([4])
+    assert _rows(path) == 4
+    store.close()
+
+
+def test_check_and_mark_matches_on_any_key(tmp_path):
+    store = SeenStore(tmp_path / "seen.sqlite3", flush_interval=3600)
+    assert not store.check_and_mark(TITLE, "https://example.com/a", 42)
+    assert store.check_and_mark(item_id=42)
+    assert store.check_and_mark(link="https://www.example.com/a/")
+    assert store.check_and_mark(TITLE.upper() + "!")
+    assert not store.is_seen("Another headline entirely", "https://example.com/b")
+    store.close()
+
+
+def test_marks_persist_across_instances(tmp_path):
+    path = tmp_path / "seen.sqlite3"
+    store = SeenStore(path, flush_interval=3600)
+    store.mark(TITLE, "https://example.com/a")
+    store.close()
+    reopened = SeenStore(path)
+    assert reopened.is_seen(link="https://example.com/a")
+    assert reopened.seen_keys(item_keys(TITLE)) == set(item_keys(TITLE))
+    reopened.close()
+
+
+def test_expired_keys_are_not_seen_and_get_purged(tmp_path, monkeypatch):
+    path = tmp_path / "seen.sqlite3"
+    store = SeenStore(path, ttl=60, flush_interval=3600, purge_interval=0)
+    store.add([1, 2])
+    store.flush()
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert not store.contains([1]) and store.seen_keys([1, 2]) == set()
+    # 下一次落盘顺带清理过期行
+    store.add([3])
+    store.flush()
+    assert _rows(path) == 1
+    store.close()
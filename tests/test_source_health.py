@@ -0,0 +1,81 @@
+import pytest
+
+from opennews_mcp import source_health
+from opennews_mcp.source_health import CLOSED, HALF_OPEN, MIN_TIMEOUT, OPEN, SourceHealthTracker, percentile
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(source_health.time, "time", lambda: now[0])
+    return now
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 21))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 100)) == (10, 19, 20)
+    assert percentile([], 95) == 0.0
+
+
+def test_timeout_follows_p95_with_headroom_within_bounds(tmp_path):
+    tracker = SourceHealthTracker(tmp_path / "health.json")
+    for latency in (0.5, 0.6, 0.7, 0.8):
+        tracker.record("fast", latency, items=3)
+    # 样本不足时用配置值
+    assert tracker.timeout_for("fast", 10.0) == 10.0
+    tracker.record("fast", 2.0, items=3)
+    assert tracker.timeout_for("fast", 10.0) == 3.0
+    assert tracker.timeout_for("fast", 2.5) == 2.5
+    for _ in range(5):
+        tracker.record("instant", 0.1, items=1)
+    assert tracker.timeout_for("instant", 10.0) == MIN_TIMEOUT
+
+
+def test_breaker_opens_after_threshold_and_probes_once_after_cooldown(tmp_path, clock):
+    tracker = SourceHealthTracker(tmp_path / "health.json", threshold=3, cooldown=600)
+    for _ in range(3):
+        assert tracker.allow("dead")
+        tracker.record("dead", 10.0, items=0, error="timeout")
+    h = tracker.get("dead")
+    assert h.state == OPEN and h.wasted == 30.0
+    assert not tracker.allow("dead")
+
+    clock[0] += 600
+    # 冷却结束只放行一次探测
+    assert tracker.allow("dead") and h.state == HALF_OPEN
+    assert not tracker.allow("dead")
+    tracker.record("dead", 10.0, items=0, error="timeout")
+    assert (h.state, h.cooldown) == (OPEN, 1200)
+
+    clock[0] += 1200
+    assert tracker.allow("dead")
+    tracker.record("dead", 0.4, items=5)
+    assert (h.state, h.failures, h.cooldown) == (CLOSED, 0, 0.0)
+    assert tracker.stats() == {"tracked": 1, "open": 0, "skipped": 2}
+
+
+def test_release_lets_the_next_fetch_probe(tmp_path, clock):
+    tracker = SourceHealthTracker(tmp_path / "health.json", threshold=1, cooldown=60)
+    tracker.record("flaky", 1.0, items=0, error="boom")
+    clock[0] += 60
+    assert tracker.allow("flaky")
+    # 探测请求被取消，没有结果
+    tracker.release("flaky")
+    assert tracker.allow("flaky")
+
+
+def test_state_survives_a_restart_with_probes_reset(tmp_path, clock):
+    path = tmp_path / "health.json"
+    tracker = SourceHealthTracker(path, threshold=1, cooldown=60)
+    tracker.record("ok", 0.3, items=0)
+    tracker.record("flaky", 1.0, items=0, error="boom")
+    clock[0] += 60
+    assert tracker.allow("flaky")
+    tracker.save()
+
+    reloaded = SourceHealthTracker(path, threshold=1, cooldown=60)
+    assert reloaded.get("flaky").state == OPEN
+    assert reloaded.allow("flaky")
+    report = {row["source"]: row for row in reloaded.report({"ok": 10.0})}
+    assert report["ok"]["empty_rate"] == 1.0 and report["ok"]["timeout"] == 10.0
+    assert report["flaky"]["error_rate"] == 1.0 and report["flaky"]["last_error"] == "boom"
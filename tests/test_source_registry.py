@@ -0,0 +1,72 @@
+import json
+import os
+
+from opennews_mcp.source_registry import EMPTY_RANK, UNKNOWN_RANK, SourceRegistry
+
+
+def _write(path, sources, keywords=None, mtime=None):
+    path.write_text(json.dumps({"default_category": "crypto", "keywords": keywords or {}, "sources": sources}),
+                    encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+SOURCES = [
+    {"name": "Jin10 (金十)", "label": "Jin10", "url": "https://jin10.example", "categories": ["finance"],
+     "priority": 1, "fast_lane": True},
+    {"name": "CoinDesk", "url": "https://coindesk.example/rss", "categories": ["crypto"], "priority": 3},
+    {"name": "Blog", "url": "https://blog.example/rss", "categories": []},
+]
+
+
+def test_lookup_tables(tmp_path):
+    path = tmp_path / "sources.json"
+    _write(path, SOURCES)
+    reg = SourceRegistry(path)
+    assert [s.name for s in reg.for_category("finance")] == ["Jin10 (金十)"]
+    # 未知分类回落到默认分类，all 是全部
+    assert [s.name for s in reg.for_category("nope")] == ["CoinDesk"]
+    assert len(reg.for_category("all")) == 3
+    assert reg.categories() == ["crypto", "finance"]
+    # 名称和 label 都能查到排名
+    assert (reg.rank("Jin10 (金十)"), reg.rank("Jin10"), reg.rank("CoinDesk")) == (1, 1, 3)
+    assert (reg.rank("Elsewhere"), reg.rank("")) == (UNKNOWN_RANK, EMPTY_RANK)
+    assert reg.get("Blog").label == "Blog" and reg.get("Jin10 (金十)").fast_lane
+
+
+def test_maybe_reload_picks_up_edits_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "sources.json"
+    _write(path, SOURCES, mtime=1_000_000)
+    reg = SourceRegistry(path, check_interval=0)
+    assert reg.version == 1
+    assert not reg.maybe_reload()
+
+    _write(path, SOURCES[1:], keywords={"default": {"hack*": 3}}, mtime=1_000_060)
+    assert reg.maybe_reload()
+    assert reg.version == 2
+    assert reg.rank("Jin10") == UNKNOWN_RANK
+    assert reg.matcher.score("Exchange hacked")[0] > 0
+    assert not reg.maybe_reload()
+
+
+def test_maybe_reload_respects_check_interval(tmp_path):
+    path = tmp_path / "sources.json"
+    _write(path, SOURCES, mtime=1_000_000)
+    reg = SourceRegistry(path, check_interval=3600)
+    _write(path, SOURCES[1:], mtime=1_000_060)
+    assert not reg.maybe_reload()
+    assert reg.version == 1
+
+
+def test_broken_edit_keeps_the_previous_registry(tmp_path):
+    path = tmp_path / "sources.json"
+    _write(path, SOURCES, mtime=1_000_000)
+    reg = SourceRegistry(path, check_interval=0)
+    path.write_text("{broken", encoding="utf-8")
+    os.utime(path, (1_000_060, 1_000_060))
+    assert not reg.maybe_reload()
+    assert reg.version == 1 and len(reg.sources) == 3
+    # 修好后再次修改即可重新加载
+    _write(path, SOURCES[:1], mtime=1_000_120)
+    assert reg.maybe_reload()
+    assert [s.name for s in reg.sources] == ["Jin10 (金十)"]
@@ -0,0 +1,57 @@
+from opennews_mcp.story_cluster import StoryIndex, cluster_items, jaccard, tokens
+
+
+def test_tokens_drop_stopwords_and_use_cjk_bigrams():
+    assert tokens("The Fed says rates will HOLD") == {"fed", "rates", "hold"}
+    assert tokens("美联储加息") == {"美联", "联储", "储加", "加息"}
+
+
+def test_near_duplicates_share_a_story():
+    index = StoryIndex()
+    a = index.add("Fed raises rates by 25 basis points")
+    b = index.add("Fed raises rates by 25 basis points, markets fall")
+    c = index.add("Oil prices slump on weak demand")
+    assert a == b != c
+    assert jaccard(tokens("a b"), tokens("")) == 0.0
+
+
+def test_promote_compares_later_texts_with_the_new_representative():
+    first, better, later = (
+        "Bitcoin ETF approved SEC",
+        "Bitcoin ETF approved SEC spot review",
+        "Bitcoin ETF spot review SEC decision",
+    )
+    plain = StoryIndex()
+    story = plain.add(first)
+    plain.add(better)
+    # 与原代表不够相近：不 promote 时是新故事
+    assert plain.add(later) != story
+
+    index = StoryIndex()
+    story = index.add(first)
+    assert index.add(better) == story
+    index.promote(story)
+    assert index.add(later) == story
+
+
+def test_removed_stories_are_forgotten():
+    index = StoryIndex()
+    story = index.add("Miners capitulate amid hashprice slump")
+    index.remove(story)
+    assert index.add("Miners capitulate amid hashprice slump") != story
+    assert len(index._docs) == len(index._reps) == 1
+
+
+def test_only_representatives_are_kept():
+    index = StoryIndex()
+    for i in range(50):
+        index.add(f"Fed raises rates by 25 basis points, update {i % 2}")
+    assert len(index._docs) == 1
+
+
+def test_cluster_items_keeps_first_seen_order():
+    titles = ["Fed holds rates", "Oil slumps", "Fed holds rates steady", "Oil slumps again"]
+    assert cluster_items(titles, text=str) == [
+        ["Fed holds rates", "Fed holds rates steady"],
+        ["Oil slumps", "Oil slumps again"],
+    ]
@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+
+from opennews_mcp.telegram_delivery import TelegramDelivery, TokenBucket
+
+TOKEN = "123:secret"
+
+
+def test_bucket_spends_burst_then_reserves_future_tokens():
+    bucket = TokenBucket(rate=2.0, burst=2.0)
+    now = bucket.updated
+    assert [bucket.reserve(now) for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    # 预约过的令牌要等补充后才轮到下一次
+    assert bucket.reserve(now + 1.0) == 0.5
+    assert bucket.reserve(now + 10.0) == 0.0
+
+
+def test_block_holds_reservations_then_refills_from_empty():
+    bucket = TokenBucket(rate=1.0, burst=5.0)
+    now = bucket.updated
+    bucket.block(now + 3.0)
+    assert bucket.reserve(now) == 3.0
+    # 解封时只有一个令牌，之后从空桶开始补充，不会攒下一整个 burst
+    assert bucket.reserve(now + 3.0) == 1.0
+    assert bucket.reserve(now + 3.0) == 2.0
+    # 更早的 block 不会缩短已有的封锁
+    bucket.block(now + 1.0)
+    assert bucket.blocked_until == now + 3.0
+
+
+class FakePool:
+    """Answers ``sendMessage`` with queued responses (200 once the queue is empty)."""
+
+    def __init__(self, *responses: httpx.Response):
+        self.responses = list(responses)
+        self.sent: list[dict] = []
+
+    async def post(self, url, json=None, **kwargs):
+        self.sent.append(json)
+        resp = self.responses.pop(0) if self.responses else httpx.Response(
+            200, json={"ok": True, "result": {"message_id": len(self.sent)}})
+        resp.request = httpx.Request("POST", url)
+        return resp
+
+
+def _delivery(pool: FakePool) -> TelegramDelivery:
+    return TelegramDelivery(pool=pool, bot_rate=1000, chat_rate=1000, group_rate_per_minute=60000)
+
+
+def test_429_pauses_only_the_throttled_chat_and_retries():
+    pool = FakePool(httpx.Response(429, json={"ok": False, "description": "Too Many Requests",
+                                              "parameters": {"retry_after": 0.2}}))
+    delivery = _delivery(pool)
+
+    async def run():
+        slow = asyncio.create_task(delivery.send(TOKEN, 1, "first"))
+        await asyncio.sleep(0.01)
+        other = await asyncio.wait_for(delivery.send(TOKEN, 2, "elsewhere"), 0.1)
+        return await slow, other
+
+    throttled, other = asyncio.run(run())
+    assert throttled.ok and throttled.attempts == 2
+    assert other.ok and other.attempts == 1
+    assert [p["text"] for p in pool.sent] == ["first", "elsewhere", "first"]
+    stats = delivery.stats()
+    assert (stats["sent"], stats["throttled"], stats["retries"], stats["queue_depth"]) == (2, 1, 1, 0)
+
+
+def test_messages_to_one_chat_go_out_in_call_order():
+    pool = FakePool(httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 0.05}}))
+    delivery = _delivery(pool)
+
+    async def run():
+        return await asyncio.gather(*(delivery.send(TOKEN, "-100", f"part {i}") for i in range(3)))
+
+    assert all(d.ok for d in asyncio.run(run()))
+    # 第一条被限流重试，后面的仍排在它之后
+    assert [p["text"] for p in pool.sent] == ["part 0", "part 0", "part 1", "part 2"]
+
+
+def test_markdown_errors_fall_back_to_plain_text():
+    pool = FakePool(httpx.Response(400, json={"ok": False, "description": "Bad Request: can't parse entities"}))
+    result = asyncio.run(_delivery(pool).send(TOKEN, 1, "*broken"))
+    assert result.ok and result.message_id == 2
+    assert ["parse_mode" in p for p in pool.sent] == [True, False]
+
+
+def test_permanent_errors_and_missing_config_are_reported_not_raised():
+    pool = FakePool(httpx.Response(403, json={"ok": False, "description": "Forbidden: bot was blocked"}))
+    delivery = _delivery(pool)
+    blocked = asyncio.run(delivery.send(TOKEN, 1, "hi"))
+    assert (blocked.ok, blocked.status, blocked.error, blocked.attempts) == (
+        False, 403, "Forbidden: bot was blocked", 1)
+    assert not asyncio.run(delivery.send("", 1, "hi")).ok
+    assert delivery.stats()["failed"] == 1
@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+
+from opennews_mcp.telegram_webhook import SECRET_HEADER, TelegramWebhook, delete_webhooks
+
+TOKEN_A, TOKEN_B = "111:aaa", "222:bbb"
+UPDATE = {"update_id": 1, "message": {"chat": {"id": 5}, "text": "/start"}}
+
+
+class FakePool:
+    """Records Bot API calls; tokens in ``failing`` get ``ok: false``."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls: list[tuple[str, dict | None]] = []
+
+    async def post(self, url, json=None, **kwargs):
+        self.calls.append((url.rsplit("/", 1)[1], json))
+        ok = not any(t in url for t in self.failing)
+        return httpx.Response(200, json={"ok": ok}, request=httpx.Request("POST", url))
+
+
+def _post(hook: TelegramWebhook, path: str, body=None, secret: str | None = None, content=None):
+    """POST to the webhook app in-process; returns the status and what the handler saw."""
+    async def run():
+        transport = httpx.ASGITransport(app=hook.app)
+        headers = {SECRET_HEADER: secret} if secret is not None else {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://hook") as client:
+            resp = await client.post(path, json=body, content=content, headers=headers)
+        # 处理在独立任务里运行，等它们结束
+        await asyncio.sleep(0)
+        return resp.status_code
+
+    return asyncio.run(run())
+
+
+def _hook(seen: list, **kw) -> TelegramWebhook:
+    async def handler(token, update):
+        seen.append((token, update["update_id"]))
+
+    return TelegramWebhook([TOKEN_A, TOKEN_B, ""], handler, base_url="https://news.example/", secret="s3cret",
+                           pool=FakePool(), **kw)
+
+
+def test_updates_are_routed_by_bot_id_and_handled_in_tasks():
+    seen = []
+    hook = _hook(seen)
+    assert hook.url_for(TOKEN_B) == "https://news.example/telegram/222"
+    assert _post(hook, "/telegram/222", UPDATE, secret="s3cret") == 200
+    assert seen == [(TOKEN_B, 1)]
+    assert hook.stats() == {"bots": 2, "received": 1, "rejected": 0, "failed": 0, "in_flight": 0}
+
+
+def test_requests_without_the_secret_header_are_rejected():
+    seen = []
+    hook = _hook(seen)
+    assert _post(hook, "/telegram/111", UPDATE) == 403
+    assert _post(hook, "/telegram/111", UPDATE, secret="guess") == 403
+    # 密钥正确但不是我们的机器人 / 正文不是 JSON
+    assert _post(hook, "/telegram/999", UPDATE, secret="s3cret") == 404
+    assert _post(hook, "/telegram/111", content=b"{not json", secret="s3cret") == 400
+    assert seen == []
+    assert (hook.received, hook.rejected) == (0, 4)
+
+
+def test_handler_failures_are_counted_not_raised():
+    async def handler(token, update):
+        raise RuntimeError("boom")
+
+    hook = TelegramWebhook([TOKEN_A], handler, base_url="https://news.example", secret="s3cret", pool=FakePool())
+    assert _post(hook, "/telegram/111", UPDATE, secret="s3cret") == 200
+    assert hook.failed == 1
+
+
+def test_register_and_delete_webhooks():
+    pool = FakePool(failing={TOKEN_B})
+    hook = TelegramWebhook([TOKEN_A, TOKEN_B], lambda t, u: None, base_url="https://news.example",
+                           secret="s3cret", pool=pool)
+    assert asyncio.run(hook.register()) == 1
+    method, payload = pool.calls[0]
+    assert method == "setWebhook"
+    assert (payload["url"], payload["secret_token"]) == ("https://news.example/telegram/111", "s3cret")
+
+    pool.calls.clear()
+    # 重复和空 token 只删一次 / 跳过
+    assert asyncio.run(delete_webhooks([TOKEN_A, TOKEN_A, "", TOKEN_B], pool)) == 1
+    assert [m for m, _ in pool.calls] == ["deleteWebhook", "deleteWebhook"]
+
+
+def test_a_random_secret_is_generated_when_none_is_configured():
+    first = TelegramWebhook([TOKEN_A], lambda t, u: None, secret="", pool=FakePool())
+    second = TelegramWebhook([TOKEN_A], lambda t, u: None, secret="", pool=FakePool())
+    assert len(first.secret) >= 32 and first.secret != second.secret
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+from opennews_mcp.keyword_matcher import KeywordMatcher
+from opennews_mcp.news_item import NewsItem
+from opennews_mcp.seen_store import SeenStore
+from opennews_mcp.tools.aggregator_rss import TopStories
+
+NOW = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+TS = int(NOW.timestamp())
+
+
+def _top(k, store=None):
+    top = TopStories(k, store=store, now=NOW)
+    top.matcher = KeywordMatcher({"default": {"bitcoin": 1, "fed": 2}})
+    return top
+
+
+def _item(title, source="CoinDesk", ts=TS - 60, link=None):
+    return NewsItem(title, link or f"https://example.com/{abs(hash(title))}", source, ts)
+
+
+def test_filters_keywords_window_and_exact_duplicates():
+    top = _top(10)
+    admitted = top.add_many([
+        _item("Bitcoin breaks record high"),
+        _item("Weather is nice today"),
+        _item("Fed holds rates steady", ts=TS - 3 * 86400),
+        _item("Bitcoin breaks record high"),
+    ])
+    assert [(it.title, score) for it, score in admitted] == [("Bitcoin breaks record high", 1.0)]
+    assert len(top) == 1
+
+
+def test_keeps_k_best_stories_by_rank_then_recency():
+    top = _top(2)
+    top.add_many([
+        _item("Bitcoin miners sell reserves", source="Unknown blog", ts=TS - 10),
+        _item("Fed minutes show caution", ts=TS - 300),
+        _item("Bitcoin ETF inflows surge", ts=TS - 100),
+    ])
+    assert [s.title for s in top.result()] == ["Bitcoin ETF inflows surge", "Fed minutes show caution"]
+
+
+def test_near_duplicates_join_one_story_with_best_member_as_representative():
+    top = _top(5)
+    top.add(_item("Bitcoin surges past 100k as ETF demand grows", source="Unknown blog"))
+    assert top.add(_item("Bitcoin surges past 100k as ETF demand grows fast", source="CoinDesk")) is None
+    (story,) = top.result()
+    assert story.source == "CoinDesk"
+    assert story.sources == ["CoinDesk", "Unknown blog"]
+    assert [m.source for m in story.related] == ["Unknown blog"]
+
+
+def test_evicted_story_is_forgotten():
+    top = _top(1)
+    top.add(_item("Bitcoin miners capitulate amid hashprice slump", source="Unknown blog"))
+    top.add(_item("Fed signals two cuts this year", ts=TS - 600))
+    assert top.add(_item("Bitcoin miners capitulate amid hashprice slump now", ts=TS - 30)) == 1.0
+    (story,) = top.result()
+    assert story.title == "Bitcoin miners capitulate amid hashprice slump now"
+    assert story.sources == ["CoinDesk"]
+
+
+def test_unseen_drops_items_already_pushed(tmp_path):
+    store = SeenStore(tmp_path / "seen.db")
+    try:
+        top = _top(10, store)
+        pushed, fresh = _item("Bitcoin halving countdown"), _item("Fed chair speaks on inflation")
+        store.mark(pushed.title, pushed.link)
+        assert top.unseen([pushed, fresh]) == [fresh]
+    finally:
+        store.close()
+
+
+def test_memory_is_bounded_by_the_stories_kept():
+    top = _top(3)
+    for i in range(200):
+        top.add(_item(f"Bitcoin headline {i} {'x' * (i % 7)} topic{i}", ts=TS - 1000 + i))
+    assert len(top) == 3
+    assert len(top._keys) == 3
+    assert len(top._index._docs) == 3
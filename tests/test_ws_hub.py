@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from opennews_mcp import ws_hub
+from opennews_mcp.ws_hub import NewsFilter, WSHub
+
+BTC = {"title": "BTC breaks out", "coins": [{"symbol": "btc"}], "engineType": "news", "newsType": "Bloomberg"}
+ETH = {"title": "ETH upgrade", "coins": ["ETH"], "engineType": "news", "newsType": "Reuters"}
+MACRO = {"text": "CPI beats", "engineType": "market"}
+
+
+class FakeWS:
+    """Stands in for ``NewsWSClient``: serves messages put into the class-level ``inbox``."""
+
+    inbox: asyncio.Queue
+    instances: list["FakeWS"] = []
+
+    def __init__(self, wss_url, token):
+        self.connected = False
+        self.subscribed = False
+        FakeWS.instances.append(self)
+
+    async def connect(self):
+        self.connected = True
+
+    async def subscribe_latest(self):
+        self.subscribed = True
+
+    async def receive_news(self, timeout=10.0):
+        try:
+            msg = await asyncio.wait_for(FakeWS.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if msg is None:
+            # 模拟断线
+            self.connected = False
+            return None
+        return msg
+
+    async def close(self):
+        self.connected = False
+
+
+@pytest.fixture
+def fake_ws(monkeypatch):
+    FakeWS.instances = []
+    monkeypatch.setattr(ws_hub, "NewsWSClient", FakeWS)
+    monkeypatch.setattr(ws_hub, "RECEIVE_TIMEOUT", 0.01)
+    monkeypatch.setattr(ws_hub, "RECONNECT_BASE", 0.01)
+    return FakeWS
+
+
+def _push(*msgs):
+    for msg in msgs:
+        FakeWS.inbox.put_nowait(msg)
+
+
+def test_filters():
+    assert NewsFilter().matches(MACRO)
+    assert NewsFilter.of(coins=["btc"]).matches(BTC) and not NewsFilter.of(coins=["btc"]).matches(ETH)
+    assert NewsFilter.of(has_coin=True).matches(ETH) and not NewsFilter.of(has_coin=True).matches(MACRO)
+    by_engine = NewsFilter.of(engine_types={"news": ["Reuters"], "market": []})
+    assert [by_engine.matches(m) for m in (BTC, ETH, MACRO)] == [False, True, True]
+
+
+def test_concurrent_listeners_share_one_connection(fake_ws):
+    hub = WSHub(wss_url="wss://x", token="t", idle_timeout=60)
+
+    async def run():
+        FakeWS.inbox = asyncio.Queue()
+        btc = asyncio.create_task(hub.collect(NewsFilter.of(coins=["BTC"]), max_items=1, timeout=1.0))
+        anything = asyncio.create_task(hub.collect(max_items=3, timeout=1.0))
+        await asyncio.sleep(0)
+        # 推送可以是包在 data 里的，也可以是裸条目；非新闻消息被忽略
+        _push({"data": ETH}, {"type": "ack"}, BTC, MACRO)
+        got = await asyncio.gather(btc, anything)
+        stats = hub.stats()
+        await hub.close()
+        return got, stats
+
+    (btc, anything), stats = asyncio.run(run())
+    assert btc == [BTC]
+    assert anything == [ETH, BTC, MACRO]
+    assert len(FakeWS.instances) == 1 and FakeWS.instances[0].subscribed
+    assert (stats["connects"], stats["received"], stats["listeners"]) == (1, 3, 0)
+
+
+def test_collect_waits_one_overall_deadline(fake_ws):
+    hub = WSHub(wss_url="wss://x", token="t", idle_timeout=60)
+
+    async def run():
+        FakeWS.inbox = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        task = asyncio.create_task(hub.collect(max_items=5, timeout=0.2))
+        await asyncio.sleep(0.05)
+        _push(BTC)
+        got = await task
+        await hub.close()
+        return got, loop.time() - started
+
+    got, elapsed = asyncio.run(run())
+    assert got == [BTC]
+    assert 0.2 <= elapsed < 0.35
+
+
+def test_reconnects_after_a_drop_and_closes_when_idle(fake_ws):
+    hub = WSHub(wss_url="wss://x", token="t", idle_timeout=0.05)
+
+    async def run():
+        FakeWS.inbox = asyncio.Queue()
+        async with hub.listen() as listener:
+            _push(None)
+            await asyncio.sleep(0.1)
+            _push(ETH)
+            got = await listener.collect(1, 1.0)
+        # 没有监听者超过 idle_timeout 后连接自行关闭
+        await asyncio.wait_for(hub._task, 1.0)
+        return got
+
+    assert asyncio.run(run()) == [ETH]
+    # 重连成功后清掉上次的错误
+    assert (hub.connects, hub.last_error) == (2, "")
+    assert not hub.connected
+
+
+def test_slow_listeners_drop_instead_of_blocking(fake_ws, monkeypatch):
+    monkeypatch.setattr(ws_hub, "LISTENER_QUEUE", 2)
+    hub = WSHub(wss_url="wss://x", token="t", idle_timeout=60)
+
+    async def run():
+        FakeWS.inbox = asyncio.Queue()
+        async with hub.listen() as listener:
+            _push(BTC, ETH, MACRO)
+            await asyncio.sleep(0.05)
+            got = await listener.collect(5, 0.05)
+        await hub.close()
+        return got
+
+    assert asyncio.run(run()) == [BTC, ETH]
+    assert hub.dropped == 1